@@ -0,0 +1,200 @@
+"""Benchmark cold start ของ Lambda handler ทั้ง 4 ตัว
+
+แต่ละรอบเปิด Python process ใหม่ (เหมือน container ใหม่ตอน scale-out) แล้วส่ง request แรกตาม SCENARIOS และวัด
+  - import:  เวลา import ไฟล์ handler (รวม boto3 และโมดูลที่ใช้ร่วมกัน)
+  - first:   request จริงครั้งแรก (สร้าง client + เรียก DynamoDB/S3 ผ่าน moto server บนเครื่อง)
+  - total:   import + preflight + first
+แล้วสรุป p50/p95/p99 ต่อ scenario — ไม่ต่อ AWS จริง ต้องมี moto[server]
+
+    python benchmarks/bench_cold_start.py [--runs 30] [--src lambdafunction] [--compare OLD_SRC] [--out result.json]
+
+เทียบกับโค้ดเวอร์ชันก่อน: git worktree add /tmp/old <commit> แล้วรันด้วย --compare /tmp/old/lambdafunction
+(รันสลับกันทีละรอบ เพื่อไม่ให้ load ของเครื่องที่เปลี่ยนไประหว่างรันทำให้ผลเอียง)
+"""
+import os
+import sys
+import json
+import base64
+import socket
+import argparse
+import subprocess
+import logging
+
+import boto3
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+REGION = 'us-east-1'
+SEED_ITEM_ID = 'ITEM#1700000000-bench000#FOUND'
+
+# request แรกหลัง cold start ที่พบบ่อยของแต่ละ handler: (ชื่อ, ไฟล์ handler, body)
+SCENARIOS = [
+    ('search', 'search-items-function.py', {'keyword': 'กระเป๋า', 'status': 'รอรับคืน'}),
+    ('found:get_upload_url', 'found_items_function.py',
+     {'action': 'get_upload_url', 'content_type': 'image/jpeg', 'content_length': 1000}),
+    ('found:upload_image', 'found_items_function.py',
+     {'action': 'upload_image', 'image_data': base64.b64encode(os.urandom(1024 * 1024)).decode('ascii')}),
+    ('found:report_found', 'found_items_function.py', {
+        'action': 'report_found', 'category': 'กระเป๋า', 'brand': 'Anello', 'details': 'สีดำ',
+        'location': 'SC3', 'date': '2025-01-01', 'reporter_name': 'bench', 'reporter_contact': '080'
+    }),
+    ('lost:get_upload_url', 'report-lost-item-function.py',
+     {'action': 'get_upload_url', 'content_type': 'image/jpeg', 'content_length': 1000}),
+    ('lost:report', 'report-lost-item-function.py', {
+        'itemDescription': 'กระเป๋า', 'brandOrId': 'Anello', 'distinguishingFeatures': 'สีดำ',
+        'lostLocation': 'SC3', 'lostDate': '2025-01-01', 'reporterName': 'bench', 'reporterContact': '080'
+    }),
+    ('admin:change_status', 'Admin_Update.py', {'action': 'change_status', 'item_id': SEED_ITEM_ID, 'status': 'รอรับคืน'}),
+]
+
+CHILD = r'''
+import os, sys, json, time, importlib.util
+path, body = sys.argv[1], json.loads(sys.stdin.read())
+sys.path.insert(0, os.path.dirname(path))
+out, sys.stdout = sys.stdout, open(os.devnull, 'w')
+started = time.perf_counter()
+spec = importlib.util.spec_from_file_location('handler', path)
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+imported = time.perf_counter()
+module.lambda_handler({'requestContext': {'http': {'method': 'OPTIONS'}}}, None)
+preflight = time.perf_counter()
+result = module.lambda_handler({'requestContext': {'http': {'method': 'POST'}}, 'body': json.dumps(body)}, None)
+done = time.perf_counter()
+out.write(json.dumps({
+    'import': (imported - started) * 1000,
+    'first': (done - preflight) * 1000,
+    'total': (done - started) * 1000,
+    'status': result['statusCode'],
+}))
+'''
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def setup_backend(endpoint):
+    """สร้างตาราง/bucket เหมือนของจริงใน moto server"""
+    kwargs = {'region_name': REGION, 'endpoint_url': endpoint}
+    dynamodb = boto3.resource('dynamodb', **kwargs)
+    string_attrs = ['item_id', 'item_type', 'gsi1_pk', 'gsi1_sk', 'gsi2_pk', 'gsi2_sk', 'gsi3_pk', 'gsi3_sk',
+                    'updated_at']
+    table = dynamodb.create_table(
+        TableName='Items_TU',
+        KeySchema=[{'AttributeName': 'item_id', 'KeyType': 'HASH'},
+                   {'AttributeName': 'item_type', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[{'AttributeName': a, 'AttributeType': 'S'} for a in string_attrs],
+        BillingMode='PAY_PER_REQUEST',
+        GlobalSecondaryIndexes=[
+            {'IndexName': f'GSI{n}', 'Projection': {'ProjectionType': 'ALL'},
+             'KeySchema': [{'AttributeName': f'gsi{n}_pk', 'KeyType': 'HASH'},
+                           {'AttributeName': f'gsi{n}_sk', 'KeyType': 'RANGE'}]}
+            for n in (1, 2, 3)
+        ] + [
+            {'IndexName': 'GSI4', 'Projection': {'ProjectionType': 'ALL'},
+             'KeySchema': [{'AttributeName': 'item_type', 'KeyType': 'HASH'},
+                           {'AttributeName': 'updated_at', 'KeyType': 'RANGE'}]}
+        ]
+    )
+    dynamodb.create_table(
+        TableName='Items_TU_SearchIndex',
+        KeySchema=[{'AttributeName': 'gram', 'KeyType': 'HASH'},
+                   {'AttributeName': 'item_id', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[{'AttributeName': 'gram', 'AttributeType': 'S'},
+                              {'AttributeName': 'item_id', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    boto3.client('s3', **kwargs).create_bucket(Bucket='tu-lostfound-pictures')
+    created = '2025-01-01T00:00:00'
+    table.put_item(Item={
+        'item_id': SEED_ITEM_ID, 'item_type': 'FOUND', 'case_id': 'F100000', 'category': 'กระเป๋า',
+        'brand': 'Anello', 'details': 'สีดำ', 'location': 'SC3', 'date': '2025-01-01', 'status': 'รอรับคืน',
+        'created_at': created, 'updated_at': created,
+        'gsi1_pk': 'STATUS#รอรับคืน', 'gsi1_sk': created, 'gsi2_pk': 'CATEGORY#กระเป๋า', 'gsi2_sk': created,
+        'gsi3_pk': 'CASE#F', 'gsi3_sk': 'F100000'
+    })
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, -(-len(ordered) * pct // 100) - 1))
+    return ordered[int(rank)]
+
+
+def run_once(src, handler, body, env):
+    path = os.path.abspath(os.path.join(src, handler))
+    proc = subprocess.run([sys.executable, '-c', CHILD, path], input=json.dumps(body),
+                          env=env, capture_output=True, text=True, check=True)
+    result = json.loads(proc.stdout)
+    if result['status'] != 200:
+        raise RuntimeError(f"{handler} returned {result['status']}")
+    return result
+
+
+def run(sources, runs, env):
+    """คืน {label: {scenario: {metric: [ms, ...]}}} — ทุก source รันสลับกันในแต่ละรอบ"""
+    results = {label: {} for label in sources}
+    for name, handler, body in SCENARIOS:
+        for label in sources:
+            results[label][name] = {'import': [], 'first': [], 'total': []}
+        for _ in range(runs):
+            for label, src in sources.items():
+                result = run_once(src, handler, body, env)
+                for metric, samples in results[label][name].items():
+                    samples.append(result[metric])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=30)
+    parser.add_argument('--src', default=os.path.join(ROOT, 'lambdafunction'))
+    parser.add_argument('--compare', help='โฟลเดอร์ lambdafunction ของเวอร์ชันที่ใช้เทียบ')
+    parser.add_argument('--out')
+    args = parser.parse_args()
+    sources = {'current': args.src}
+    if args.compare:
+        sources['compare'] = args.compare
+
+    from moto.server import ThreadedMotoServer
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    port = free_port()
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=port)
+    server.start()
+    endpoint = f'http://127.0.0.1:{port}'
+    env = dict(os.environ, AWS_ENDPOINT_URL=endpoint, AWS_DEFAULT_REGION=REGION,
+               AWS_ACCESS_KEY_ID='bench', AWS_SECRET_ACCESS_KEY='bench')
+    os.environ.update(AWS_ACCESS_KEY_ID='bench', AWS_SECRET_ACCESS_KEY='bench')
+    try:
+        setup_backend(endpoint)
+        results = run(sources, args.runs, env)
+    finally:
+        server.stop()
+
+    for label, src in sources.items():
+        print(f"\n[{label}] {os.path.relpath(src)} — {args.runs} cold starts per scenario (ms)")
+        print(f"{'scenario':<22} {'import p50':>10} {'first p50':>10} {'total p50':>10} {'total p95':>10} {'total p99':>10}")
+        for name, samples in results[label].items():
+            print(f"{name:<22} {percentile(samples['import'], 50):>10.1f} {percentile(samples['first'], 50):>10.1f}"
+                  f" {percentile(samples['total'], 50):>10.1f} {percentile(samples['total'], 95):>10.1f}"
+                  f" {percentile(samples['total'], 99):>10.1f}")
+    if args.compare:
+        print("\ncurrent vs compare (total)")
+        print(f"{'scenario':<22} {'Δp50':>7} {'Δp95':>7} {'Δp99':>7}")
+        for name in results['current']:
+            line = f"{name:<22}"
+            for pct in (50, 95, 99):
+                current = percentile(results['current'][name]['total'], pct)
+                base = percentile(results['compare'][name]['total'], pct)
+                line += f" {(current - base) / base * 100:>6.0f}%"
+            print(line)
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'sources': sources, 'runs': args.runs, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,392 @@
+"""Load test ของ Lambda handler ทั้ง 4 ตัวกับ DynamoDB/S3 บนเครื่อง (moto server หรือ DynamoDB Local)
+
+สร้างข้อมูลจำลอง (ไทย/อังกฤษ) ตามขนาดที่กำหนด แล้วยิง request ผสมตาม PROFILES
+จาก worker หลาย process พร้อมกัน (1 process = 1 Lambda container ที่รับทีละ request)
+รายงานต่อขนาดข้อมูล x concurrency:
+  - throughput (request/วินาที) และ error
+  - p50/p95/p99 ต่อประเภท request
+  - read/write capacity units, items scanned/returned ต่อ request (จาก EMF ของ lostfound_core.metrics)
+  - memory peak (max RSS ของ worker)
+
+    python benchmarks/bench_load.py [--sizes 1000,10000,100000] [--concurrency 1,4,16] [--profile mixed]
+                                    [--requests 100] [--index] [--snapshot]
+                                    [--save baseline.json] [--check baseline.json]
+
+--save เก็บผลเป็น baseline, --check เทียบกับ baseline แล้วจบด้วย exit code 1 ถ้า p95, RCU หรือ
+items scanned แย่ลงเกิน --tolerance (ค่า RCU/items scanned ไม่ขึ้นกับเครื่อง จึงจับ regression
+ของ scan/filter ได้แม่นกว่าเวลา)
+--endpoint ใช้ DynamoDB Local/moto ที่รันอยู่แล้วแทนการเปิด moto server เอง (ต้องเป็นตารางว่าง)
+--index สร้าง n-gram index ด้วย (ที่ 100k item มีหลายล้านแถว ใช้เวลานาน) ไม่ใส่ = ค้นหาข้อความด้วย scan
+--snapshot สร้าง snapshot ของผลค้นหาใน S3 (bucket private SNAPSHOT_BUCKET) หลัง seed
+           (คำค้นที่ขอ view card/detail ตอบจาก snapshot ใน memory)
+
+moto server เป็น Python process เดียว เวลาที่ concurrency สูงหรือ 100k item จึงรวมคอขวดของ moto เอง
+ตัวเลขที่เทียบข้ามเครื่องได้คือ RCU/items scanned ส่วนเวลาให้เทียบบนเครื่องเดียวกัน หรือใช้ DynamoDB Local:
+    docker run -p 8000:8000 amazon/dynamodb-local
+    python benchmarks/bench_load.py --endpoint http://localhost:8000 --sizes 100000
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import datetime
+import contextlib
+import multiprocessing
+
+import boto3
+
+from bench_cold_start import REGION, free_port, percentile, setup_backend
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SNAPSHOT_BUCKET = 'tu-lostfound-private'
+
+HANDLERS = {
+    'search': 'search-items-function.py',
+    'found': 'found_items_function.py',
+    'lost': 'report-lost-item-function.py',
+    'admin': 'Admin_Update.py',
+}
+
+# ---- ข้อมูลจำลอง ----
+
+CATEGORIES = ['บัตร', 'โทรศัพท์', 'อุปกรณ์อิเล็กทรอนิกส์', 'เครื่องเขียน', 'กระเป๋า', 'กุญแจ',
+              'ขวดน้ำ', 'เสื้อผ้า', 'แว่นตา', 'นาฬิกา', 'หูฟัง', 'ร่ม']
+BRANDS = ['Apple iPhone 13', 'Samsung Galaxy A54', 'Xiaomi Redmi', 'Oppo Reno', 'AirPods Pro', 'Sony WH-1000XM4',
+          'JBL Tune', 'Casio G-Shock', 'Uniqlo', 'Adidas', 'Nike', 'Tupperware', 'บัตรนักศึกษา', 'บัตรประชาชน',
+          'Lamy Safari', 'Pilot', 'Anello', 'Kanken', 'Ray-Ban', 'Hydro Flask', 'ไม่มียี่ห้อ', 'Mi Band 7']
+DETAILS = ['สีดำ', 'สีขาว', 'สีฟ้า', 'สีชมพู', 'สีเขียวเข้ม', 'มีรอยร้าวที่มุมจอ', 'มีสติ๊กเกอร์แมว', 'เคสใส',
+           'ห้อยพวงกุญแจ Doraemon', 'มีชื่อเขียนไว้ด้านใน', 'ขอบถลอก', 'รุ่นใหม่', 'ใส่ซองหนัง', 'black case',
+           'cracked screen', 'with name tag', 'ลายทาง', 'มีบัตรอยู่ข้างใน 3 ใบ', 'สายหนังสีน้ำตาล']
+LOCATIONS = ['SC1', 'SC2', 'SC3', 'บร.1', 'บร.2', 'บร.3', 'โรงอาหารกลาง', 'หอสมุดปรีดี', 'ตึกโดม',
+             'อาคารเรียนรวม SC', 'สนามกีฬา', 'หอพักโซน B', 'ป้ายรถตู้หน้ามอ', 'Tu Dome']
+STATUSES = ['แจ้งแล้ว', 'รอรับคืน', 'คืนเจ้าของแล้ว', 'หมดอายุ']
+STATUS_WEIGHTS = [3, 10, 4, 1]
+KEYWORDS = ['iphone', 'samsung', 'airpods', 'บัตรนักศึกษา', 'กระเป๋า', 'สีดำ', 'เคสใส', 'sony', 'กุญแจ',
+            'g-shock', 'ขวดน้ำ', 'ray-ban', 'ลายทาง', 'name tag']
+START = datetime.datetime(2025, 1, 1)
+
+
+def make_item(i, rng):
+    item_type = rng.choice(['FOUND', 'LOST'])
+    created = (START + datetime.timedelta(seconds=rng.randrange(365 * 24 * 3600))).isoformat()
+    status = rng.choices(STATUSES, STATUS_WEIGHTS)[0]
+    category = rng.choice(CATEGORIES)
+    return {
+        'item_id': f"ITEM#{1700000000 + i}-{rng.getrandbits(32):08x}#{item_type}",
+        'item_type': item_type,
+        'case_id': f"{item_type[0]}{100000 + i % 900000}",
+        'category': category,
+        'brand': rng.choice(BRANDS),
+        'details': ' '.join(rng.sample(DETAILS, rng.randint(1, 3))),
+        'location': rng.choice(LOCATIONS),
+        'date': created[:10],
+        'time': f"{rng.randrange(8, 20):02d}:{rng.randrange(60):02d}",
+        'status': status,
+        'reporter_name': f"ผู้แจ้ง {i}",
+        'reporter_contact': f"08{rng.randrange(10 ** 8):08d}",
+        'reporter_student_id': f"6{rng.randrange(10 ** 9):09d}",
+        'created_at': created,
+        'updated_at': created,
+        'gsi1_pk': f'STATUS#{status}',
+        'gsi1_sk': created,
+        'gsi2_pk': f'CATEGORY#{category}',
+        'gsi2_sk': created,
+        'gsi3_pk': f'CASE#{item_type[0]}',
+        'gsi3_sk': f"{item_type[0]}{100000 + i % 900000}",
+    }
+
+
+def generate_items(size, seed=361):
+    rng = random.Random(seed)
+    return [make_item(i, rng) for i in range(size)]
+
+
+def seed_backend(endpoint, items, with_index, with_snapshot=False):
+    kwargs = {'region_name': REGION, 'endpoint_url': endpoint}
+    dynamodb = boto3.resource('dynamodb', **kwargs)
+    with dynamodb.Table('Items_TU').batch_writer() as batch:
+        for item in items:
+            batch.put_item(Item=item)
+    if with_snapshot:
+        from lostfound_core import snapshot
+        # snapshot ต้องอยู่ใน bucket private แยกจาก bucket รูป
+        boto3.client('s3', **kwargs).create_bucket(Bucket=SNAPSHOT_BUCKET)
+        snapshot.SNAPSHOT_BUCKET = SNAPSHOT_BUCKET
+        with contextlib.redirect_stdout(io.StringIO()):
+            snapshot.build(dynamodb.Table('Items_TU'), boto3.client('s3', **kwargs), force=True)
+    if with_index:
+        from lostfound_core import search_index
+        with dynamodb.Table('Items_TU_SearchIndex').batch_writer() as batch:
+            for item in items:
+                for gram in search_index.item_grams(item):
+                    batch.put_item(Item={'gram': gram, 'item_id': item['item_id'], 'item_type': item['item_type']})
+        search_index.mark_built(dynamodb.Table('Items_TU_SearchIndex'), len(items))
+
+
+# ---- request แต่ละประเภท: (handler, สร้าง body จาก rng และ item_id ที่มีอยู่) ----
+
+def _report_found(rng):
+    return {'action': 'report_found', 'category': rng.choice(CATEGORIES), 'brand': rng.choice(BRANDS),
+            'details': rng.choice(DETAILS), 'location': rng.choice(LOCATIONS), 'date': '2025-06-01',
+            'reporter_name': 'load test', 'reporter_contact': '0800000000'}
+
+
+def _case_id(item_id):
+    """case_id ของ item ที่ make_item สร้าง (คำนวณกลับจาก item_id)"""
+    i = int(item_id.split('#')[1].split('-')[0]) - 1700000000
+    return f"{item_id.rsplit('#', 1)[1][0]}{100000 + i % 900000}"
+
+
+def _report_lost(rng):
+    return {'itemDescription': rng.choice(CATEGORIES), 'brandOrId': rng.choice(BRANDS),
+            'distinguishingFeatures': rng.choice(DETAILS), 'lostLocation': rng.choice(LOCATIONS),
+            'lostDate': '2025-06-01', 'reporterName': 'load test', 'reporterContact': '0800000000'}
+
+
+def _date_range(rng):
+    day = START + datetime.timedelta(days=rng.randrange(358))
+    return {'created_from': day.strftime('%Y-%m-%d'), 'created_to': (day + datetime.timedelta(days=7)).strftime('%Y-%m-%d'),
+            'page_size': 20}
+
+
+def _changes_since(rng):
+    # หน้า admin ที่เปิดค้างไว้: ขอเฉพาะที่เปลี่ยนในช่วง 5 นาทีล่าสุด แทนการโหลดใหม่ทั้งหมด
+    cursor = datetime.datetime.utcnow() - datetime.timedelta(minutes=5)
+    return {'search_mode': 'changes_since', 'cursor': cursor.isoformat(), 'view': 'admin'}
+
+
+OPERATIONS = {
+    'search:keyword': ('search', lambda rng, ids: {'keyword': rng.choice(KEYWORDS)}),
+    'search:location': ('search', lambda rng, ids: {'location': rng.choice(LOCATIONS)}),
+    'search:keyword_card': ('search', lambda rng, ids: {'keyword': rng.choice(KEYWORDS), 'view': 'card'}),
+    'search:category': ('search', lambda rng, ids: {'category': rng.choice(CATEGORIES), 'status': 'รอรับคืน',
+                                                    'view': 'card', 'page_size': 20}),
+    'search:status_page': ('search', lambda rng, ids: {'status': rng.choice(STATUSES), 'page_size': 20}),
+    'search:date_range': ('search', lambda rng, ids: _date_range(rng)),
+    'search:case_id': ('search', lambda rng, ids: {'keyword': f"F{100000 + rng.randrange(len(ids))}"}),
+    'lookup:case_id': ('search', lambda rng, ids: {'search_mode': 'lookup_case', 'case_id': _case_id(rng.choice(ids))}),
+    'sync:changes': ('search', lambda rng, ids: _changes_since(rng)),
+    'report:found': ('found', lambda rng, ids: _report_found(rng)),
+    'report:lost': ('lost', lambda rng, ids: _report_lost(rng)),
+    'admin:change_status': ('admin', lambda rng, ids: {'action': 'change_status', 'item_id': rng.choice(ids),
+                                                       'status': rng.choice(STATUSES)}),
+    'admin:update': ('admin', lambda rng, ids: {'action': 'update', 'item_id': rng.choice(ids),
+                                                'updates': {'details': rng.choice(DETAILS)}}),
+}
+
+# น้ำหนักของแต่ละประเภท request
+PROFILES = {
+    'read': {'search:keyword': 30, 'search:keyword_card': 15, 'search:location': 15, 'search:category': 25, 'search:status_page': 15,
+             'search:date_range': 10, 'search:case_id': 5, 'lookup:case_id': 5},
+    'mixed': {'search:keyword': 25, 'search:keyword_card': 10, 'search:location': 10, 'search:category': 20, 'search:status_page': 10,
+              'search:date_range': 5, 'search:case_id': 5, 'lookup:case_id': 5, 'report:found': 8,
+              'report:lost': 7, 'admin:change_status': 6, 'admin:update': 4, 'sync:changes': 5},
+    'write': {'search:keyword': 10, 'search:category': 10, 'report:found': 25, 'report:lost': 25,
+              'admin:change_status': 20, 'admin:update': 10},
+}
+
+
+# ---- worker (process แยก = Lambda container แยก) ----
+
+def load_handler(src, filename):
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(filename.replace('-', '_')[:-3], os.path.join(src, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def invoke(module, body, parse_line):
+    """เรียก handler 1 ครั้ง คืน (ms, status, เอกสาร EMF หรือ {})"""
+    out = io.StringIO()
+    event = {'requestContext': {'http': {'method': 'POST'}}, 'body': json.dumps(body, ensure_ascii=False)}
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(out):
+        result = module.lambda_handler(event, None)
+    elapsed = (time.perf_counter() - started) * 1000
+    emf = {}
+    for line in out.getvalue().splitlines():
+        emf = parse_line(line) or emf
+    return elapsed, result['statusCode'], emf
+
+
+def worker(number, src, env, profile, requests, item_ids, seed, barrier, results):
+    os.environ.update(env)
+    sys.path.insert(0, src)
+    with contextlib.redirect_stdout(io.StringIO()):
+        modules = {name: load_handler(src, filename) for name, filename in HANDLERS.items()}
+    from metrics_report import parse_line
+
+    rng = random.Random(seed * 1000 + number)
+    names = list(PROFILES[profile])
+    weights = list(PROFILES[profile].values())
+    # warm ทุก handler ก่อนเริ่มจับเวลา (cold start วัดแยกใน bench_cold_start.py)
+    for name, (handler, make_body) in OPERATIONS.items():
+        if name in PROFILES[profile]:
+            invoke(modules[handler], make_body(rng, item_ids), parse_line)
+    barrier.wait()
+
+    samples = []
+    for name in rng.choices(names, weights, k=requests):
+        handler, make_body = OPERATIONS[name]
+        elapsed, status, emf = invoke(modules[handler], make_body(rng, item_ids), parse_line)
+        samples.append({
+            'op': name, 'ms': elapsed, 'ok': status < 500,
+            'rcu': emf.get('ReadCapacityUnits', 0), 'wcu': emf.get('WriteCapacityUnits', 0),
+            'scanned': emf.get('ItemsScanned', 0), 'returned': emf.get('ItemsReturned', 0),
+        })
+    import resource
+    results.put((samples, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def run_level(ctx, src, env, profile, concurrency, requests, item_ids, seed):
+    barrier = ctx.Barrier(concurrency + 1)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(n, src, env, profile, requests, item_ids, seed, barrier, results))
+             for n in range(concurrency)]
+    for proc in procs:
+        proc.start()
+    barrier.wait()
+    started = time.perf_counter()
+    collected = [results.get() for _ in procs]
+    wall = time.perf_counter() - started
+    for proc in procs:
+        proc.join()
+    samples = [s for worker_samples, _ in collected for s in worker_samples]
+    return summarize(samples, wall, max(rss for _, rss in collected))
+
+
+def summarize(samples, wall, memory_mb):
+    ops = {}
+    for sample in samples:
+        ops.setdefault(sample['op'], []).append(sample)
+    summary = {
+        'requests': len(samples),
+        'errors': sum(1 for s in samples if not s['ok']),
+        'throughput': round(len(samples) / wall, 2),
+        'memory_peak_mb': round(memory_mb, 1),
+        'ops': {},
+    }
+    for name, op_samples in sorted(ops.items()):
+        latencies = [s['ms'] for s in op_samples]
+        entry = {f'p{pct}': round(percentile(latencies, pct), 2) for pct in (50, 95, 99)}
+        for field in ('rcu', 'wcu', 'scanned', 'returned'):
+            entry[field] = round(sum(s[field] for s in op_samples) / len(op_samples), 2)
+        entry['n'] = len(op_samples)
+        summary['ops'][name] = entry
+    return summary
+
+
+# ---- รายงาน / baseline ----
+
+def print_level(key, summary):
+    print(f"\n[{key}] {summary['requests']} requests, {summary['throughput']:.1f} req/s, "
+          f"{summary['errors']} errors, memory peak {summary['memory_peak_mb']:.0f} MB")
+    print(f"  {'operation':<22} {'n':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'RCU':>8} {'WCU':>6}"
+          f" {'scanned':>8} {'returned':>8}")
+    for name, op in summary['ops'].items():
+        print(f"  {name:<22} {op['n']:>5} {op['p50']:>8.1f} {op['p95']:>8.1f} {op['p99']:>8.1f} {op['rcu']:>8.1f}"
+              f" {op['wcu']:>6.1f} {op['scanned']:>8.0f} {op['returned']:>8.1f}")
+
+
+def compare(results, baseline, tolerance):
+    """คืนรายการ regression เทียบกับ baseline (เฉพาะ level/operation ที่มีทั้งสองฝั่ง)"""
+    regressions = []
+    for key, summary in results.items():
+        base = baseline.get('results', {}).get(key)
+        if not base:
+            continue
+        if summary['throughput'] < base['throughput'] * (1 - tolerance):
+            regressions.append(f"{key} throughput {base['throughput']} -> {summary['throughput']} req/s")
+        for name, op in summary['ops'].items():
+            base_op = base['ops'].get(name)
+            if not base_op:
+                continue
+            for field, floor in (('p95', 1.0), ('rcu', 1.0), ('scanned', 10)):
+                # floor กันค่าที่เล็กมากแกว่งเป็นเปอร์เซ็นต์สูง
+                if op[field] > max(base_op[field], floor) * (1 + tolerance):
+                    regressions.append(f"{key} {name} {field} {base_op[field]} -> {op[field]}")
+    return regressions
+
+
+def start_moto():
+    from moto.server import ThreadedMotoServer
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    port = free_port()
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=port)
+    server.start()
+    return server, f'http://127.0.0.1:{port}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--concurrency', default='1,4,16')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='mixed')
+    parser.add_argument('--requests', type=int, default=100, help='จำนวน request ต่อ worker')
+    parser.add_argument('--index', action='store_true', help='สร้าง n-gram index และเปิด SEARCH_INDEX_ENABLED')
+    parser.add_argument('--snapshot', action='store_true', help='สร้าง snapshot ของผลค้นหาและเปิด SEARCH_SNAPSHOT_ENABLED')
+    parser.add_argument('--src', default=os.path.join(ROOT, 'lambdafunction'))
+    parser.add_argument('--endpoint', help='ใช้ endpoint นี้แทนการเปิด moto server (ใช้ได้ครั้งละขนาดเดียว)')
+    parser.add_argument('--seed', type=int, default=361)
+    parser.add_argument('--save', help='บันทึกผลเป็น baseline (JSON)')
+    parser.add_argument('--check', help='baseline ที่ใช้เทียบ')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(',')]
+    levels = [int(c) for c in args.concurrency.split(',')]
+    if args.endpoint and len(sizes) > 1:
+        parser.error('--endpoint ใช้ได้กับ --sizes ค่าเดียว')
+    src = os.path.abspath(args.src)
+    sys.path.insert(0, src)
+
+    os.environ.update(AWS_ACCESS_KEY_ID='bench', AWS_SECRET_ACCESS_KEY='bench', AWS_DEFAULT_REGION=REGION)
+    # spawn: worker ต้องเริ่มจาก process ใหม่ ไม่ fork มาพร้อม thread ของ moto server
+    ctx = multiprocessing.get_context('spawn')
+    results = {}
+    for size in sizes:
+        server = None
+        endpoint = args.endpoint
+        if not endpoint:
+            server, endpoint = start_moto()
+        try:
+            setup_backend(endpoint)
+            started = time.perf_counter()
+            items = generate_items(size, args.seed)
+            seed_backend(endpoint, items, args.index, args.snapshot)
+            print(f"\nseeded {size} items in {time.perf_counter() - started:.1f}s ({endpoint})")
+            item_ids = [item['item_id'] for item in items[:1000]]
+            env = dict(os.environ, AWS_ENDPOINT_URL=endpoint, METRICS_ENABLED='true',
+                       SEARCH_INDEX_ENABLED='true' if args.index else 'false',
+                       SEARCH_SNAPSHOT_ENABLED='true' if args.snapshot else 'false',
+                       SEARCH_SNAPSHOT_BUCKET=SNAPSHOT_BUCKET if args.snapshot else '')
+            for concurrency in levels:
+                key = f'{args.profile}/{size}/c{concurrency}'
+                results[key] = run_level(ctx, src, env, args.profile, concurrency, args.requests, item_ids, args.seed)
+                print_level(key, results[key])
+        finally:
+            if server:
+                server.stop()
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'profile': args.profile, 'index': args.index, 'snapshot': args.snapshot,
+                       'requests': args.requests, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\nsaved baseline to {args.save}")
+    if args.check:
+        with open(args.check, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) vs {args.check} (tolerance {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nno regressions vs {args.check}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Benchmark การจับคู่ LOST <-> FOUND (lostfound_core/matching.py) แบบ offline ไม่ต้องต่อ AWS
+
+1) เวลาให้คะแนนต่อการแจ้ง 1 รายการ ระหว่าง
+  - blocked:   item ที่รอรับคืนในช่วง ±MATCH_WINDOW_DAYS (แบบที่ GSI1 query คืนมา) แล้วคัดด้วย same_block
+  - all-pairs: เทียบกับทุก item ฝั่งตรงข้ามในตาราง
+2) recall ของคู่จริงเมื่อ category ของ LOST เป็นข้อความอิสระ (lost.html) และ FOUND เลือกจากรายการ (found.html)
+  - exact:     block ด้วย category ตรงตัว (แบบเดิมที่ใช้ GSI2 = CATEGORY#...)
+  - grouped:   block ด้วย matching.same_block
+
+    python benchmarks/bench_matching.py [จำนวน item ...]
+"""
+import os
+import sys
+import time
+import random
+import bisect
+import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambdafunction'))
+
+from lostfound_core import matching  # noqa: E402
+
+CATEGORIES = ['บัตร', 'โทรศัพท์', 'อุปกรณ์อิเล็กทรอนิกส์', 'เครื่องเขียน', 'กระเป๋า', 'กุญแจ',
+              'ขวดน้ำ', 'เสื้อผ้า', 'แว่นตา', 'นาฬิกา', 'หูฟัง', 'ร่ม']
+BRANDS = ['Apple', 'Samsung', 'Xiaomi', 'Oppo', 'Vivo', 'Sony', 'JBL', 'Casio', 'Uniqlo',
+          'Adidas', 'Nike', 'Tupperware', 'บัตรนักศึกษา', 'บัตรประชาชน', 'Lamy', 'Pilot']
+DETAILS = ['สีดำ', 'สีขาว', 'สีฟ้า', 'สีชมพู', 'มีรอยร้าว', 'มีสติ๊กเกอร์', 'เคสใส', 'ห้อยพวงกุญแจ',
+           'มีชื่อเขียนไว้', 'ขอบถลอก', 'รุ่นใหม่', 'ใส่ซองหนัง']
+LOCATIONS = ['SC1', 'SC2', 'SC3', 'บร.1', 'บร.2', 'บร.3', 'โรงอาหารกลาง', 'หอสมุดปรีดี',
+             'ตึกโดม', 'อาคารเรียนรวม', 'สนามกีฬา', 'หอพัก']
+START = datetime.datetime(2025, 1, 1)
+
+# ของจริง: (สิ่งที่ผู้ทำหายพิมพ์ใน lost.html, สิ่งที่ผู้พบเลือก/พิมพ์ใน found.html)
+# FOUND มีตัวเลือก 4 หมวด นอกนั้นเลือก "อื่น ๆ" แล้วพิมพ์เอง
+REALISTIC = [
+    (['มือถือ iPhone 13', 'โทรศัพท์มือถือ Samsung', 'iPhone 15 Pro', 'มือถือ oppo สีฟ้า'], ['โทรศัพท์']),
+    (['บัตรนักศึกษา', 'บัตรประชาชน', 'บัตร ATM กสิกร', 'ใบขับขี่'], ['บัตร']),
+    (['หูฟัง AirPods', 'AirPods Pro', 'สายชาร์จ type-c', 'powerbank Eloop', 'iPad Air', 'macbook air',
+      'นาฬิกา Apple Watch'], ['อุปกรณ์อิเล็กทรอนิกส์']),
+    (['ปากกา Lamy', 'กล่องดินสอ', 'สมุดเลคเชอร์', 'เครื่องคิดเลข Casio'], ['เครื่องเขียน', 'อุปกรณ์อิเล็กทรอนิกส์']),
+    (['กระเป๋าสตางค์', 'กระเป๋าเป้ Anello', 'wallet หนังสีน้ำตาล'], ['กระเป๋า', 'กระเป๋าสตางค์']),
+    (['กุญแจหอ', 'พวงกุญแจรถ', 'กุญแจล็อกเกอร์'], ['กุญแจ', 'พวงกุญแจ']),
+    (['กระบอกน้ำ Stanley', 'แก้วน้ำเก็บความเย็น', 'ขวดน้ำ Tupperware'], ['ขวดน้ำ', 'แก้วน้ำ']),
+    (['แว่นสายตา', 'แว่นกันแดด Ray-Ban'], ['แว่นตา']),
+    (['เสื้อแจ็คเก็ต', 'เสื้อช็อป', 'หมวกแก๊ป'], ['เสื้อ', 'เสื้อผ้า']),
+    (['ร่มพับสีดำ', 'ร่มใส'], ['ร่ม']),
+]
+
+
+def make_item(i, rng):
+    created = START + datetime.timedelta(minutes=rng.randrange(365 * 24 * 60))
+    return {
+        'item_id': f'ITEM#{i}',
+        'item_type': rng.choice(['FOUND', 'LOST']),
+        'case_id': f'X{100000 + i}',
+        'category': rng.choice(CATEGORIES),
+        'brand': f"{rng.choice(BRANDS)} {rng.randrange(100)}",
+        'details': ' '.join(rng.sample(DETAILS, 2)),
+        'location': rng.choice(LOCATIONS),
+        'date': created.strftime('%Y-%m-%d'),
+        'created_at': created.isoformat(),
+        'status': 'รอรับคืน',
+    }
+
+
+def make_realistic(i, rng, item_type, kind):
+    lost_categories, found_categories = REALISTIC[kind]
+    item = make_item(i, rng)
+    item['item_type'] = item_type
+    item['category'] = rng.choice(lost_categories if item_type == 'LOST' else found_categories)
+    return item
+
+
+def make_pair(i, rng):
+    """คู่ LOST/FOUND ของชิ้นเดียวกัน: brand/details/สถานที่ตรงกัน วันที่ห่างกันไม่กี่วัน"""
+    kind = rng.randrange(len(REALISTIC))
+    found = make_realistic(i, rng, 'FOUND', kind)
+    lost = make_realistic(i + 1, rng, 'LOST', kind)
+    lost.update(brand=found['brand'], details=found['details'], location=found['location'])
+    lost_at = datetime.datetime.fromisoformat(found['created_at']) - datetime.timedelta(hours=rng.randrange(1, 72))
+    lost['created_at'] = lost_at.isoformat()
+    lost['date'] = lost_at.strftime('%Y-%m-%d')
+    return lost, found
+
+
+def build_window(items):
+    """จำลอง GSI1: partition STATUS#รอรับคืน เรียงตาม created_at"""
+    ordered = sorted(items, key=lambda item: item['created_at'])
+    return ordered, [item['created_at'] for item in ordered]
+
+
+def window_candidates(item, ordered, keys):
+    created = datetime.datetime.fromisoformat(item['created_at'])
+    window = datetime.timedelta(days=matching.MATCH_WINDOW_DAYS)
+    lo = bisect.bisect_left(keys, (created - window).isoformat())
+    hi = bisect.bisect_right(keys, (created + window).isoformat())
+    return [c for c in ordered[lo:hi] if c['item_type'] == matching.OPPOSITE_TYPE[item['item_type']]]
+
+
+def run(size, probes=200, seed=361):
+    rng = random.Random(seed)
+    items = [make_item(i, rng) for i in range(size)]
+    ordered, keys = build_window(items)
+    queries = [make_item(size + i, rng) for i in range(probes)]
+
+    started = time.perf_counter()
+    compared = 0
+    for query in queries:
+        candidates = window_candidates(query, ordered, keys)
+        compared += len(candidates)
+        matching.rank_candidates(query, candidates)
+    blocked_ms = (time.perf_counter() - started) * 1000 / probes
+    blocked_compared = compared / probes
+
+    # all-pairs แพงมาก วัดแค่บางส่วนแล้วเฉลี่ย
+    sample = queries[:max(1, min(probes, 200000 // size))]
+    started = time.perf_counter()
+    for query in sample:
+        matching.rank_candidates(query, items)
+    all_pairs_ms = (time.perf_counter() - started) * 1000 / len(sample)
+    return blocked_compared, blocked_ms, all_pairs_ms
+
+
+def recall(size, pairs=200, seed=361):
+    """สัดส่วนของ LOST ที่ FOUND ตัวจริงอยู่ใน top-k ของ rank_candidates"""
+    rng = random.Random(seed)
+    background = [make_realistic(i, rng, rng.choice(['FOUND', 'LOST']), rng.randrange(len(REALISTIC)))
+                  for i in range(size)]
+    truth = [make_pair(size + 2 * i, rng) for i in range(pairs)]
+    ordered, keys = build_window(background + [found for _, found in truth])
+    hits = {'exact': 0, 'grouped': 0}
+    for lost, found in truth:
+        candidates = window_candidates(lost, ordered, keys)
+        exact = [c for c in candidates if c['category'] == lost['category']]
+        for name, pool in (('exact', exact), ('grouped', candidates)):
+            if any(m['item_id'] == found['item_id'] for m in matching.rank_candidates(lost, pool)):
+                hits[name] += 1
+    return hits['exact'] / pairs, hits['grouped'] / pairs
+
+
+def main(argv):
+    sizes = [int(arg) for arg in argv] or [1000, 10000, 50000]
+    print(f"window ±{matching.MATCH_WINDOW_DAYS} days, {len(CATEGORIES)} categories")
+    print(f"{'items':>8} {'candidates':>11} {'blocked ms':>11} {'all-pairs ms':>13} {'speedup':>8}")
+    for size in sizes:
+        compared, blocked_ms, all_pairs_ms = run(size)
+        print(f"{size:>8} {compared:>11.0f} {blocked_ms:>11.2f} {all_pairs_ms:>13.2f} {all_pairs_ms / blocked_ms:>7.1f}x")
+    print()
+    print('free-text LOST category vs found.html select (recall of true pairs in top-k)')
+    print(f"{'items':>8} {'exact':>8} {'grouped':>8}")
+    for size in sizes:
+        exact, grouped = recall(size)
+        print(f"{size:>8} {exact:>8.0%} {grouped:>8.0%}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,160 +1,385 @@
-import json
-import boto3
-import re
-from datetime import datetime
-
-dynamodb = boto3.resource('dynamodb')
-s3 = boto3.client('s3')
-table = dynamodb.Table('Items_TU')
-
-CORS_HEADERS = {
-    'Access-Control-Allow-Origin': '*',
-    'Access-Control-Allow-Methods': 'POST, OPTIONS',
-    'Access-Control-Allow-Headers': 'Content-Type',
-    'Content-Type': 'application/json'
-}
-
-def lambda_handler(event, context):
-    try:
-        print(f"[DEBUG] Event: {json.dumps(event)}")
-        
-        # Handle OPTIONS
-        http_method = event.get('requestContext', {}).get('http', {}).get('method', '')
-        if http_method == 'OPTIONS':
-            return {
-                'statusCode': 200,
-                'headers': CORS_HEADERS,
-                'body': json.dumps({'status': 'ok'})
-            }
-        
-        # Parse body
-        body_raw = event.get('body', '{}')
-        if isinstance(body_raw, str):
-            body = json.loads(body_raw)
-        else:
-            body = body_raw
-        
-        action = body.get('action')
-        item_id = body.get('item_id')
-        
-        print(f"[DEBUG] Action: {action}, Item ID: {item_id}")
-        
-        if not item_id:
-            return error_response('Missing item_id', 400)
-        
-        # ⚠️ สำคัญ: ต้องหา item_type (Sort Key) ก่อน
-        # ใช้ Query เพื่อหา item
-        response = table.query(
-            KeyConditionExpression='item_id = :item_id',
-            ExpressionAttributeValues={
-                ':item_id': item_id
-            },
-            Limit=1
-        )
-        
-        items = response.get('Items', [])
-        if not items:
-            return error_response('Item not found', 404)
-        
-        item = items[0]
-        item_type = item.get('item_type')  # LOST หรือ FOUND
-        
-        print(f"[DEBUG] Found item_type: {item_type}")
-        
-        # สร้าง Key สำหรับ DynamoDB (ต้องมีทั้ง Partition และ Sort Key)
-        key = {
-            'item_id': item_id,
-            'item_type': item_type
-        }
-        
-        # ✅ ACTION: DELETE
-        if action == 'delete':
-            # ลบรูปภาพ S3
-            image_url = item.get('image_url')
-            if image_url:
-                try:
-                    match = re.search(r'amazonaws\.com/(.+)$', image_url)
-                    if match:
-                        s3_key = match.group(1)
-                        s3.delete_object(Bucket='tu-lostfound-pictures', Key=s3_key)
-                        print(f"[SUCCESS] Deleted S3: {s3_key}")
-                except Exception as s3_err:
-                    print(f"[WARN] S3 delete failed: {s3_err}")
-            
-            # ลบจาก DynamoDB
-            table.delete_item(Key=key)
-            print(f"[SUCCESS] Deleted item: {item_id} ({item_type})")
-            
-            return success_response('ลบรายการสำเร็จ')
-        
-        # ✅ ACTION: CHANGE_STATUS
-        elif action == 'change_status':
-            new_status = body.get('status')
-            valid_statuses = ['แจ้งแล้ว', 'รอรับคืน', 'คืนเจ้าของแล้ว', 'หมดอายุ']
-            
-            if not new_status or new_status not in valid_statuses:
-                return error_response(f'Invalid status: {new_status}', 400)
-            
-            # อัปเดตสถานะ
-            table.update_item(
-                Key=key,
-                UpdateExpression='SET #status = :status, #updated_at = :updated_at, #gsi1_pk = :gsi1_pk',
-                ExpressionAttributeNames={
-                    '#status': 'status',
-                    '#updated_at': 'updated_at',
-                    '#gsi1_pk': 'gsi1_pk'
-                },
-                ExpressionAttributeValues={
-                    ':status': new_status,
-                    ':updated_at': datetime.utcnow().isoformat(),
-                    ':gsi1_pk': f'STATUS#{new_status}'
-                }
-            )
-            
-            print(f"[SUCCESS] Changed status to: {new_status}")
-            return success_response(f'เปลี่ยนสถานะเป็น "{new_status}" สำเร็จ')
-        
-        # ✅ ACTION: UPDATE
-        elif action == 'update':
-            updates = body.get('updates', {})
-            if not updates:
-                return error_response('Missing updates', 400)
-            
-            updates['updated_at'] = datetime.utcnow().isoformat()
-            
-            update_expr = "SET " + ", ".join([f"#{k}=:{k}" for k in updates.keys()])
-            expr_names = {f"#{k}": k for k in updates.keys()}
-            expr_values = {f":{k}": v for k, v in updates.items()}
-            
-            table.update_item(
-                Key=key,
-                UpdateExpression=update_expr,
-                ExpressionAttributeNames=expr_names,
-                ExpressionAttributeValues=expr_values
-            )
-            
-            print(f"[SUCCESS] Updated item: {item_id}")
-            return success_response('แก้ไขข้อมูลสำเร็จ')
-        
-        else:
-            return error_response(f'Invalid action: {action}', 400)
-    
-    except Exception as e:
-        print(f"[ERROR] {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return error_response(str(e), 500)
-
-def success_response(message):
-    return {
-        'statusCode': 200,
-        'headers': CORS_HEADERS,
-        'body': json.dumps({'status': 'success', 'message': message}, ensure_ascii=False)
-    }
-
-def error_response(error, code=400):
-    return {
-        'statusCode': code,
-        'headers': CORS_HEADERS,
-        'body': json.dumps({'status': 'error', 'error': error}, ensure_ascii=False)
-    }
+import re
+from datetime import datetime
+
+from lostfound_core import changes, clients, image_upload, item_keys, item_model, metrics, result_cache, search_index, stats
+from lostfound_core.handler import Router, json_response, success_response, error_response
+
+# ขนาด chunk ตามขีดจำกัดของ DynamoDB / S3
+MAX_BATCH_ITEMS = 1000
+BATCH_GET_KEYS = 100        # BatchGetItem สูงสุด 100 key
+TRANSACT_CHUNK = 100        # TransactWriteItems สูงสุด 100 รายการ
+BATCH_WRITE_CHUNK = 25      # BatchWriteItem สูงสุด 25 รายการ
+S3_DELETE_CHUNK = 1000      # DeleteObjects สูงสุด 1000 key
+BATCH_RETRIES = 5
+# key ที่ยังค้าง (throttle) หลังส่งครบ BATCH_RETRIES ครั้ง — ไม่ใช่ "ไม่พบ" ส่งคำขอเดิมซ้ำได้
+RETRYABLE_ERROR = 'Temporarily unavailable, please retry'
+
+router = Router('Admin_Update')
+clients.warm()
+
+def lambda_handler(event, context):
+    return router.dispatch(event, context)
+
+# ✅ ตัวนับสำหรับ dashboard (อ่าน 1 ครั้ง ไม่ต้อง scan)
+@router.route('stats')
+def stats_action(body):
+    try:
+        days = int(body.get('days', stats.DEFAULT_DAYS))
+    except (TypeError, ValueError):
+        return error_response(f"Invalid days: {body.get('days')}", 400)
+    if not 1 <= days <= stats.MAX_DAYS:
+        return error_response(f'Invalid days: {days} (1-{stats.MAX_DAYS})', 400)
+    try:
+        return success_response(**stats.read(clients.table(), days))
+    except stats.StatsUnavailable as e:
+        print(f"[WARN] {e}")
+        return error_response(RETRYABLE_ERROR, 503)
+
+# ✅ ACTION แบบหลายรายการ (ไม่ต้อง query ทีละ item)
+@router.route('batch_change_status', 'batch_delete')
+def batch_action(body):
+    return handle_batch(body.get('action'), body)
+
+@router.route('delete', 'change_status', 'update')
+def item_action(body):
+    action = body.get('action')
+    item_id = body.get('item_id')
+    print(f"[DEBUG] Action: {action}, Item ID: {item_id}")
+    
+    if not item_id:
+        return error_response('Missing item_id', 400)
+    
+    # ✅ item_id แบบใหม่มี item_type (Sort Key) อยู่แล้ว ประกอบ Key ได้ทันที
+    key = item_keys.key_for(item_id)
+    if key is None:
+        # ⚠️ item_id แบบเก่า: ต้องหา item_type ก่อน (จนกว่าจะรัน migrate_item_ids.py)
+        key = lookup_key(item_id)
+        if key is None:
+            return error_response('Item not found', 404)
+    item_type = key['item_type']  # LOST หรือ FOUND
+    table = clients.table()
+    
+    print(f"[DEBUG] Key: {key}")
+    
+    # ✅ ACTION: DELETE
+    if action == 'delete':
+        # ลบจาก DynamoDB แบบมีเงื่อนไข แล้วใช้ค่าเดิม (ALL_OLD) ลบรูปและ index ต่อ
+        try:
+            result = table.delete_item(
+                Key=key,
+                ConditionExpression='attribute_exists(item_id)',
+                ReturnValues='ALL_OLD'
+            )
+        except table.meta.client.exceptions.ConditionalCheckFailedException:
+            return error_response('Item not found', 404)
+        item = result.get('Attributes', {})
+        print(f"[SUCCESS] Deleted item: {item_id} ({item_type})")
+        deleted_at = changes.record_deleted(table, [item])
+        
+        # ลบรูปภาพ S3 (รวมรูปย่อทุกขนาด) — สร้าง S3 client เฉพาะตอนที่มีรูปต้องลบ
+        image_url = item.get('image_url')
+        if image_url:
+            try:
+                match = re.search(r'amazonaws\.com/(.+)$', image_url)
+                # รูปแบบ content-addressed อาจมี item อื่นใช้อยู่ ลบเมื่อไม่มีใครใช้แล้วเท่านั้น
+                if match and image_upload.release(table, [match.group(1)]):
+                    s3_key = match.group(1)
+                    keys = [s3_key] + image_upload.variant_keys(s3_key)
+                    clients.s3().delete_objects(
+                        Bucket=clients.S3_BUCKET_NAME,
+                        Delete={'Objects': [{'Key': k} for k in keys], 'Quiet': True}
+                    )
+                    print(f"[SUCCESS] Deleted S3: {s3_key}")
+            except Exception as s3_err:
+                print(f"[WARN] S3 delete failed: {s3_err}")
+        
+        try:
+            with metrics.span('unindex_item'):
+                search_index.unindex_item(item)
+        except Exception as index_err:
+            print(f"[WARN] Search index cleanup failed: {index_err}")
+        update_stats([(item, None)])
+        bump_generation(deleted_at)
+        
+        return success_response(message='ลบรายการสำเร็จ')
+    
+    # ✅ ACTION: CHANGE_STATUS
+    elif action == 'change_status':
+        new_status = body.get('status')
+        try:
+            params = item_model.update_params({'status': new_status})
+        except item_model.InvalidItem as e:
+            return error_response(str(e), 400)
+        
+        # อัปเดตสถานะ (ConditionExpression แทนการอ่านก่อนเขียน, ALL_OLD ได้สถานะเดิมไปปรับตัวนับ)
+        try:
+            result = table.update_item(
+                Key=key,
+                ConditionExpression='attribute_exists(item_id)',
+                ReturnValues='ALL_OLD',
+                **params
+            )
+        except table.meta.client.exceptions.ConditionalCheckFailedException:
+            return error_response('Item not found', 404)
+        item = result.get('Attributes', {})
+        
+        print(f"[SUCCESS] Changed status to: {new_status}")
+        update_stats([(item, {**item, 'status': new_status})])
+        bump_generation(params['ExpressionAttributeValues'][':updated_at'])
+        return success_response(message=f'เปลี่ยนสถานะเป็น "{new_status}" สำเร็จ')
+    
+    # ✅ ACTION: UPDATE
+    else:
+        updates = body.get('updates', {})
+        if not updates or not isinstance(updates, dict):
+            return error_response('Missing updates', 400)
+        
+        # แก้ได้เฉพาะ field ใน item_model.EDITABLE (ไม่ใช่ key หรือ gsi*) — gsi1_pk/gsi2_pk คำนวณใหม่ตาม status/category
+        try:
+            params = item_model.update_params(updates)
+        except item_model.InvalidItem as e:
+            return error_response(str(e), 400)
+        values = params['ExpressionAttributeValues']
+        updates = {field: values[f':{field}'] for field in list(updates) + ['updated_at']}
+        
+        # ReturnValues=ALL_OLD ได้ค่าเดิมมาใช้ reindex โดยไม่ต้องอ่านก่อน
+        try:
+            result = table.update_item(
+                Key=key,
+                ConditionExpression='attribute_exists(item_id)',
+                ReturnValues='ALL_OLD',
+                **params
+            )
+        except table.meta.client.exceptions.ConditionalCheckFailedException:
+            return error_response('Item not found', 404)
+        item = result.get('Attributes', {})
+        
+        print(f"[SUCCESS] Updated item: {item_id}")
+        
+        try:
+            with metrics.span('index_item'):
+                search_index.submit({**item, **updates}, previous=item)
+        except Exception as index_err:
+            print(f"[WARN] Search index update failed: {index_err}")
+        update_stats([(item, {**item, **updates})])
+        bump_generation(updates['updated_at'])
+        return success_response(message='แก้ไขข้อมูลสำเร็จ')
+
+def lookup_key(item_id):
+    # item_id แบบเก่าไม่มี item_type ต้อง query หา Sort Key
+    # sort key ช่วง FOUND..LOST: ไม่ได้ tombstone ของ item ที่ถูกลบไปแล้ว
+    response = clients.table().query(
+        KeyConditionExpression='item_id = :item_id AND item_type BETWEEN :first AND :last',
+        ExpressionAttributeValues={
+            ':item_id': item_id,
+            ':first': item_keys.ITEM_TYPES[0],
+            ':last': item_keys.ITEM_TYPES[-1]
+        },
+        ProjectionExpression='item_id, item_type',
+        Limit=1
+    )
+    items = response.get('Items', [])
+    if not items:
+        return None
+    return {'item_id': item_id, 'item_type': items[0]['item_type']}
+
+def handle_batch(action, body):
+    item_ids = body.get('item_ids')
+    if not isinstance(item_ids, list) or not item_ids:
+        return error_response('Missing item_ids', 400)
+    item_ids = list(dict.fromkeys(str(i) for i in item_ids if i))
+    if len(item_ids) > MAX_BATCH_ITEMS:
+        return error_response(f'Too many item_ids (max {MAX_BATCH_ITEMS})', 400)
+    metrics.count('ItemsRequested', len(item_ids))
+    
+    if action == 'batch_change_status':
+        new_status = body.get('status')
+        if new_status not in item_model.STATUSES:
+            return error_response(f'Invalid status: {new_status}', 400)
+    
+    # อ่าน item ทั้งหมดก่อน (BatchGetItem ทีละ 100) เพื่อรู้สถานะ/ค่าเดิมสำหรับปรับตัวนับ
+    items, unresolved = resolve_items(item_ids)
+    timestamp = datetime.utcnow().isoformat()
+    results = {item_id: RETRYABLE_ERROR if item_id in unresolved else 'Item not found'
+               for item_id in item_ids if item_id not in items}
+    
+    if action == 'batch_change_status':
+        results.update(batch_change_status(list(items.values()), new_status, timestamp))
+        transitions = [(item, {**item, 'status': new_status}) for item in items.values()
+                       if results.get(item['item_id']) is None]
+    else:
+        results.update(batch_delete(list(items.values()), timestamp))
+        transitions = [(item, None) for item in items.values() if results.get(item['item_id']) is None]
+    
+    if transitions:
+        update_stats(transitions)
+        bump_generation(timestamp)
+    return batch_response(item_ids, results)
+
+def resolve_items(item_ids):
+    """หา item ทั้งหมดด้วย BatchGetItem แทนการ query ทีละ id
+
+    item_id แบบใหม่ใช้ Key ที่ถอดจาก id ได้เลย แบบเก่าลองทั้ง 2 sort key (FOUND/LOST)
+    คืน ({item_id: item}, set ของ item_id ที่ยังอ่านไม่ได้เพราะ key ค้างใน UnprocessedKeys)
+    """
+    keys = []
+    for item_id in item_ids:
+        key = item_keys.key_for(item_id)
+        if key:
+            keys.append(key)
+        else:
+            keys += [{'item_id': item_id, 'item_type': t} for t in item_keys.ITEM_TYPES]
+    table = clients.table()
+    found = {}
+    pending = set()
+    for i in range(0, len(keys), BATCH_GET_KEYS):
+        request = {table.name: {'Keys': keys[i:i + BATCH_GET_KEYS], 'ConsistentRead': True}}
+        for attempt in range(BATCH_RETRIES):
+            if attempt:
+                clients.backoff(attempt - 1)
+            response = clients.dynamodb().batch_get_item(RequestItems=request)
+            for item in response.get('Responses', {}).get(table.name, []):
+                found[item['item_id']] = item
+            request = response.get('UnprocessedKeys')
+            if not request:
+                break
+        pending.update(key['item_id'] for key in (request or {}).get(table.name, {}).get('Keys', []))
+    unresolved = pending - found.keys()
+    if unresolved:
+        print(f"[WARN] {len(unresolved)} keys still unprocessed after {BATCH_RETRIES} attempts")
+    print(f"[DEBUG] Resolved {len(found)}/{len(item_ids)} items")
+    return found, unresolved
+
+def status_update(item, params):
+    return dict(
+        params,
+        TableName=clients.DYNAMODB_TABLE_NAME,
+        Key={k: item[k] for k in ('item_id', 'item_type')},
+        ConditionExpression='attribute_exists(item_id)'
+    )
+
+def batch_change_status(items, new_status, timestamp=None):
+    """เปลี่ยนสถานะทีละ chunk ด้วย TransactWriteItems (client ของ resource แปลงชนิดข้อมูลให้เอง)
+
+    ถ้า transaction ของ chunk ใดล้มเหลว จะทำรายการใน chunk นั้นทีละ item เพื่อให้รู้ผลรายตัว
+    คืน {item_id: None (สำเร็จ) หรือข้อความ error}
+    """
+    client = clients.table().meta.client
+    # UpdateExpression เดียวกันทุก item ต่างกันแค่ Key
+    params = item_model.update_params({'status': new_status}, timestamp or datetime.utcnow().isoformat())
+    results = {}
+    for i in range(0, len(items), TRANSACT_CHUNK):
+        chunk = items[i:i + TRANSACT_CHUNK]
+        try:
+            client.transact_write_items(
+                TransactItems=[{'Update': status_update(item, params)} for item in chunk]
+            )
+            results.update({item['item_id']: None for item in chunk})
+        except Exception as tx_err:
+            print(f"[WARN] Transaction failed, retrying one by one: {tx_err}")
+            for item in chunk:
+                try:
+                    client.update_item(**status_update(item, params))
+                    results[item['item_id']] = None
+                except client.exceptions.ConditionalCheckFailedException:
+                    results[item['item_id']] = 'Item not found'
+                except Exception as e:
+                    results[item['item_id']] = str(e)
+    print(f"[SUCCESS] Batch status -> {new_status}: {sum(r is None for r in results.values())} items")
+    return results
+
+def batch_delete(items, timestamp=None):
+    """ลบ item ด้วย BatchWriteItem ทีละ 25 และลบรูป (รวมรูปย่อ) ด้วย DeleteObjects ทีละ 1000"""
+    table = clients.table()
+    client = table.meta.client
+    results = {}
+    for i in range(0, len(items), BATCH_WRITE_CHUNK):
+        chunk = items[i:i + BATCH_WRITE_CHUNK]
+        request = {table.name: [
+            {'DeleteRequest': {'Key': {k: item[k] for k in ('item_id', 'item_type')}}}
+            for item in chunk
+        ]}
+        for attempt in range(BATCH_RETRIES):
+            if attempt:
+                clients.backoff(attempt - 1)
+            try:
+                response = client.batch_write_item(RequestItems=request)
+            except Exception as e:
+                print(f"[WARN] Batch delete failed: {e}")
+                break
+            request = response.get('UnprocessedItems')
+            if not request:
+                break
+        pending = {
+            r['DeleteRequest']['Key']['item_id'] for r in (request or {}).get(table.name, [])
+        }
+        for item in chunk:
+            results[item['item_id']] = RETRYABLE_ERROR if item['item_id'] in pending else None
+    
+    deleted = [item for item in items if results.get(item['item_id']) is None]
+    changes.record_deleted(table, deleted, timestamp)
+    
+    image_keys = []
+    for item in deleted:
+        match = re.search(r'amazonaws\.com/(.+)$', item.get('image_url') or '')
+        if match:
+            image_keys.append(match.group(1))
+    try:
+        image_keys = image_upload.release(table, image_keys)
+    except Exception as ref_err:
+        print(f"[WARN] Image reference update failed: {ref_err}")
+        image_keys = [key for key in image_keys if not image_upload.is_content_key(key)]
+    s3_keys = []
+    for key in image_keys:
+        s3_keys += [key] + image_upload.variant_keys(key)
+    for i in range(0, len(s3_keys), S3_DELETE_CHUNK):
+        try:
+            response = clients.s3().delete_objects(
+                Bucket=clients.S3_BUCKET_NAME,
+                Delete={'Objects': [{'Key': k} for k in s3_keys[i:i + S3_DELETE_CHUNK]], 'Quiet': True}
+            )
+            for err in response.get('Errors', []):
+                print(f"[WARN] S3 delete failed: {err.get('Key')} {err.get('Message')}")
+        except Exception as s3_err:
+            print(f"[WARN] S3 delete failed: {s3_err}")
+    
+    with metrics.span('unindex_item'):
+        for item in deleted:
+            try:
+                search_index.unindex_item(item)
+            except Exception as index_err:
+                print(f"[WARN] Search index cleanup failed: {index_err}")
+    
+    print(f"[SUCCESS] Batch deleted {len(deleted)} items, {len(s3_keys)} S3 objects")
+    return results
+
+def batch_response(item_ids, results):
+    rows = [
+        {'item_id': item_id, 'status': 'success'} if results.get(item_id) is None
+        else {'item_id': item_id, 'status': 'error', 'error': results[item_id],
+              'retryable': results[item_id] == RETRYABLE_ERROR}
+        for item_id in item_ids
+    ]
+    succeeded = sum(row['status'] == 'success' for row in rows)
+    return json_response(200, {
+        'status': 'success' if succeeded == len(rows) else 'partial',
+        'succeeded': succeeded,
+        'failed': len(rows) - succeeded,
+        'results': rows
+    })
+
+def update_stats(deltas):
+    # ตัวนับของ dashboard — ถ้าพลาด stats_reconcile_function.py จะนับใหม่ให้ในรอบถัดไป
+    try:
+        with metrics.span('update_stats'):
+            stats.record_all(clients.table(), deltas)
+    except Exception as stats_err:
+        print(f"[WARN] Stats update failed: {stats_err}")
+
+def bump_generation(updated_at=None):
+    # ทำให้ cache ผลค้นหาใน search Lambda ที่ warm อยู่ใช้ไม่ได้ทันที (updated_at ของการเขียน: ดู result_cache)
+    try:
+        with metrics.span('bump_generation'):
+            result_cache.bump_generation(clients.table(), updated_at)
+    except Exception as cache_err:
+        print(f"[WARN] Cache generation bump failed: {cache_err}")
@@ -0,0 +1,66 @@
+import sys
+from boto3.dynamodb.conditions import Attr
+
+from lostfound_core import clients, item_keys
+
+# เพิ่ม gsi3_pk/gsi3_sk (ค้นหาด้วย case_id ผ่าน GSI3) ให้ item ที่สร้างก่อนมี GSI3
+# และจอง case_id ของ item เหล่านั้นด้วย alias row CASE#<case_id> ไม่ให้ case ใหม่สุ่มได้เลขซ้ำ
+# ต้องสร้าง GSI3 (gsi3_pk HASH, gsi3_sk RANGE, projection ALL) ก่อนรัน
+#
+#   python backfill_case_index.py            เขียนทั้งหมด
+#   python backfill_case_index.py --dry-run  แสดงรายการที่จะเขียนเท่านั้น
+
+
+def missing_items(table):
+    params = {
+        'FilterExpression': Attr('item_type').is_in(list(item_keys.ITEM_TYPES))
+                            & Attr('case_id').exists() & Attr('gsi3_pk').not_exists(),
+        'ProjectionExpression': 'item_id, item_type, case_id',
+    }
+    while True:
+        response = table.scan(**params)
+        yield from response.get('Items', [])
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        params['ExclusiveStartKey'] = last_key
+
+
+def backfill_item(table, item):
+    case_id = item['case_id']
+    keys = item_keys.case_index_keys(case_id)
+    table.update_item(
+        Key={'item_id': item['item_id'], 'item_type': item['item_type']},
+        UpdateExpression='SET gsi3_pk = :pk, gsi3_sk = :sk',
+        ConditionExpression='attribute_exists(item_id)',
+        ExpressionAttributeValues={':pk': keys['gsi3_pk'], ':sk': keys['gsi3_sk']}
+    )
+    try:
+        table.put_item(
+            Item=dict(item_keys.case_key(case_id), target_item_id=item['item_id'],
+                      target_item_type=item['item_type']),
+            ConditionExpression='attribute_not_exists(item_id)'
+        )
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        print(f"[WARN] Duplicate case_id: {case_id} ({item['item_id']})")
+
+
+def backfill(table, dry_run=False):
+    updated, failed = 0, 0
+    for item in missing_items(table):
+        if dry_run:
+            print(f"[DRY RUN] {item['item_id']} -> {item['case_id']}")
+            updated += 1
+            continue
+        try:
+            backfill_item(table, item)
+            updated += 1
+        except Exception as e:
+            print(f"[ERROR] {item['item_id']}: {e}")
+            failed += 1
+    return updated, failed
+
+
+if __name__ == '__main__':
+    updated, failed = backfill(clients.table(), dry_run='--dry-run' in sys.argv)
+    print(f"Backfilled {updated} items, {failed} failed")
@@ -0,0 +1,166 @@
+import os
+import re
+import time
+import datetime
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+from lostfound_core import clients, image_upload, item_model, metrics, result_cache, stats
+
+# เปลี่ยนสถานะ item ที่ "รอรับคืน" นานเกินกำหนดเป็น "หมดอายุ" แบบเป็นชุด
+# ตั้งเวลาเรียกด้วย EventBridge schedule (เช่น วันละครั้ง)
+#
+# - ใช้ GSI1 (STATUS#รอรับคืน, gsi1_sk = เวลาที่แจ้ง) query เฉพาะ item ที่เก่ากว่า cutoff
+# - เขียนด้วย TransactWriteItems โดยมีเงื่อนไขว่าสถานะยังเป็น "รอรับคืน" (ไม่ทับการแก้ไขของ admin)
+# - จำกัดจำนวนการเขียนต่อวินาที และบันทึก checkpoint ในตารางเพื่อทำต่อในรอบถัดไปถ้าเวลาไม่พอ
+# - ARCHIVE_STORAGE_CLASS: ย้ายรูป (รวมรูปย่อ) ของ item ที่หมดอายุไป storage class ที่ถูกกว่า (URL เดิม)
+#   รูป content-addressed ที่ item อื่นยังใช้อยู่ (IMAGE#<key> refs > 1) ไม่ย้าย
+#   การ copy ทับตัวเองทำให้เกิด event ObjectCreated:Copy ซึ่ง image_resize_function ไม่สนใจ
+
+EXPIRE_AFTER_DAYS = int(os.environ.get('EXPIRE_AFTER_DAYS', '90'))
+MAX_WRITES_PER_SECOND = float(os.environ.get('MAX_WRITES_PER_SECOND', '25'))
+ARCHIVE_STORAGE_CLASS = os.environ.get('ARCHIVE_STORAGE_CLASS', '')  # เช่น STANDARD_IA, GLACIER_IR
+TIME_MARGIN_MS = 10000
+
+SOURCE_STATUS = 'รอรับคืน'
+EXPIRED_STATUS = 'หมดอายุ'
+CHECKPOINT_KEY = {'item_id': 'META#EXPIRY_SWEEP', 'item_type': 'META'}
+PAGE_SIZE = 100
+TRANSACT_CHUNK = 25
+
+def load_checkpoint():
+    item = clients.table().get_item(Key=CHECKPOINT_KEY, ConsistentRead=True).get('Item')
+    return item if item and item.get('last_key') else None
+
+
+def save_checkpoint(cutoff, last_key):
+    if last_key:
+        clients.table().put_item(Item=dict(CHECKPOINT_KEY, cutoff=cutoff, last_key=last_key,
+                                 updated_at=datetime.datetime.utcnow().isoformat()))
+    else:
+        clients.table().delete_item(Key=CHECKPOINT_KEY)
+
+
+def expire_update(item, params):
+    return {'Update': dict(
+        params,
+        TableName=clients.DYNAMODB_TABLE_NAME,
+        Key={'item_id': item['item_id'], 'item_type': item['item_type']},
+        ConditionExpression='#status = :current',
+        ExpressionAttributeValues=dict(params['ExpressionAttributeValues'], **{':current': SOURCE_STATUS})
+    )}
+
+
+def expire_chunk(chunk):
+    """คืนรายการ item ที่เปลี่ยนสถานะสำเร็จ (ถ้า transaction ล้มเหลวจะทำทีละ item)"""
+    client = clients.table().meta.client
+    params = item_model.update_params({'status': EXPIRED_STATUS})
+    try:
+        client.transact_write_items(TransactItems=[expire_update(item, params) for item in chunk])
+        return chunk
+    except Exception as tx_err:
+        print(f"[WARN] Transaction failed, retrying one by one: {tx_err}")
+    expired = []
+    for item in chunk:
+        try:
+            client.update_item(**expire_update(item, params)['Update'])
+            expired.append(item)
+        except client.exceptions.ConditionalCheckFailedException:
+            print(f"[INFO] Skipped {item['item_id']}: status changed")
+        except Exception as e:
+            print(f"[ERROR] {item['item_id']}: {e}")
+    return expired
+
+
+def archive_image(table, item):
+    """ย้ายรูปต้นฉบับพร้อมรูปย่อทุกขนาดไป ARCHIVE_STORAGE_CLASS (URL เดิม) คืน False ถ้าไม่ได้ย้าย"""
+    match = re.search(r'amazonaws\.com/(.+)$', item.get('image_url') or '')
+    if not match:
+        return False
+    key = match.group(1)
+    try:
+        if image_upload.ref_count(table, key) > 1:
+            print(f"[INFO] Not archiving shared image {key}")
+            return False
+    except Exception as ref_err:
+        print(f"[WARN] Image reference check failed for {key}: {ref_err}")
+        return False
+    for archive_key in [key] + image_upload.variant_keys(key):
+        try:
+            clients.s3().copy_object(
+                Bucket=clients.S3_BUCKET_NAME,
+                Key=archive_key,
+                CopySource={'Bucket': clients.S3_BUCKET_NAME, 'Key': archive_key},
+                StorageClass=ARCHIVE_STORAGE_CLASS,
+                MetadataDirective='COPY'
+            )
+        except ClientError as s3_err:
+            # รูปย่ออาจยังไม่ถูกสร้าง (resize ล้มเหลว) — ไม่ใช่ข้อผิดพลาด
+            if archive_key != key and s3_err.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                continue
+            print(f"[WARN] Archive failed for {archive_key}: {s3_err}")
+        except Exception as s3_err:
+            print(f"[WARN] Archive failed for {archive_key}: {s3_err}")
+    return True
+
+
+def sweep(cutoff, start_key=None, time_left_ms=None):
+    """คืน (จำนวนที่เปลี่ยนสถานะ, key สำหรับทำต่อ หรือ None ถ้าเสร็จ)"""
+    params = {
+        'IndexName': 'GSI1',
+        'KeyConditionExpression': Key('gsi1_pk').eq(f'STATUS#{SOURCE_STATUS}') & Key('gsi1_sk').lt(cutoff),
+        'ProjectionExpression': 'item_id, item_type, image_url, gsi1_pk, gsi1_sk',
+        'Limit': PAGE_SIZE
+    }
+    if start_key:
+        params['ExclusiveStartKey'] = start_key
+    expired_count = 0
+    while True:
+        response = clients.table().query(**params)
+        items = response.get('Items', [])
+        for i in range(0, len(items), TRANSACT_CHUNK):
+            started = time.monotonic()
+            chunk = items[i:i + TRANSACT_CHUNK]
+            expired = expire_chunk(chunk)
+            expired_count += len(expired)
+            if ARCHIVE_STORAGE_CLASS:
+                for item in expired:
+                    archive_image(clients.table(), item)
+            # จำกัดอัตราการเขียนไม่ให้แย่ง capacity กับผู้ใช้
+            pause = len(chunk) / MAX_WRITES_PER_SECOND - (time.monotonic() - started)
+            if pause > 0:
+                time.sleep(pause)
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return expired_count, None
+        params['ExclusiveStartKey'] = last_key
+        if time_left_ms and time_left_ms() < TIME_MARGIN_MS:
+            return expired_count, last_key
+
+
+@metrics.traced('expiry_sweeper_function')
+def lambda_handler(event, context):
+    days = int((event or {}).get('expire_after_days', EXPIRE_AFTER_DAYS))
+    checkpoint = load_checkpoint()
+    if checkpoint:
+        cutoff, start_key = checkpoint['cutoff'], checkpoint['last_key']
+        print(f"[INFO] Resuming sweep (cutoff {cutoff})")
+    else:
+        cutoff = (datetime.datetime.utcnow() - datetime.timedelta(days=days)).isoformat()
+        start_key = None
+        print(f"[INFO] Starting sweep (cutoff {cutoff})")
+
+    time_left_ms = context.get_remaining_time_in_millis if context else None
+    expired_count, last_key = sweep(cutoff, start_key, time_left_ms)
+    save_checkpoint(cutoff, last_key)
+    metrics.count('ItemsExpired', expired_count)
+    if expired_count:
+        try:
+            stats.add(clients.table(), {f'status#{SOURCE_STATUS}': -expired_count,
+                                        f'status#{EXPIRED_STATUS}': expired_count})
+        except Exception as stats_err:
+            print(f"[WARN] Stats update failed: {stats_err}")
+        result_cache.bump_generation(clients.table())
+
+    print(f"[SUCCESS] Expired {expired_count} items{' (will resume)' if last_key else ''}")
+    return {'status': 'success', 'expired': expired_count, 'complete': last_key is None}
@@ -1,146 +1,143 @@
-import json
-import base64
-import boto3
-import os
-import uuid
-import datetime
-import secrets
-
-DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME', 'Items_TU')
-S3_BUCKET_NAME = os.environ.get('S3_BUCKET_NAME', 'tu-lostfound-pictures')
-
-s3 = boto3.client('s3', region_name='us-east-1')
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-table = dynamodb.Table(DYNAMODB_TABLE_NAME)
-
-CORS_HEADERS = {
-    "Access-Control-Allow-Origin": "*",
-    "Access-Control-Allow-Methods": "POST, OPTIONS",
-    "Access-Control-Allow-Headers": "Content-Type"
-}
-
-def lambda_handler(event, context):
-    print(f"[DEBUG] Event: {json.dumps(event)}")
-    # ---- CORS Preflight ----
-    if event.get('requestContext', {}).get('http', {}).get('method') == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': CORS_HEADERS,
-            'body': json.dumps({'status': 'ok'})
-        }
-    try:
-        body = json.loads(event.get('body', '{}'))
-        action = body.get('action')
-
-        # -------- Upload image --------
-        if action == 'upload_image':
-            try:
-                image_data = body.get('image_data')
-                image_name = body.get('image_name', f'{uuid.uuid4()}.jpg')
-                folder = body.get('folder', 'found')
-                if not image_data:
-                    return {
-                        'statusCode': 400,
-                        'headers': CORS_HEADERS,
-                        'body': json.dumps({'status': 'error', 'error': 'Missing image_data'})
-                    }
-                image_bytes = base64.b64decode(image_data)
-                date_str = datetime.datetime.now().strftime('%Y-%m-%d')
-                s3_key = f"{folder}/{date_str}/{image_name}"
-                s3.put_object(
-                    Bucket=S3_BUCKET_NAME,
-                    Key=s3_key,
-                    Body=image_bytes,
-                    ContentType='image/jpeg'
-                )
-                image_url = f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/{s3_key}"
-                print(f"[SUCCESS] Image uploaded: {image_url}")
-                return {
-                    'statusCode': 200,
-                    'headers': CORS_HEADERS,
-                    'body': json.dumps({'status': 'success', 'image_url': image_url})
-                }
-            except Exception as e:
-                print(f"[ERROR] Image upload failed: {e}")
-                return {
-                    'statusCode': 500,
-                    'headers': CORS_HEADERS,
-                    'body': json.dumps({'status': 'error', 'error': str(e)})
-                }
-        # -------- Report found --------
-        elif action == "report_found":
-            category = body.get('category')
-            brand = body.get('brand') or body.get('brandName', '')
-            details = body.get('details', '')
-            location = body.get('location') or body.get('foundLocation')
-            date = body.get('date') or body.get('foundDate')
-            time = body.get('time') or body.get('foundTime', '')
-            reporter_name = body.get('reporter_name') or body.get('reporterName')
-            reporter_contact = body.get('reporter_contact') or body.get('reporterContact')
-            reporter_student_id = body.get('reporter_student_id') or body.get('reporterStudentId', '')
-            image_url = body.get('image_url')
-            # --- Validation
-            for var,val in [('category',category),('location',location),('date',date),('reporter_name',reporter_name),('reporter_contact',reporter_contact)]:
-                if not val:
-                    return {
-                        'statusCode': 400,
-                        'headers': CORS_HEADERS,
-                        'body': json.dumps({'status': 'error', 'error': f"Missing required: {var}"})
-                    }
-            # --- Save to DynamoDB
-            try:
-                item_id = f"ITEM#{int(datetime.datetime.now().timestamp())}-{secrets.token_hex(4)}"
-                case_id = f"F{secrets.randbelow(900000) + 100000}"
-                timestamp = datetime.datetime.utcnow().isoformat()
-                item = {
-                    'item_id': item_id,
-                    'item_type': 'FOUND',
-                    'case_id': case_id,
-                    'category': category,
-                    'brand': brand,
-                    'details': details,
-                    'location': location,
-                    'date': date,
-                    'time': time,
-                    'status': 'รอรับคืน',
-                    'reporter_name': reporter_name,
-                    'reporter_contact': reporter_contact,
-                    'reporter_student_id': reporter_student_id,
-                    'created_at': timestamp,
-                    'updated_at': timestamp,
-                    'gsi1_pk': 'STATUS#รอรับคืน',
-                    'gsi1_sk': timestamp,
-                    'gsi2_pk': f'CATEGORY#{category}',
-                    'gsi2_sk': timestamp
-                }
-                if image_url:
-                    item['image_url'] = image_url
-                table.put_item(Item=item)
-                print(f"[SUCCESS] Item saved: {case_id}")
-                return {
-                    'statusCode': 200,
-                    'headers': CORS_HEADERS,
-                    'body': json.dumps({'status': 'success', 'case_id': case_id})
-                }
-            except Exception as e:
-                print(f"[ERROR] DynamoDB error: {e}")
-                return {
-                    'statusCode': 500,
-                    'headers': CORS_HEADERS,
-                    'body': json.dumps({'status': 'error', 'error': 'Failed to save data'})
-                }
-
-        # ------- Not supported -------
-        else:
-            return {
-                'statusCode': 400,
-                'headers': CORS_HEADERS,
-                'body': json.dumps({'status': 'error', 'error': f'Invalid action: {action}'})
-            }
-    except Exception as e:
-        print(f"[ERROR] Handler error: {e}")
-        return {
-            'statusCode': 500,
-            'headers': CORS_HEADERS,
-            'body': json.dumps({'status': 'error', 'error': str(e)})
-        }
+import base64
+import binascii
+
+from lostfound_core import clients, image_upload, item_model, matching, metrics, result_cache, search_index, stats, submissions
+from lostfound_core.handler import Router, success_response, error_response
+
+router = Router('found_items_function')
+clients.warm()
+
+
+def lambda_handler(event, context):
+    return router.dispatch(event, context)
+
+
+# -------- Upload image --------
+@router.route('upload_image')
+def upload_image(body):
+    try:
+        image_data = body.get('image_data')
+        folder = body.get('folder', 'found')
+        if not image_data:
+            return error_response('Missing image_data', 400)
+        with metrics.span('decode_image'):
+            try:
+                image_bytes = base64.b64decode(image_data)
+            except (binascii.Error, ValueError):
+                return error_response('Invalid image_data (expected base64)', 400)
+        metrics.count('ImageBytes', len(image_bytes))
+        # ไฟล์เดียวกันที่ส่งซ้ำได้ key เดิม (เก็บใน S3 ครั้งเดียว)
+        s3_key = image_upload.store_content(clients.s3(), folder, image_bytes, 'image/jpeg')
+        image_url = image_upload.image_url_for(s3_key)
+        print(f"[SUCCESS] Image uploaded: {image_url}")
+        return success_response(image_url=image_url)
+    except image_upload.UploadError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        print(f"[ERROR] Image upload failed: {e}")
+        return error_response(str(e), 500)
+
+
+# -------- Presigned upload (browser -> S3 โดยตรง) --------
+@router.route('get_upload_url')
+def get_upload_url(body):
+    try:
+        upload = image_upload.create_upload(
+            clients.s3(),
+            body.get('folder', 'found'),
+            body.get('content_type', 'image/jpeg'),
+            body.get('content_length'),
+            str(body.get('method', 'POST')).upper(),
+            body.get('content_sha256')
+        )
+    except (image_upload.UploadError, ValueError, TypeError) as e:
+        return error_response(str(e), 400)
+    return success_response(**upload)
+
+
+# -------- Confirm presigned upload --------
+@router.route('confirm_upload')
+def confirm_upload(body):
+    try:
+        image_url = image_upload.verify_upload(clients.s3(), body.get('image_key'))
+    except image_upload.UploadError as e:
+        return error_response(str(e), 400)
+    return success_response(image_key=body.get('image_key'), image_url=image_url)
+
+
+# -------- Report found --------
+@router.route('report_found')
+def report_found(body):
+    image_url = body.get('image_url')
+    image_key = body.get('image_key')
+    client_token = body.get('client_token') or body.get('clientToken')
+    # --- Validation
+    try:
+        values = item_model.form_values('FOUND', body)
+    except item_model.InvalidItem as e:
+        return error_response(str(e), 400)
+    # --- รูปที่อัปโหลดผ่าน presigned URL: ตรวจไฟล์ใน S3 ก่อนผูกกับ item
+    if image_key:
+        try:
+            with metrics.span('verify_upload'):
+                image_url = image_upload.verify_upload(clients.s3(), image_key)
+        except image_upload.UploadError as e:
+            return error_response(str(e), 400)
+    # --- Save to DynamoDB
+    table = clients.table()
+    submission = None
+    try:
+        # --- client_token เดิม (retry / กดซ้ำ) ได้ case_id เดิมกลับไปโดยไม่สร้าง item ใหม่
+        try:
+            with metrics.span('start_submission'):
+                submission = submissions.start(table, 'FOUND', client_token)
+        except submissions.InvalidToken as e:
+            return error_response(str(e), 400)
+        except submissions.RequestInProgress as e:
+            return error_response(str(e), 409)
+        if submission.replay:
+            print(f"[INFO] Duplicate submission: {submission.case_id}")
+            return success_response(case_id=submission.case_id, replayed=True)
+        case_id = submission.case_id
+        record = item_model.new_item(submission, values)
+        if image_url:
+            record.image_url = image_url
+        if image_key:
+            record.image_key = image_key
+        item = record.to_item()
+        if not submissions.save(table, item, submission):
+            return success_response(case_id=case_id, replayed=True)
+        print(f"[SUCCESS] Item saved: {case_id}")
+        try:
+            with metrics.span('index_item'):
+                search_index.submit(item)
+        except Exception as index_err:
+            print(f"[WARN] Search index update failed: {index_err}")
+        try:
+            with metrics.span('update_stats'):
+                stats.record(table, new=item)
+        except Exception as stats_err:
+            print(f"[WARN] Stats update failed: {stats_err}")
+        try:
+            with metrics.span('find_matches'):
+                matching.submit(table, item)
+        except Exception as match_err:
+            print(f"[WARN] Matching failed: {match_err}")
+        if image_url:
+            try:
+                # URL ของรูปย่อบันทึกเมื่อ image_resize_function สร้างเสร็จแล้วเท่านั้น
+                with metrics.span('attach_variants'):
+                    image_upload.attach_variants(table, {'item_id': item['item_id'], 'item_type': 'FOUND'}, image_url)
+            except Exception as variant_err:
+                print(f"[WARN] Variant URL update failed: {variant_err}")
+        try:
+            with metrics.span('bump_generation'):
+                result_cache.bump_generation(table, item['updated_at'])
+        except Exception as cache_err:
+            print(f"[WARN] Cache generation bump failed: {cache_err}")
+        return success_response(case_id=case_id)
+    except Exception as e:
+        print(f"[ERROR] DynamoDB error: {e}")
+        if submission is not None:
+            submissions.abandon(table, submission)
+        return error_response('Failed to save data', 500)
@@ -0,0 +1,28 @@
+import json
+
+from lostfound_core import image_ingest, metrics
+
+# worker ของคิวรูป (SQS trigger ของ IMAGE_QUEUE_URL) — ต้องมี Pillow (Lambda layer เดียวกับ image_resize_function)
+# ตั้ง ReportBatchItemFailures ที่ event source mapping: งานที่ล้มเหลวชั่วคราวจะกลับเข้าคิวเฉพาะรายการนั้น
+# ครบ MAX_ATTEMPTS ครั้ง (ApproximateReceiveCount) แล้วตั้ง item เป็น image_status = failed
+# (ควรตั้ง maxReceiveCount ของ redrive policy มากกว่า MAX_ATTEMPTS เพื่อให้ worker เป็นผู้ตัดสินก่อนส่ง DLQ)
+#
+# ถ้าไม่มีคิว handler ของฟอร์ม invoke ฟังก์ชันนี้แบบ async ด้วย {'jobs': [...]} (IMAGE_WORKER_FUNCTION)
+# งานแบบนี้ไม่มีคิวให้ส่งกลับ จึง retry ในที่เดียวกันจนสำเร็จหรือครบ MAX_ATTEMPTS
+
+
+@metrics.traced('image_ingest_function')
+def lambda_handler(event, context):
+    for job in event.get('jobs', []):
+        image_ingest.process_with_retries(job)
+    failures = []
+    for record in event.get('Records', []):
+        attempt = int(record.get('attributes', {}).get('ApproximateReceiveCount', '1'))
+        try:
+            job = json.loads(record['body'])
+        except (KeyError, ValueError) as e:
+            print(f"[ERROR] Invalid message {record.get('messageId')}: {e}")
+            continue
+        if not image_ingest.handle(job, attempt):
+            failures.append({'itemIdentifier': record['messageId']})
+    return {'batchItemFailures': failures}
@@ -0,0 +1,122 @@
+import io
+import os
+import urllib.parse
+from boto3.dynamodb.conditions import Attr
+from PIL import Image, ImageOps
+
+from lostfound_core import clients, image_upload, metrics, result_cache
+
+# สร้างรูปย่อ (thumbnail / medium) ทุกครั้งที่มีรูปใหม่ใน found/ หรือ lost/
+# ติดตั้งเป็น S3 trigger ของ bucket tu-lostfound-pictures (event s3:ObjectCreated:Put / Post)
+# event อื่น (เช่น Copy จากการย้าย storage class ของ expiry_sweeper_function) ถูกข้าม
+# และรูปที่สร้างรูปย่อเสร็จแล้ว (VARIANTS#<key> ready) ไม่สร้างซ้ำ — กันกรณี S3 ส่ง event ซ้ำ
+# ต้องมี Pillow (Lambda layer)
+#
+# สร้างเสร็จแล้วจึงบันทึก thumbnail_url/medium_url ให้ item ที่ใช้รูปนี้ (image_upload.variants_ready)
+# เรียกด้วย {"backfill": true} เพื่อสร้างรูปย่อให้ item เก่าที่ยังไม่มี thumbnail_url
+
+S3_BUCKET_NAME = clients.S3_BUCKET_NAME
+VARIANT_QUALITY = int(os.environ.get('IMAGE_VARIANT_QUALITY', '80'))
+UPLOAD_EVENTS = ('ObjectCreated:Put', 'ObjectCreated:Post', 'ObjectCreated:CompleteMultipartUpload')
+
+def render_variant(image, max_side):
+    variant = image.copy()
+    variant.thumbnail((max_side, max_side))
+    buffer = io.BytesIO()
+    if image_upload.VARIANT_FORMAT == 'jpeg':
+        variant.convert('RGB').save(buffer, 'JPEG', quality=VARIANT_QUALITY, optimize=True, progressive=True)
+        return buffer.getvalue(), 'image/jpeg'
+    variant.save(buffer, 'WEBP', quality=VARIANT_QUALITY, method=4)
+    return buffer.getvalue(), 'image/webp'
+
+
+def make_variants(key):
+    """อ่านรูปต้นฉบับจาก S3 แล้วเขียนรูปย่อทุกขนาดไปยัง key ที่คำนวณจาก key เดิม"""
+    s3 = clients.s3()
+    original = s3.get_object(Bucket=S3_BUCKET_NAME, Key=key)['Body'].read()
+    metrics.count('ImageBytes', len(original))
+    with metrics.span('decode_image'):
+        image = ImageOps.exif_transpose(Image.open(io.BytesIO(original)))
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    for variant, max_side in image_upload.IMAGE_VARIANTS.items():
+        with metrics.span('render_variant'):
+            data, content_type = render_variant(image, max_side)
+        s3.put_object(
+            Bucket=S3_BUCKET_NAME,
+            Key=image_upload.variant_key(key, variant),
+            Body=data,
+            ContentType=content_type,
+            CacheControl='public, max-age=31536000, immutable'
+        )
+    print(f"[SUCCESS] Variants created for {key}")
+
+
+def backfill(limit=None):
+    """สร้างรูปย่อและบันทึก URL ให้ item ที่มี image_url แต่ยังไม่มี thumbnail_url"""
+    table = clients.table()
+    processed = 0
+    attached = 0
+    params = {'FilterExpression': Attr('image_url').exists() & Attr('thumbnail_url').not_exists()}
+    while True:
+        response = table.scan(**params)
+        for item in response.get('Items', []):
+            key = image_upload.key_from_url(item['image_url'])
+            if not key:
+                continue
+            try:
+                make_variants(key)
+            except Exception as e:
+                print(f"[WARN] Variant creation failed for {key}: {e}")
+                continue
+            # updated_at ใหม่: delta sync (GSI4) และ snapshot ของผลค้นหาเห็นการเปลี่ยนแปลงนี้
+            attached += image_upload.variants_ready(table, key)
+            if image_upload.set_variant_urls(table, {'item_id': item['item_id'], 'item_type': item['item_type']},
+                                             item['image_url']):
+                processed += 1
+            if limit and processed >= limit:
+                break
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key or (limit and processed >= limit):
+            break
+        params['ExclusiveStartKey'] = last_key
+    if processed or attached:
+        result_cache.bump_generation(table)
+    return processed
+
+
+@metrics.traced('image_resize_function')
+def lambda_handler(event, context):
+    if event.get('backfill'):
+        processed = backfill(event.get('limit'))
+        print(f"[SUCCESS] Backfilled {processed} items")
+        return {'status': 'success', 'processed': processed}
+
+    table = clients.table()
+    created = 0
+    attached = 0
+    for record in event.get('Records', []):
+        key = urllib.parse.unquote_plus(record['s3']['object']['key'])
+        # ข้ามรูปย่อที่ฟังก์ชันนี้เขียนเอง ไม่ให้ trigger วนซ้ำ
+        if not key.startswith(tuple(f'{folder}/' for folder in image_upload.UPLOAD_FOLDERS)):
+            print(f"[INFO] Skipping {key}")
+            continue
+        if record.get('eventName') not in UPLOAD_EVENTS:
+            print(f"[INFO] Skipping {record.get('eventName')} for {key}")
+            continue
+        try:
+            if image_upload.has_variants(table, key):
+                print(f"[INFO] Variants already exist for {key}")
+                continue
+            make_variants(key)
+            created += 1
+        except Exception as e:
+            print(f"[ERROR] Variant creation failed for {key}: {e}")
+            continue
+        try:
+            attached += image_upload.variants_ready(table, key)
+        except Exception as e:
+            print(f"[ERROR] Variant URL update failed for {key}: {e}")
+    if attached:
+        result_cache.bump_generation(table)
+    return {'status': 'success', 'processed': created, 'attached': attached}
@@ -0,0 +1,17 @@
+# โค้ดที่ทุก Lambda ใช้ร่วมกัน (ต้อง zip โฟลเดอร์นี้ไปพร้อมกับไฟล์ handler ทุกตัว)
+#
+#   clients       boto3 client/resource ที่สร้างครั้งแรกที่ใช้และใช้ซ้ำทั้ง container
+#   metrics       เวลาต่อขั้นตอนและตัวนับต่อ request (CloudWatch EMF)
+#   handler       router ตาม action, อ่าน body, CORS และสร้าง JSON response
+#   item_keys     รูปแบบ item_id ที่มี item_type ต่อท้าย และการจอง case_id
+#   item_model    field ของ item, การตรวจค่า และ UpdateExpression ที่คำนวณ key ของ GSI ให้เอง
+#   image_upload  presigned upload, รูปแบบ content-addressed และ URL ของรูปย่อ
+#   submissions   client_token กันการแจ้งซ้ำ และเขียน item ใหม่
+#   image_ingest  คิวรับรูปแบบ async: ตรวจไฟล์, encode ใหม่ (ตัด EXIF), อัปโหลด, retry
+#   changes       tombstone ของ item ที่ถูกลบ และ cursor ของ delta sync (GSI4 ตาม updated_at)
+#   search_index  n-gram index สำหรับค้นหาข้อความ
+#   parallel_scan scan แบบขนานหลาย segment พร้อมหยุดเมื่อได้ครบ
+#   result_cache  cache ผลค้นหาและ generation counter
+#   snapshot      snapshot แบบคอลัมน์ของผลค้นหาใน S3 (โหลดครั้งเดียวต่อ container) และตัวสร้าง
+#   matching      จับคู่ LOST <-> FOUND อัตโนมัติ
+#   stats         ตัวนับสำเร็จรูปต่อ status/category/type/วัน สำหรับ dashboard
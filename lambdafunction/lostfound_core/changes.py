@@ -0,0 +1,101 @@
+import os
+import time
+import heapq
+import datetime
+
+from boto3.dynamodb.conditions import Key
+
+# ลำดับการเปลี่ยนแปลงสำหรับ delta sync (search_mode=changes_since)
+# หน้าเว็บโหลดรายการครั้งแรกแบบเดิมพร้อม cursor แล้วขอเฉพาะ item ที่สร้าง/แก้/ลบหลัง cursor
+#
+# GSI4 (item_type HASH, updated_at RANGE, projection ALL) — ทุก handler ตั้ง updated_at ทุกครั้งที่เขียนอยู่แล้ว
+# จึงไม่ต้องเพิ่ม attribute หรือ backfill: item ที่ไม่มี updated_at (ข้อมูลเก่ามาก) จะเข้า index เมื่อถูกแก้ครั้งแรก
+#
+# การลบทิ้ง tombstone ไว้ใน partition เดียวกับ item ที่ถูกลบ:
+#
+#   item_id = <item_id เดิม>, item_type = TOMBSTONE   deleted_type, updated_at, expires_at
+#
+# query item_id แบบเก่า (ไม่มี item_type ต่อท้าย) ต้องจำกัด sort key เป็นช่วง FOUND..LOST ไม่ให้ได้ tombstone
+# tombstone หมดอายุตาม TTL (expires_at) — cursor ที่เก่ากว่า TOMBSTONE_TTL_SECONDS ต้องโหลดใหม่ทั้งหมด (reset)
+
+CHANGES_INDEX = 'GSI4'
+TOMBSTONE_TYPE = 'TOMBSTONE'
+CHANGE_TYPES = ('FOUND', 'LOST', TOMBSTONE_TYPE)
+TOMBSTONE_TTL_SECONDS = int(os.environ.get('CHANGES_TOMBSTONE_TTL_SECONDS', str(7 * 24 * 3600)))
+# อ่านย้อนหลัง cursor เผื่อ GSI ที่อัปเดตช้า (eventually consistent) และเวลาที่ต่างกันระหว่าง Lambda
+# client ได้ item ซ้ำในช่วงนี้ได้ จึงต้อง upsert ตาม item_id
+CURSOR_OVERLAP_SECONDS = int(os.environ.get('CHANGES_CURSOR_OVERLAP_SECONDS', '30'))
+TTL_ATTRIBUTE = 'expires_at'
+
+
+def now():
+    return datetime.datetime.utcnow().isoformat()
+
+
+def parse_cursor(cursor):
+    """ตรวจ cursor (เวลา ISO แบบเดียวกับ updated_at) คืนค่าเดิมในรูปแบบมาตรฐาน"""
+    try:
+        return datetime.datetime.fromisoformat(str(cursor)).isoformat()
+    except ValueError:
+        raise ValueError(f'Invalid cursor: {cursor}')
+
+
+def read_from(cursor):
+    """เวลาเริ่มอ่านจริงของ cursor (ถอยหลัง CURSOR_OVERLAP_SECONDS)"""
+    since = datetime.datetime.fromisoformat(cursor) - datetime.timedelta(seconds=CURSOR_OVERLAP_SECONDS)
+    return since.isoformat()
+
+
+def expired(cursor):
+    """cursor เก่ากว่าอายุ tombstone: การลบบางรายการอาจหายไปแล้ว"""
+    oldest = datetime.datetime.utcnow() - datetime.timedelta(seconds=TOMBSTONE_TTL_SECONDS)
+    return datetime.datetime.fromisoformat(cursor) < oldest
+
+
+def _query_all(table, params):
+    while True:
+        response = table.query(**params)
+        yield from response.get('Items', [])
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        params = dict(params, ExclusiveStartKey=last_key)
+
+
+def iter_changes(table, since, read_params=None):
+    """query GSI4 ของ FOUND/LOST/TOMBSTONE ที่ updated_at > since แล้ว merge ตามเวลาจากเก่าไปใหม่"""
+    streams = []
+    for item_type in CHANGE_TYPES:
+        params = dict(
+            read_params or {},
+            IndexName=CHANGES_INDEX,
+            KeyConditionExpression=Key('item_type').eq(item_type) & Key('updated_at').gt(since)
+        )
+        streams.append(_query_all(table, params))
+    return heapq.merge(*streams, key=lambda i: i['updated_at'])
+
+
+def tombstone(item, deleted_at):
+    return {
+        'item_id': item['item_id'],
+        'item_type': TOMBSTONE_TYPE,
+        'deleted_type': item['item_type'],
+        'updated_at': deleted_at,
+        TTL_ATTRIBUTE: int(time.time()) + TOMBSTONE_TTL_SECONDS,
+    }
+
+
+def record_deleted(table, items, deleted_at=None):
+    """เขียน tombstone ของ item ที่ลบสำเร็จแล้ว (BatchWriteItem ทีละ 25 ผ่าน batch_writer) คืน deleted_at"""
+    if not items:
+        return None
+    deleted_at = deleted_at or now()
+    try:
+        with table.batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=tombstone(item, deleted_at))
+    except Exception as e:
+        # ไม่มี tombstone = หน้าเว็บที่ใช้ delta sync ยังเห็น item นี้จนกว่าจะโหลดใหม่
+        print(f"[WARN] Tombstone write failed: {e}")
+        return None
+    return deleted_at
@@ -0,0 +1,95 @@
+import os
+import time
+import random
+import boto3
+from botocore.config import Config
+
+from . import metrics
+
+# boto3 client/resource ของทุก handler สร้างครั้งแรกที่ถูกใช้จริง แล้วเก็บไว้ใช้ซ้ำตลอดอายุ container
+# handler จึงไม่ต้องโหลด service model ที่ไม่ได้ใช้ตอน cold start (เช่น S3 ใน action ที่ไม่แตะรูป)
+
+REGION = os.environ.get('LOSTFOUND_REGION', 'us-east-1')
+DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME', 'Items_TU')
+S3_BUCKET_NAME = os.environ.get('S3_BUCKET_NAME', 'tu-lostfound-pictures')
+
+# timeout สั้นให้ retry เร็วแทนการรอ connection ที่ค้างจนหมดเวลาของ Lambda
+# tcp_keepalive กัน connection ที่ idle ระหว่าง invocation ถูกตัดเงียบ ๆ
+BOTO_CONFIG = Config(
+    region_name=REGION,
+    connect_timeout=float(os.environ.get('AWS_CONNECT_TIMEOUT', '2')),
+    read_timeout=float(os.environ.get('AWS_READ_TIMEOUT', '10')),
+    retries={
+        'mode': os.environ.get('AWS_RETRY_MODE', 'standard'),
+        'max_attempts': int(os.environ.get('AWS_MAX_ATTEMPTS', '4')),
+    },
+    tcp_keepalive=True,
+    max_pool_connections=int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', '20')),
+)
+
+# UnprocessedKeys / UnprocessedItems ของ batch API ไม่ถูก retry โดย botocore — ผู้เรียกส่งซ้ำเองหลัง backoff()
+BATCH_BACKOFF_BASE = float(os.environ.get('BATCH_BACKOFF_BASE_SECONDS', '0.05'))
+BATCH_BACKOFF_MAX = float(os.environ.get('BATCH_BACKOFF_MAX_SECONDS', '2'))
+
+_session = None
+_clients = {}
+_resources = {}
+_tables = {}
+
+
+def session():
+    global _session
+    if _session is None:
+        _session = boto3.session.Session(region_name=REGION)
+    return _session
+
+
+def client(service):
+    if service not in _clients:
+        _clients[service] = metrics.instrument(session().client(service, config=BOTO_CONFIG))
+    return _clients[service]
+
+
+def resource(service):
+    if service not in _resources:
+        _resources[service] = session().resource(service, config=BOTO_CONFIG)
+        metrics.instrument(_resources[service].meta.client)
+    return _resources[service]
+
+
+def table(name=None):
+    name = name or DYNAMODB_TABLE_NAME
+    if name not in _tables:
+        _tables[name] = resource('dynamodb').Table(name)
+    return _tables[name]
+
+
+def s3():
+    return client('s3')
+
+
+def warm():
+    """สร้าง client ของตารางหลักล่วงหน้า — handler เรียกตอน import ให้เกิดในช่วง init ของ Lambda
+
+    ช่วง init ได้ CPU เต็มแม้ตั้ง memory ต่ำ และถ้าเปิด provisioned concurrency/SnapStart
+    จะเสร็จก่อน request แรก ส่วน client อื่น (เช่น S3) ยังสร้างเมื่อใช้ครั้งแรกเหมือนเดิม
+    """
+    table()
+
+
+def dynamodb():
+    return resource('dynamodb')
+
+
+def backoff(attempt):
+    """รอก่อนส่งคำขอที่ค้างซ้ำครั้งที่ attempt (เริ่มที่ 0): exponential backoff แบบ full jitter"""
+    time.sleep(random.uniform(0, min(BATCH_BACKOFF_MAX, BATCH_BACKOFF_BASE * 2 ** attempt)))
+
+
+def reset():
+    """ล้าง client ที่สร้างไว้ (ใช้ตอนเปลี่ยน endpoint/credential เช่นในสคริปต์ benchmark)"""
+    global _session
+    _session = None
+    _clients.clear()
+    _resources.clear()
+    _tables.clear()
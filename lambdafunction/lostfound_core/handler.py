@@ -0,0 +1,137 @@
+import json
+import base64
+import decimal
+import traceback
+
+from . import metrics
+
+# ส่วนที่ทุก HTTP handler (Lambda function URL) ใช้ร่วมกัน: CORS, อ่าน body, router และ JSON response
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'POST, OPTIONS, GET',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization',
+    'Content-Type': 'application/json'
+}
+NDJSON_HEADERS = dict(CORS_HEADERS, **{'Content-Type': 'application/x-ndjson'})
+
+
+def _json_default(obj):
+    # DynamoDB คืนตัวเลขเป็น Decimal
+    if isinstance(obj, decimal.Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps(payload):
+    """JSON แบบเดียวกันทุก response: ไม่ escape ภาษาไทย (ขนาดเล็กกว่า \\uXXXX ครึ่งหนึ่ง) และไม่มีช่องว่าง"""
+    return json.dumps(payload, default=_json_default, ensure_ascii=False, separators=(',', ':'))
+
+
+def json_response(status_code, payload):
+    with metrics.span('json_encode'):
+        body = dumps(payload)
+    return {
+        'statusCode': status_code,
+        'headers': CORS_HEADERS,
+        'body': body
+    }
+
+
+def ndjson_response(lines, trailer):
+    """NDJSON: 1 บรรทัดต่อ item (encode แล้ว) ปิดท้ายด้วยบรรทัดสรุปที่มี next_token — client แสดงผลได้ทีละบรรทัดระหว่างรับ"""
+    lines.append(dumps(trailer))
+    return {
+        'statusCode': 200,
+        'headers': NDJSON_HEADERS,
+        'body': '\n'.join(lines) + '\n'
+    }
+
+
+def success_response(**fields):
+    return json_response(200, {'status': 'success', **fields})
+
+
+def error_response(error, code=400):
+    return json_response(code, {'status': 'error', 'error': error})
+
+
+def http_method(event):
+    return (event or {}).get('requestContext', {}).get('http', {}).get('method', '')
+
+
+def parse_body(event):
+    """คืน body เป็น dict (รองรับ body ที่เป็น string, dict หรือ base64) — body ผิดรูปแบบ raise ValueError"""
+    raw = (event or {}).get('body')
+    if raw is None or raw == '':
+        return {}
+    if isinstance(raw, dict):
+        return raw
+    if event.get('isBase64Encoded'):
+        raw = base64.b64decode(raw).decode('utf-8')
+    try:
+        body = json.loads(raw)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid JSON body')
+    if not isinstance(body, dict):
+        raise ValueError('Invalid JSON body')
+    return body
+
+
+class Router:
+    """ส่ง request ไปยังฟังก์ชันตามค่า field ใน body (ค่าเริ่มต้นคือ action)
+
+    ฟังก์ชันที่ลงทะเบียนรับ body (dict) และคืน response
+    ไม่ log event ทั้งก้อน (body อาจมีรูป base64 หลาย MB) แต่พิมพ์ metric (EMF) 1 บรรทัดต่อ request
+    """
+
+    def __init__(self, name, field='action'):
+        self.name = name
+        self.field = field
+        self.routes = {}
+        self.default = None
+
+    def route(self, *values):
+        def register(func):
+            for value in values:
+                self.routes[value] = func
+            return func
+        return register
+
+    def fallback(self, func):
+        """ฟังก์ชันที่ใช้เมื่อไม่มี field หรือค่าไม่ตรงกับ route ใด"""
+        self.default = func
+        return func
+
+    def dispatch(self, event, context=None):
+        metrics.start(self.name, getattr(context, 'aws_request_id', None))
+        result = self._dispatch(event)
+        raw_body = (event or {}).get('body')
+        metrics.count('RequestBytes', len(raw_body) if isinstance(raw_body, str) else 0)
+        metrics.count('ResponseBytes', len(result['body'].encode('utf-8')))
+        metrics.finish(StatusCode=result['statusCode'])
+        return result
+
+    def _dispatch(self, event):
+        if http_method(event) == 'OPTIONS':
+            metrics.set_action('preflight')
+            return json_response(200, {'status': 'ok'})
+        try:
+            body = parse_body(event)
+        except ValueError as e:
+            return error_response(str(e), 400)
+        value = body.get(self.field)
+        func = (self.routes.get(value) if isinstance(value, str) else None) or self.default
+        if func is None:
+            return error_response(f'Invalid {self.field}: {value}', 400)
+        # ใช้ชื่อ route (ไม่ใช่ค่าที่ client ส่งมาตรง ๆ) เป็น dimension เพื่อไม่ให้จำนวน metric บาน
+        metrics.set_action(value if isinstance(value, str) and value in self.routes else func.__name__)
+        print(f"[DEBUG] {self.name}: {self.field}={value}")
+        try:
+            return func(body)
+        except Exception as e:
+            print(f"[ERROR] {self.name}: {e}")
+            traceback.print_exc()
+            return error_response(str(e), 500)
@@ -0,0 +1,233 @@
+import io
+import os
+import json
+import time
+import uuid
+import base64
+from collections import deque
+
+from . import clients, image_upload, item_model, metrics, result_cache
+
+# รับรูปจากฟอร์มแบบ async: handler บันทึก item ทันทีด้วย image_status = pending แล้วส่งงานเข้าคิว
+# worker (image_ingest_function.py, SQS trigger) ตรวจไฟล์, encode ใหม่ (ตัด EXIF เช่นพิกัด GPS),
+# เก็บแบบ content-addressed แล้วแก้ item เป็น image_status = ready (หรือ failed ถ้าไฟล์ใช้ไม่ได้)
+#
+# งาน 1 ชิ้น: {item_id, item_type, folder, content_type, data (base64) หรือ staged_key}
+# - รูปเล็กส่ง bytes ไปในข้อความเลย (SQS จำกัด 256 KB) รูปใหญ่ put ไว้ที่ staging/ ก่อน
+#   (ควรตั้ง lifecycle rule ลบ staging/ หลัง 1 วัน เผื่องานที่ล้มเหลวถาวร)
+#
+# IMAGE_QUEUE_URL
+#   URL       Amazon SQS (แนะนำ)
+#   'memory'  คิวใน process สำหรับทดสอบ/benchmark เรียก drain() เพื่อประมวลผล
+#   ''        ไม่มีคิว: invoke image_ingest_function แบบ async (InvocationType=Event) ตาม IMAGE_WORKER_FUNCTION
+#             worker retry เองด้วย process_with_retries (Lambda ไม่ retry ให้เพราะ handler ไม่ raise)
+#             ถ้าไม่ได้ตั้งทั้งสองค่า จะประมวลผลใน request เดิมและ log [WARN] — ใช้ได้แค่ตอนรันในเครื่อง
+#             เพราะเวลาตอบของ request จะโตตามขนาดรูปอีกครั้ง
+#             บน Lambda (มี AWS_LAMBDA_FUNCTION_NAME) handler ที่รับรูปจะ import ไม่ผ่าน (check_config)
+#             เว้นแต่ตั้ง IMAGE_INLINE_LOCAL=true ไว้ตั้งใจ
+
+IMAGE_QUEUE_URL = os.environ.get('IMAGE_QUEUE_URL', '')
+IMAGE_WORKER_FUNCTION = os.environ.get('IMAGE_WORKER_FUNCTION', '')
+IMAGE_INLINE_LOCAL = os.environ.get('IMAGE_INLINE_LOCAL', '').lower() == 'true'
+INLINE_MAX_BYTES = int(os.environ.get('IMAGE_INLINE_MAX_BYTES', str(180 * 1024)))
+MAX_ATTEMPTS = int(os.environ.get('IMAGE_MAX_ATTEMPTS', '3'))
+JPEG_QUALITY = int(os.environ.get('IMAGE_JPEG_QUALITY', '85'))
+MAX_PIXELS = int(os.environ.get('IMAGE_MAX_PIXELS', str(40 * 1000 * 1000)))
+STAGING_PREFIX = 'staging/'
+
+PENDING = 'pending'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class InvalidImage(ValueError):
+    """ไฟล์ใช้ไม่ได้ (ลองใหม่ก็ไม่สำเร็จ) — item จะถูกตั้งเป็น failed ทันที"""
+    pass
+
+
+class QueueNotConfigured(RuntimeError):
+    pass
+
+
+def check_config():
+    """handler ที่ส่งงานรูปเรียกตอน import: บน Lambda ต้องมีคิวหรือ worker (ไม่ประมวลผลรูปใน request)"""
+    if IMAGE_QUEUE_URL or IMAGE_WORKER_FUNCTION or IMAGE_INLINE_LOCAL:
+        return
+    if os.environ.get('AWS_LAMBDA_FUNCTION_NAME'):
+        raise QueueNotConfigured('Set IMAGE_QUEUE_URL or IMAGE_WORKER_FUNCTION (or IMAGE_INLINE_LOCAL=true)')
+
+
+class MemoryQueue:
+    """คิวใน process แทน SQS สำหรับทดสอบ"""
+
+    def __init__(self):
+        self.messages = deque()
+
+    def send(self, body):
+        self.messages.append(body)
+
+    def __len__(self):
+        return len(self.messages)
+
+
+memory_queue = MemoryQueue()
+
+
+def stage(s3, folder, data, content_type, item_id, item_type):
+    """เตรียมงานจาก bytes ของรูป: รูปใหญ่ put ไว้ที่ staging/ ก่อน (ไม่ประมวลผลใน request)"""
+    job = {'item_id': item_id, 'item_type': item_type, 'folder': folder, 'content_type': content_type}
+    if len(data) > image_upload.MAX_IMAGE_BYTES:
+        raise InvalidImage(f'Image too large (max {image_upload.MAX_IMAGE_BYTES} bytes)')
+    if len(data) <= INLINE_MAX_BYTES:
+        job['data'] = base64.b64encode(data).decode('ascii')
+    else:
+        job['staged_key'] = f"{STAGING_PREFIX}{folder}/{uuid.uuid4()}"
+        s3.put_object(Bucket=clients.S3_BUCKET_NAME, Key=job['staged_key'], Body=data, ContentType=content_type)
+    return job
+
+
+def enqueue(job):
+    """ส่งงานเข้าคิว (ไม่มีคิว = invoke worker แบบ async หรือถ้าไม่ได้ตั้งไว้ ประมวลผลทันทีพร้อม retry)"""
+    body = json.dumps(job)
+    if IMAGE_QUEUE_URL == 'memory':
+        memory_queue.send(body)
+    elif IMAGE_QUEUE_URL:
+        clients.client('sqs').send_message(QueueUrl=IMAGE_QUEUE_URL, MessageBody=body)
+    elif IMAGE_WORKER_FUNCTION:
+        clients.client('lambda').invoke(FunctionName=IMAGE_WORKER_FUNCTION, InvocationType='Event',
+                                        Payload=json.dumps({'jobs': [job]}))
+    else:
+        print(f"[WARN] IMAGE_QUEUE_URL and IMAGE_WORKER_FUNCTION not set: processing image for {job['item_id']} "
+              f"inside the request")
+        metrics.count('ImageInlineJobs', 1)
+        process_with_retries(job)
+
+
+def drain(max_jobs=None):
+    """ประมวลผลงานใน memory_queue จนหมด คืนจำนวนงานที่ทำ"""
+    done = 0
+    while memory_queue.messages and (max_jobs is None or done < max_jobs):
+        process_with_retries(json.loads(memory_queue.messages.popleft()))
+        done += 1
+    return done
+
+
+def load_bytes(job):
+    if 'data' in job:
+        return base64.b64decode(job['data'])
+    return clients.s3().get_object(Bucket=clients.S3_BUCKET_NAME, Key=job['staged_key'])['Body'].read()
+
+
+def reencode(data):
+    """ตรวจว่าเป็นรูปจริง แล้ว encode ใหม่โดยไม่มี metadata คืน (bytes, content_type)
+
+    หมุนตาม EXIF orientation ก่อน เพราะ EXIF (รวมพิกัด GPS) ถูกตัดทิ้งทั้งหมด
+    """
+    from PIL import Image, ImageOps
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    try:
+        probe = Image.open(io.BytesIO(data))
+        probe.verify()
+        image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+        image.load()
+    except Exception as e:
+        raise InvalidImage(f'Unreadable image: {e}')
+    buffer = io.BytesIO()
+    if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+        image.convert('RGBA').save(buffer, 'PNG', optimize=True)
+        return buffer.getvalue(), 'image/png'
+    image.convert('RGB').save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue(), 'image/jpeg'
+
+
+def set_status(table, job, status, fields=None, error=None):
+    """แก้ item ของงานที่ยัง pending คืน False ถ้า item ถูกลบไปแล้วหรือทำเสร็จไปแล้ว (SQS ส่งงานซ้ำได้)"""
+    fields = dict(fields or {}, image_status=status)
+    if error is not None:
+        fields['image_error'] = str(error)[:500]
+    params = item_model.update_params(fields, allowed=item_model.IMAGE_FIELDS,
+                                      remove=('image_error',) if error is None else ())
+    params['ExpressionAttributeValues'][':pending'] = PENDING
+    try:
+        table.update_item(
+            Key={'item_id': job['item_id'], 'item_type': job['item_type']},
+            ConditionExpression='#image_status = :pending',
+            **params
+        )
+        return True
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        return False
+
+
+def process(job):
+    """ประมวลผลงาน 1 ชิ้น — InvalidImage = ไฟล์ใช้ไม่ได้, exception อื่น = ลองใหม่ได้"""
+    table = clients.table()
+    s3 = clients.s3()
+    with metrics.span('load_image'):
+        data = load_bytes(job)
+    metrics.count('ImageBytes', len(data))
+    with metrics.span('reencode_image'):
+        encoded, content_type = reencode(data)
+    with metrics.span('store_image'):
+        key = image_upload.store_content(s3, job['folder'], encoded, content_type)
+    image_url = image_upload.image_url_for(key)
+    fields = {'image_url': image_url, 'image_key': key}
+    item_key = {'item_id': job['item_id'], 'item_type': job['item_type']}
+    attached = set_status(table, job, READY, fields)
+    if not attached:
+        # ทำเสร็จไปแล้ว (SQS ส่งซ้ำ หรือครั้งก่อนล้มหลังเขียน status) หรือ item ถูกลบ/เปลี่ยนรูปไปแล้ว
+        current = table.get_item(Key=item_key, ConsistentRead=True).get('Item') or {}
+        attached = current.get('image_key') == key
+    if attached:
+        # นับการใช้รูปหลังผูกกับ item สำเร็จเท่านั้น และนับครั้งเดียวต่อ item แม้งานถูกทำซ้ำ
+        image_upload.retain(table, key, job['item_id'])
+        try:
+            image_upload.attach_variants(table, item_key, image_url)
+        except Exception as e:
+            print(f"[WARN] Variant URL update failed: {e}")
+        result_cache.bump_generation(table)
+        print(f"[SUCCESS] Image ready for {job['item_id']}: {key}")
+    else:
+        print(f"[WARN] Item deleted or image replaced: {job['item_id']}")
+        # ไฟล์ที่เพิ่ง store อาจไม่มี item ใช้: นับแล้วคืนทันที release จะคืน key ถ้าไม่มีใครใช้อยู่
+        image_upload.retain(table, key)
+        for removable in image_upload.release(table, [key]):
+            s3.delete_object(Bucket=clients.S3_BUCKET_NAME, Key=removable)
+    if job.get('staged_key'):
+        s3.delete_object(Bucket=clients.S3_BUCKET_NAME, Key=job['staged_key'])
+
+
+def fail(job, error):
+    """ตั้ง item เป็น image_status = failed (ไฟล์ใช้ไม่ได้ หรือ retry ครบแล้ว)"""
+    print(f"[ERROR] Image ingestion failed for {job['item_id']}: {error}")
+    metrics.count('ImageFailures', 1)
+    try:
+        set_status(clients.table(), job, FAILED, error=error)
+        if job.get('staged_key'):
+            clients.s3().delete_object(Bucket=clients.S3_BUCKET_NAME, Key=job['staged_key'])
+    except Exception as e:
+        print(f"[WARN] Could not mark image failed: {e}")
+
+
+def handle(job, attempt):
+    """ทำงาน 1 ครั้ง คืน True ถ้าจบแล้ว (สำเร็จหรือล้มเหลวถาวร) False ถ้าควรลองใหม่"""
+    try:
+        process(job)
+        return True
+    except InvalidImage as e:
+        fail(job, e)
+        return True
+    except Exception as e:
+        if attempt >= MAX_ATTEMPTS:
+            fail(job, e)
+            return True
+        print(f"[WARN] Image ingestion attempt {attempt} failed for {job['item_id']}: {e}")
+        return False
+
+
+def process_with_retries(job):
+    """ไม่มี SQS: retry ในที่เดียวกัน (backoff 0.2, 0.4, ... วินาที)"""
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        if handle(job, attempt):
+            return
+        time.sleep(0.2 * 2 ** (attempt - 1))
@@ -0,0 +1,349 @@
+import os
+import re
+import uuid
+import base64
+import hashlib
+import datetime
+
+from . import item_model
+from .clients import S3_BUCKET_NAME
+
+# อัปโหลดรูปตรงจาก browser ไป S3 ด้วย presigned POST/PUT แทนการส่ง base64 ผ่าน Lambda
+# key ใช้โครงสร้างเดิม: <folder>/<YYYY-MM-DD>/<uuid>.<ext>
+#
+# รูปที่รู้ SHA-256 ของไฟล์ (ส่งมาเป็น base64 หรือ browser คำนวณให้) เก็บแบบ content-addressed:
+# <folder>/sha256/<hex>.<ext> — ไฟล์เดียวกันที่ส่งซ้ำ (retry, กดส่งสองครั้ง) จึงเก็บใน S3 ครั้งเดียว
+# S3 ตรวจ checksum ตอนอัปโหลด และ item ที่ใช้รูปเดียวกันนับไว้ใน IMAGE#<key> (ลบรูปเมื่อไม่มีใครใช้แล้ว)
+#
+# รูปย่อสร้างแบบ async (image_resize_function, S3 trigger) — item บันทึก thumbnail_url/medium_url
+# เมื่อรูปย่อมีใน S3 แล้วเท่านั้น โดยนัดกันที่ row
+#
+#   VARIANTS#<key>   ready (สร้างรูปย่อเสร็จแล้ว), waiting (set ของ '<item_id>|<item_type>' ที่รอ URL)
+#
+# - handler เขียน item ก่อน แล้ว attach_variants: ถ้า ready แล้วบันทึก URL เอง ไม่งั้นเพิ่มตัวเองใน waiting
+# - image_resize_function สร้างรูปย่อเสร็จแล้ว variants_ready: ตั้ง ready แล้วบันทึก URL ให้ทุก item ใน waiting
+# ทั้งสองฝั่งเขียน row เดียวกันแบบ atomic จึงมีฝั่งใดฝั่งหนึ่งบันทึก URL เสมอ
+
+MAX_IMAGE_BYTES = int(os.environ.get('MAX_IMAGE_BYTES', str(10 * 1024 * 1024)))
+UPLOAD_URL_EXPIRES = int(os.environ.get('UPLOAD_URL_EXPIRES', '900'))
+
+# รูปย่อที่ image_resize_function สร้างจากรูปต้นฉบับ: ชื่อ variant -> ขนาดด้านยาวสุด (px)
+IMAGE_VARIANTS = {'thumbnail': 320, 'medium': 960}
+VARIANT_FORMAT = os.environ.get('IMAGE_VARIANT_FORMAT', 'webp')
+VARIANT_PREFIX = 'variants/'
+
+UPLOAD_FOLDERS = ('found', 'lost')
+ALLOWED_CONTENT_TYPES = {
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+}
+
+_KEY_PATTERN = re.compile(r'^(found|lost)/\d{4}-\d{2}-\d{2}/[A-Za-z0-9_\-]+\.[a-z]+$')
+_CONTENT_KEY_PATTERN = re.compile(r'^(found|lost)/sha256/([0-9a-f]{64})\.[a-z]+$')
+_DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+IMAGE_REF_PREFIX = 'IMAGE#'
+_URL_PATTERN = re.compile(r'amazonaws\.com/(.+)$')
+
+
+class UploadError(ValueError):
+    pass
+
+
+def image_url_for(key):
+    return f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/{key}"
+
+
+def key_from_url(image_url):
+    """คืน S3 key ของรูปใน bucket ของระบบ หรือ None ถ้าเป็น URL อื่น"""
+    if not image_url or not image_url.startswith(f"https://{S3_BUCKET_NAME}."):
+        return None
+    match = _URL_PATTERN.search(image_url)
+    return match.group(1) if match else None
+
+
+def variant_key(key, variant):
+    ext = 'jpg' if VARIANT_FORMAT == 'jpeg' else VARIANT_FORMAT
+    return f"{VARIANT_PREFIX}{key.rsplit('.', 1)[0]}_{variant}.{ext}"
+
+
+def variant_keys(key):
+    return [variant_key(key, variant) for variant in IMAGE_VARIANTS]
+
+
+def variant_urls(image_url):
+    """URL ของรูปย่อทุกขนาดของ image_url (บันทึกลง item หลังรูปย่อถูกสร้างแล้วเท่านั้น ดู attach_variants)"""
+    key = key_from_url(image_url)
+    if not key or key.startswith(VARIANT_PREFIX):
+        return {}
+    return {f'{variant}_url': image_url_for(variant_key(key, variant)) for variant in IMAGE_VARIANTS}
+
+
+def new_image_key(folder, content_type):
+    if folder not in UPLOAD_FOLDERS:
+        raise UploadError(f'Invalid folder: {folder}')
+    ext = ALLOWED_CONTENT_TYPES.get(content_type)
+    if not ext:
+        raise UploadError(f'Unsupported content_type: {content_type}')
+    date_str = datetime.datetime.now().strftime('%Y-%m-%d')
+    return f"{folder}/{date_str}/{uuid.uuid4()}.{ext}"
+
+
+def content_key(folder, digest, content_type):
+    """key แบบ content-addressed ของไฟล์ที่มี SHA-256 (hex) = digest"""
+    if folder not in UPLOAD_FOLDERS:
+        raise UploadError(f'Invalid folder: {folder}')
+    ext = ALLOWED_CONTENT_TYPES.get(content_type)
+    if not ext:
+        raise UploadError(f'Unsupported content_type: {content_type}')
+    if not _DIGEST_PATTERN.match(str(digest)):
+        raise UploadError(f'Invalid content_sha256: {digest}')
+    return f"{folder}/sha256/{digest}.{ext}"
+
+
+def is_content_key(key):
+    return bool(key and _CONTENT_KEY_PATTERN.match(key))
+
+
+def checksum_of(digest):
+    """SHA-256 แบบ base64 ตามที่ S3 ใช้ใน ChecksumSHA256 / x-amz-checksum-sha256"""
+    return base64.b64encode(bytes.fromhex(digest)).decode()
+
+
+def object_exists(s3, key):
+    try:
+        s3.head_object(Bucket=S3_BUCKET_NAME, Key=key)
+        return True
+    except Exception:
+        return False
+
+
+def store_content(s3, folder, data, content_type):
+    """เก็บรูปจาก bytes แบบ content-addressed คืน key (ถ้ามีไฟล์เดียวกันอยู่แล้วไม่อัปโหลดซ้ำ)"""
+    if not data:
+        raise UploadError('Empty image')
+    if len(data) > MAX_IMAGE_BYTES:
+        raise UploadError(f'Image too large (max {MAX_IMAGE_BYTES} bytes)')
+    digest = hashlib.sha256(data).hexdigest()
+    key = content_key(folder, digest, content_type)
+    if object_exists(s3, key):
+        print(f"[INFO] Duplicate image, reusing {key}")
+        return key
+    s3.put_object(
+        Bucket=S3_BUCKET_NAME,
+        Key=key,
+        Body=data,
+        ContentType=content_type,
+        ChecksumSHA256=checksum_of(digest)
+    )
+    return key
+
+
+def create_upload(s3, folder, content_type, content_length=None, method='POST', content_sha256=None):
+    """สร้าง presigned URL สำหรับอัปโหลดรูป 1 รูป
+
+    POST บังคับขนาดไฟล์และ Content-Type ที่ฝั่ง S3 ได้เลย
+    PUT บังคับได้แค่ Content-Type ส่วนขนาดจะตรวจตอน verify_upload
+
+    ถ้าส่ง content_sha256 มา จะใช้ key แบบ content-addressed และ PUT ที่ S3 ตรวจ checksum ให้
+    ถ้ามีไฟล์นี้อยู่แล้วคืน exists=True โดยไม่มี upload_url (ไม่ต้องอัปโหลดซ้ำ)
+    """
+    if content_length is not None:
+        if isinstance(content_length, bool) or not re.match(r'^\d+$', str(content_length).strip()):
+            raise UploadError(f'Invalid content_length: {content_length}')
+        content_length = int(content_length)
+        if content_length <= 0:
+            raise UploadError(f'Invalid content_length: {content_length}')
+        if content_length > MAX_IMAGE_BYTES:
+            raise UploadError(f'Image too large (max {MAX_IMAGE_BYTES} bytes)')
+    if content_sha256:
+        digest = str(content_sha256).lower()
+        key = content_key(folder, digest, content_type)
+        if object_exists(s3, key):
+            return {'image_key': key, 'image_url': image_url_for(key), 'exists': True}
+        method = 'PUT'
+    else:
+        key = new_image_key(folder, content_type)
+    result = {
+        'image_key': key,
+        'image_url': image_url_for(key),
+        'expires_in': UPLOAD_URL_EXPIRES,
+        'max_bytes': MAX_IMAGE_BYTES,
+    }
+    if method == 'PUT':
+        params = {'Bucket': S3_BUCKET_NAME, 'Key': key, 'ContentType': content_type}
+        result['headers'] = {'Content-Type': content_type}
+        if content_sha256:
+            params['ChecksumSHA256'] = result['headers']['x-amz-checksum-sha256'] = checksum_of(digest)
+        result['method'] = 'PUT'
+        result['upload_url'] = s3.generate_presigned_url(
+            'put_object',
+            Params=params,
+            ExpiresIn=UPLOAD_URL_EXPIRES
+        )
+    elif method == 'POST':
+        post = s3.generate_presigned_post(
+            Bucket=S3_BUCKET_NAME,
+            Key=key,
+            Fields={'Content-Type': content_type},
+            Conditions=[
+                {'Content-Type': content_type},
+                ['content-length-range', 1, MAX_IMAGE_BYTES],
+            ],
+            ExpiresIn=UPLOAD_URL_EXPIRES
+        )
+        result['method'] = 'POST'
+        result['upload_url'] = post['url']
+        result['fields'] = post['fields']
+    else:
+        raise UploadError(f'Invalid method: {method}')
+    return result
+
+
+def verify_upload(s3, key):
+    """ตรวจว่าไฟล์ถูกอัปโหลดจริงและอยู่ในขอบเขตที่อนุญาต แล้วคืน image_url
+
+    ไฟล์ที่ขนาด/ชนิดไม่ถูกต้องจะถูกลบทิ้ง
+    """
+    if not key or not (_KEY_PATTERN.match(key) or is_content_key(key)):
+        raise UploadError(f'Invalid image_key: {key}')
+    try:
+        head = s3.head_object(Bucket=S3_BUCKET_NAME, Key=key, ChecksumMode='ENABLED')
+    except Exception:
+        raise UploadError(f'Image not uploaded: {key}')
+    size = head.get('ContentLength', 0)
+    content_type = head.get('ContentType', '')
+    if size <= 0 or size > MAX_IMAGE_BYTES or content_type not in ALLOWED_CONTENT_TYPES:
+        s3.delete_object(Bucket=S3_BUCKET_NAME, Key=key)
+        raise UploadError(f'Rejected upload: {content_type}, {size} bytes')
+    if is_content_key(key):
+        # ไฟล์ใน key แบบ content-addressed ต้องมี checksum ตรงกับชื่อ (S3 ตรวจตอนอัปโหลดแล้ว)
+        digest = _CONTENT_KEY_PATTERN.match(key).group(2)
+        if head.get('ChecksumSHA256') != checksum_of(digest):
+            s3.delete_object(Bucket=S3_BUCKET_NAME, Key=key)
+            raise UploadError(f'Rejected upload: checksum mismatch for {key}')
+    return image_url_for(key)
+
+
+def _variants_key(key):
+    return {'item_id': f'VARIANTS#{key}', 'item_type': 'META'}
+
+
+def set_variant_urls(table, item_key, image_url):
+    """บันทึก URL ของรูปย่อลง item (พร้อม updated_at) คืน False ถ้า item ถูกลบไปแล้ว"""
+    params = item_model.update_params(variant_urls(image_url), allowed=item_model.IMAGE_FIELDS)
+    try:
+        table.update_item(Key=item_key, ConditionExpression='attribute_exists(item_id)', **params)
+        return True
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        return False
+
+
+def attach_variants(table, item_key, image_url):
+    """เรียกหลังเขียน item ที่มีรูป: บันทึก URL รูปย่อทันทีถ้าสร้างเสร็จแล้ว ไม่งั้นรอ image_resize_function
+
+    คืน True ถ้าบันทึก URL แล้ว
+    """
+    key = key_from_url(image_url)
+    if not key or key.startswith(VARIANT_PREFIX):
+        return False
+    try:
+        table.update_item(
+            Key=_variants_key(key),
+            UpdateExpression='ADD #waiting :item',
+            ConditionExpression='attribute_not_exists(#ready)',
+            ExpressionAttributeNames={'#waiting': 'waiting', '#ready': 'ready'},
+            ExpressionAttributeValues={':item': {f"{item_key['item_id']}|{item_key['item_type']}"}}
+        )
+        return False
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        return set_variant_urls(table, item_key, image_url)
+
+
+def has_variants(table, key):
+    """รูปย่อของ key สร้างเสร็จแล้วหรือยัง (ใช้ข้ามงานซ้ำของ image_resize_function)"""
+    row = table.get_item(Key=_variants_key(key), ProjectionExpression='#ready',
+                         ExpressionAttributeNames={'#ready': 'ready'}).get('Item')
+    return bool(row and row.get('ready'))
+
+
+def variants_ready(table, key):
+    """รูปย่อของ key สร้างเสร็จแล้ว: บันทึก URL ให้ทุก item ที่รออยู่ คืนจำนวน item ที่บันทึก"""
+    result = table.update_item(
+        Key=_variants_key(key),
+        UpdateExpression='SET #ready = :ready',
+        ExpressionAttributeNames={'#ready': 'ready'},
+        ExpressionAttributeValues={':ready': True},
+        ReturnValues='ALL_NEW'
+    )
+    image_url = image_url_for(key)
+    updated = 0
+    for entry in result['Attributes'].get('waiting', ()):
+        item_id, item_type = entry.rsplit('|', 1)
+        if set_variant_urls(table, {'item_id': item_id, 'item_type': item_type}, image_url):
+            updated += 1
+    return updated
+
+
+def _ref_key(key):
+    return {'item_id': f'{IMAGE_REF_PREFIX}{key}', 'item_type': 'META'}
+
+
+def retain(table, key, item_id=None):
+    """นับว่ามี item ใช้รูป content-addressed นี้เพิ่ม 1 รายการ (รูปแบบเดิมไม่ต้องนับ)
+
+    ส่ง item_id มาเพื่อให้นับได้ครั้งเดียวต่อ item (เก็บไว้ใน holders) สำหรับงานที่ถูกทำซ้ำ
+    เช่น worker ที่ retry หรือ SQS ส่งงานซ้ำ คืน False ถ้า item นี้ถูกนับไว้แล้ว
+    """
+    if not is_content_key(key):
+        return True
+    params = {
+        'Key': _ref_key(key),
+        'UpdateExpression': 'ADD #refs :one',
+        'ExpressionAttributeNames': {'#refs': 'refs'},
+        'ExpressionAttributeValues': {':one': 1},
+    }
+    if item_id:
+        params['UpdateExpression'] += ', #holders :holder'
+        params['ConditionExpression'] = 'NOT contains(#holders, :item_id)'
+        params['ExpressionAttributeNames']['#holders'] = 'holders'
+        params['ExpressionAttributeValues'].update({':holder': {item_id}, ':item_id': item_id})
+    try:
+        table.update_item(**params)
+        return True
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        return False
+
+
+def ref_count(table, key):
+    """จำนวน item ที่ใช้รูปนี้อยู่ (รูปแบบเดิมเป็นของ item เดียวเสมอ)"""
+    if not is_content_key(key):
+        return 1
+    row = table.get_item(Key=_ref_key(key), ConsistentRead=True).get('Item')
+    return int(row['refs']) if row else 0
+
+
+def release(table, keys):
+    """ลดตัวนับของรูปที่ item ถูกลบ แล้วคืน key ที่ลบจาก S3 ได้
+
+    รูปแบบเดิม (uuid) ลบได้ทันที ส่วนรูป content-addressed ลบเมื่อไม่มี item ใช้แล้วเท่านั้น
+    """
+    removable = []
+    for key in keys:
+        if not is_content_key(key):
+            removable.append(key)
+            continue
+        result = table.update_item(
+            Key=_ref_key(key),
+            UpdateExpression='ADD #refs :minus_one',
+            ExpressionAttributeNames={'#refs': 'refs'},
+            ExpressionAttributeValues={':minus_one': -1},
+            ReturnValues='UPDATED_NEW'
+        )
+        if result['Attributes']['refs'] <= 0:
+            table.delete_item(Key=_ref_key(key))
+            removable.append(key)
+    for key in removable:
+        table.delete_item(Key=_variants_key(key))
+    return removable
@@ -0,0 +1,71 @@
+import re
+import datetime
+import secrets
+
+# item_id รูปแบบใหม่มี item_type (sort key) ต่อท้าย: ITEM#<epoch>-<hex>#FOUND
+# ทำให้ประกอบ Key ของ DynamoDB ได้จาก item_id อย่างเดียว ไม่ต้อง query หา item_type ก่อน
+# item_id แบบเก่า (ITEM#<epoch>-<hex>) ยังใช้ได้ แต่ต้อง query หาเหมือนเดิม
+# จนกว่าจะรัน migrate_item_ids.py
+#
+# case_id (F123456 / L123456) สุ่มได้แค่ 900,000 ค่าต่อประเภท จึงจองก่อนใช้ด้วย alias row
+# CASE#<case_id> (put แบบมีเงื่อนไข) ถ้าชนกับที่มีอยู่แล้วจะสุ่มใหม่ — row นี้ชี้กลับไปยัง item_id ด้วย
+#
+# ค้นหาด้วย case_id ผ่าน GSI3 (gsi3_pk = CASE#F / CASE#L, gsi3_sk = case_id) ได้ทั้งแบบตรงตัวและขึ้นต้นด้วย
+# item เก่าที่ยังไม่มี gsi3_* ให้รัน backfill_case_index.py
+
+ITEM_TYPES = ('FOUND', 'LOST')
+CASE_PREFIXES = {'FOUND': 'F', 'LOST': 'L'}
+CASE_ID_ATTEMPTS = 5
+CASE_INDEX = 'GSI3'
+CASE_ID_PATTERN = re.compile(r'^[FL]\d{6}$')
+CASE_PREFIX_PATTERN = re.compile(r'^[FL]\d{0,5}$')
+
+
+class CaseIdExhausted(Exception):
+    pass
+
+
+def new_item_id(item_type):
+    return f"ITEM#{int(datetime.datetime.now().timestamp())}-{secrets.token_hex(4)}#{item_type}"
+
+
+def case_key(case_id):
+    return {'item_id': f'CASE#{case_id}', 'item_type': 'META'}
+
+
+def case_index_keys(case_id):
+    """attribute ของ GSI3 สำหรับ item ที่มี case_id นี้"""
+    return {'gsi3_pk': f'CASE#{case_id[0]}', 'gsi3_sk': case_id}
+
+
+def new_case_id(table, item_type, item_id):
+    """สุ่ม case_id ที่ยังไม่มีใครใช้ แล้วจองไว้ให้ item_id"""
+    for _ in range(CASE_ID_ATTEMPTS):
+        case_id = f"{CASE_PREFIXES[item_type]}{secrets.randbelow(900000) + 100000}"
+        try:
+            table.put_item(
+                Item=dict(case_key(case_id), target_item_id=item_id, target_item_type=item_type),
+                ConditionExpression='attribute_not_exists(item_id)'
+            )
+            return case_id
+        except table.meta.client.exceptions.ConditionalCheckFailedException:
+            print(f"[WARN] case_id collision: {case_id}")
+    raise CaseIdExhausted(f'No free case_id after {CASE_ID_ATTEMPTS} attempts')
+
+
+def release_case_id(table, case_id):
+    """คืน case_id ที่จองไว้แต่ไม่ได้ใช้"""
+    table.delete_item(Key=case_key(case_id))
+
+
+def item_type_from_id(item_id):
+    """คืน item_type ที่อยู่ใน item_id หรือ None ถ้าเป็น item_id แบบเก่า"""
+    item_type = str(item_id).rsplit('#', 1)[-1]
+    return item_type if item_type in ITEM_TYPES else None
+
+
+def key_for(item_id):
+    item_type = item_type_from_id(item_id)
+    if item_type is None:
+        return None
+    return {'item_id': item_id, 'item_type': item_type}
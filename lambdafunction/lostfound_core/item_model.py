@@ -0,0 +1,160 @@
+import re
+import datetime
+
+from . import item_keys
+
+# โครงสร้างของ item FOUND/LOST และทางเขียนเดียวของทุก handler
+#
+#   new_item()       สร้าง ItemRecord จากฟอร์มแจ้ง (ชื่อ field ของแต่ละฟอร์มอยู่ใน FORM_FIELDS)
+#   ItemRecord       __slots__ ตาม FIELDS, to_item() ได้ dict สำหรับ put_item พร้อม key ของ GSI1-3
+#   update_params()  UpdateExpression ของการแก้ไข: รับเฉพาะ field ที่อนุญาต ตรวจค่า ตั้ง updated_at
+#                    และคำนวณ key ของ GSI ที่ขึ้นกับ field ที่แก้ใหม่ทุกครั้ง (status -> gsi1_pk, category -> gsi2_pk)
+#
+# item_id/item_type/case_id/created_at และ gsi* แก้ผ่าน update_params ไม่ได้
+# (migrate_item_ids.py / backfill_case_index.py เขียนเองเพราะย้ายทั้ง item หรือเติม index ให้ข้อมูลเก่า)
+
+STATUSES = ('แจ้งแล้ว', 'รอรับคืน', 'คืนเจ้าของแล้ว', 'หมดอายุ')
+INITIAL_STATUS = 'รอรับคืน'
+
+# field ที่ผู้แจ้งกรอก
+FORM = ('category', 'brand', 'details', 'location', 'date', 'time',
+        'reporter_name', 'reporter_contact', 'reporter_student_id')
+REQUIRED = ('category', 'location', 'date', 'reporter_name', 'reporter_contact')
+# field ที่ admin แก้ได้ด้วย action update
+EDITABLE = FORM + ('status',)
+# field ของรูป (ตั้งโดย handler/worker ของรูปเท่านั้น)
+IMAGE_FIELDS = ('image_url', 'thumbnail_url', 'medium_url', 'image_key', 'image_status', 'image_error')
+FIELDS = ('item_id', 'item_type', 'case_id', 'status', 'created_at', 'updated_at') + FORM + IMAGE_FIELDS
+
+# key ของ GSI ที่คำนวณจาก field (sort key ของ GSI1/GSI2 คือ created_at ซึ่งไม่เปลี่ยน)
+DERIVED_KEYS = {'status': ('gsi1_pk', 'STATUS#'), 'category': ('gsi2_pk', 'CATEGORY#')}
+
+MAX_TEXT_LENGTH = 2000
+PATTERNS = {
+    'date': re.compile(r'^\d{4}-\d{2}-\d{2}$'),
+    'time': re.compile(r'^\d{2}:\d{2}(:\d{2})?$'),
+}
+
+# ชื่อ field ในฟอร์มของแต่ละประเภท (รับชื่อ field ตรงตัวด้วย)
+FORM_FIELDS = {
+    'FOUND': {'brand': 'brandName', 'location': 'foundLocation', 'date': 'foundDate', 'time': 'foundTime',
+              'reporter_name': 'reporterName', 'reporter_contact': 'reporterContact',
+              'reporter_student_id': 'reporterStudentId'},
+    'LOST': {'category': 'itemDescription', 'brand': 'brandOrId', 'details': 'distinguishingFeatures',
+             'location': 'lostLocation', 'date': 'lostDate', 'time': 'lostTime',
+             'reporter_name': 'reporterName', 'reporter_contact': 'reporterContact',
+             'reporter_student_id': 'reporterStudentId'},
+}
+
+# placeholder ของ UpdateExpression ต่อ field (field ทั้งหมดเป็นชื่อที่รู้ล่วงหน้า ไม่ต้องสร้างใหม่ทุกครั้ง)
+_ASSIGNMENTS = {field: f'#{field} = :{field}' for field in FIELDS + tuple(k for k, _ in DERIVED_KEYS.values())}
+
+
+class InvalidItem(ValueError):
+    pass
+
+
+def clean(field, value):
+    """ตรวจค่าของ field ที่มาจากผู้ใช้ คืนค่าที่จะเขียน"""
+    if field == 'status':
+        if value not in STATUSES:
+            raise InvalidItem(f'Invalid status: {value}')
+        return value
+    if field in IMAGE_FIELDS:
+        return value
+    if value is None:
+        value = ''
+    if not isinstance(value, str):
+        raise InvalidItem(f'Invalid {field}: must be text')
+    if len(value) > MAX_TEXT_LENGTH:
+        raise InvalidItem(f'Invalid {field}: too long (max {MAX_TEXT_LENGTH})')
+    if not value:
+        if field in REQUIRED:
+            raise InvalidItem(f'Missing required: {field}')
+        return value
+    pattern = PATTERNS.get(field)
+    if pattern and not pattern.match(value):
+        raise InvalidItem(f'Invalid {field}: {value}')
+    return value
+
+
+class ItemRecord:
+    """item FOUND/LOST 1 รายการ (field ที่ไม่มีเป็น None และไม่ถูกเขียน)"""
+    __slots__ = FIELDS
+
+    def __init__(self, **values):
+        for field in FIELDS:
+            setattr(self, field, None)
+        self.update(**values)
+
+    def update(self, **values):
+        for field, value in values.items():
+            if field not in FIELDS:
+                raise InvalidItem(f'Unknown field: {field}')
+            setattr(self, field, value)
+
+    def index_keys(self):
+        keys = {key: prefix + getattr(self, field) for field, (key, prefix) in DERIVED_KEYS.items()}
+        keys['gsi1_sk'] = keys['gsi2_sk'] = self.created_at
+        keys.update(item_keys.case_index_keys(self.case_id))
+        return keys
+
+    def to_item(self):
+        item = {field: getattr(self, field) for field in FIELDS if getattr(self, field) is not None}
+        item.update(self.index_keys())
+        return item
+
+
+def form_values(item_type, body):
+    """อ่านและตรวจ field ของฟอร์มแจ้ง (ชื่อตาม FORM_FIELDS ของ item_type)"""
+    aliases = FORM_FIELDS[item_type]
+    values = {}
+    for field in FORM:
+        value = body.get(field)
+        if not value and field in aliases:
+            value = body.get(aliases[field])
+        values[field] = clean(field, value)
+    return values
+
+
+def new_item(submission, values, timestamp=None):
+    """ItemRecord ของการแจ้งใหม่ (item_id/case_id จาก submissions.start)"""
+    timestamp = timestamp or datetime.datetime.utcnow().isoformat()
+    return ItemRecord(
+        item_id=submission.item_id,
+        item_type=submission.item_type,
+        case_id=submission.case_id,
+        status=INITIAL_STATUS,
+        created_at=timestamp,
+        updated_at=timestamp,
+        **values
+    )
+
+
+def update_params(changes, timestamp=None, allowed=EDITABLE, remove=()):
+    """UpdateExpression, ExpressionAttributeNames/Values สำหรับ update_item หรือ Update ของ transaction
+
+    ตรวจทุก field ใน changes (ต้องอยู่ใน allowed) แล้วตั้ง updated_at และ key ของ GSI ที่ขึ้นกับ field ที่แก้
+    """
+    values = {}
+    for field, value in changes.items():
+        if field not in allowed:
+            raise InvalidItem(f'Field not editable: {field}')
+        values[field] = clean(field, value)
+    for field in remove:
+        if field not in allowed:
+            raise InvalidItem(f'Field not editable: {field}')
+    values['updated_at'] = timestamp or datetime.datetime.utcnow().isoformat()
+    for field, (key, prefix) in DERIVED_KEYS.items():
+        if field in values:
+            values[key] = prefix + values[field]
+    expression = 'SET ' + ', '.join(_ASSIGNMENTS[field] for field in values)
+    names = {f'#{field}': field for field in values}
+    if remove:
+        expression += ' REMOVE ' + ', '.join(f'#{field}' for field in remove)
+        names.update({f'#{field}': field for field in remove})
+    return {
+        'UpdateExpression': expression,
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': {f':{field}': value for field, value in values.items()},
+    }
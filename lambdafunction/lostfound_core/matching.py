@@ -0,0 +1,238 @@
+import os
+import json
+import datetime
+from decimal import Decimal
+from boto3.dynamodb.conditions import Key, Attr
+
+from . import clients
+from .search_index import normalize_text, ngrams
+
+# จับคู่ LOST <-> FOUND อัตโนมัติเมื่อมีการแจ้งใหม่
+#
+# blocking: ดึง item ที่ยังรอรับคืนในช่วงเวลา ±MATCH_WINDOW_DAYS จาก created_at (GSI1 = STATUS#รอรับคืน)
+# แล้วเทียบเฉพาะคู่ที่หมวดหมู่ "เข้ากันได้" (same_block) ไม่ต้องเทียบทุกคู่ทั้งตาราง
+#   หมวดหมู่ของ LOST มาจากช่องข้อความอิสระ (lost.html) ส่วน FOUND เลือกจากรายการ (found.html) หรือพิมพ์เอง
+#   จึงเทียบ category ตรงตัวไม่ได้ — แปลงเป็นกลุ่มด้วยคำใน CATEGORY_GROUPS หรือใช้ trigram ของ category ที่ซ้ำกัน
+# scoring: Jaccard ของ character trigram ในแต่ละ field + ความใกล้ของวันที่
+#
+# GSI1 ไม่มีกลุ่มหมวดหมู่ใน key จึงยังต้องอ่านทั้งช่วงเวลา (อ่านเฉพาะ MATCH_ATTRS)
+# ถ้าตั้ง MATCH_WORKER_FUNCTION handler จะ invoke matching_function แบบ async (submit) ไม่ต้องรอใน request
+#
+# matches ของ item ฝั่งตรงข้ามเขียนแบบมีเงื่อนไข: item ต้องยังอยู่ และ matches ต้องยังเป็นค่าที่อ่านมา
+# ถ้ามีการแจ้งอื่นเขียนแทรก อ่านใหม่แล้ว merge ซ้ำ (ไม่เกิน MATCH_WRITE_RETRIES ครั้ง) ถ้า item ถูกลบไปแล้วข้าม
+
+MATCH_WINDOW_DAYS = int(os.environ.get('MATCH_WINDOW_DAYS', '30'))
+MATCH_TOP_K = int(os.environ.get('MATCH_TOP_K', '5'))
+MATCH_MIN_SCORE = float(os.environ.get('MATCH_MIN_SCORE', '0.2'))
+
+FIELD_WEIGHTS = {'brand': 0.35, 'details': 0.35, 'location': 0.15}
+TIME_WEIGHT = 0.15
+MATCH_WRITE_RETRIES = 3
+MATCH_WORKER_FUNCTION = os.environ.get('MATCH_WORKER_FUNCTION', '')
+OPEN_STATUS = 'รอรับคืน'
+OPPOSITE_TYPE = {'FOUND': 'LOST', 'LOST': 'FOUND'}
+# attribute ที่ต้องใช้ให้คะแนนและเขียน match (ไม่อ่านข้อมูลผู้แจ้งและ field อื่น)
+MATCH_ATTRS = ('item_id', 'item_type', 'case_id', 'category', 'brand', 'details', 'location',
+               'date', 'created_at', 'matches')
+
+# กลุ่มหมวดหมู่ -> คำที่บอกกลุ่ม (normalize แล้ว) ตรวจตามลำดับ กลุ่มแรกที่มีคำอยู่ใน category ชนะ
+# ชื่อกลุ่ม 4 อันแรกตรงกับตัวเลือกใน found.html
+CATEGORY_GROUPS = {
+    'อุปกรณ์อิเล็กทรอนิกส์': ('อุปกรณ์อิเล็กทรอนิกส์', 'หูฟัง', 'airpod', 'earphone', 'headphone',
+                             'ที่ชาร์จ', 'สายชาร์จ', 'charger', 'powerbank', 'พาวเวอร์แบงค์', 'แบตสำรอง',
+                             'โน้ตบุ๊ก', 'โน๊ตบุ๊ค', 'laptop', 'notebook', 'macbook', 'แล็ปท็อป', 'คอมพิวเตอร์',
+                             'ipad', 'แท็บเล็ต', 'tablet', 'นาฬิกา', 'watch', 'เมาส์', 'mouse', 'คีย์บอร์ด',
+                             'keyboard', 'แฟลชไดรฟ์', 'flashdrive', 'pendrive', 'usb', 'เครื่องคิดเลข',
+                             'calculator'),
+    'โทรศัพท์': ('โทรศัพท์', 'มือถือ', 'phone', 'สมาร์ทโฟน'),
+    'บัตร': ('บัตร', 'card', 'ใบขับขี่', 'พาสปอร์ต', 'passport'),
+    'เครื่องเขียน': ('เครื่องเขียน', 'ปากกา', 'ดินสอ', 'ยางลบ', 'ไม้บรรทัด', 'สมุด', 'pen', 'stationery'),
+    'กระเป๋า': ('กระเป๋า', 'wallet', 'bag', 'เป้'),
+    'กุญแจ': ('กุญแจ', 'key'),
+    'ขวดน้ำ': ('ขวดน้ำ', 'กระบอกน้ำ', 'แก้วน้ำ', 'bottle', 'tumbler'),
+    'แว่นตา': ('แว่น', 'glasses'),
+    'เสื้อผ้า': ('เสื้อ', 'กางเกง', 'หมวก', 'jacket', 'รองเท้า'),
+    'ร่ม': ('ร่ม', 'umbrella'),
+}
+
+
+def text_grams(text):
+    normalized = normalize_text(text)
+    if len(normalized) < 3:
+        return {normalized} if normalized else set()
+    return ngrams(normalized)
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def category_group(category):
+    """กลุ่มของหมวดหมู่ (ตาม CATEGORY_GROUPS) หรือ None ถ้าไม่เข้ากลุ่มใด"""
+    normalized = normalize_text(category)
+    if not normalized:
+        return None
+    for group, words in CATEGORY_GROUPS.items():
+        if any(word in normalized for word in words):
+            return group
+    return None
+
+
+def event_time(item):
+    """วันที่ที่ของหาย/พบ (date) ถ้าไม่มีใช้เวลาที่แจ้ง"""
+    for value in (item.get('date'), item.get('created_at')):
+        try:
+            return datetime.datetime.fromisoformat(str(value)[:19])
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+class MatchProfile:
+    """ข้อมูลของ item ที่แปลงไว้ล่วงหน้าสำหรับให้คะแนน (trigram ต่อ field และเวลา)"""
+
+    __slots__ = ('item', 'grams', 'time', 'group', 'category_grams')
+
+    def __init__(self, item):
+        self.item = item
+        self.grams = {field: text_grams(item.get(field)) for field in FIELD_WEIGHTS}
+        self.time = event_time(item)
+        self.group = category_group(item.get('category'))
+        self.category_grams = text_grams(item.get('category'))
+
+
+def same_block(profile, other):
+    """หมวดหมู่เข้ากันได้: อยู่กลุ่มเดียวกัน หรือข้อความ category มี trigram ร่วมกัน"""
+    if profile.group and profile.group == other.group:
+        return True
+    return bool(profile.category_grams & other.category_grams)
+
+
+def score(profile, other):
+    total = sum(weight * jaccard(profile.grams[field], other.grams[field])
+                for field, weight in FIELD_WEIGHTS.items())
+    if profile.time and other.time:
+        days = abs((profile.time - other.time).total_seconds()) / 86400
+        total += TIME_WEIGHT * max(0.0, 1 - days / MATCH_WINDOW_DAYS)
+    return total
+
+
+def rank_candidates(item, candidates, top_k=MATCH_TOP_K, min_score=MATCH_MIN_SCORE):
+    """คืนรายการ match ที่ดีที่สุด top_k รายการ [{item_id, item_type, case_id, score}]"""
+    profile = MatchProfile(item)
+    ranked = []
+    for candidate in candidates:
+        if candidate.get('item_type') != OPPOSITE_TYPE.get(item.get('item_type')):
+            continue
+        other = MatchProfile(candidate)
+        if not same_block(profile, other):
+            continue
+        value = score(profile, other)
+        if value >= min_score:
+            ranked.append((value, candidate))
+    ranked.sort(key=lambda pair: pair[0], reverse=True)
+    return [match_entry(candidate, value) for value, candidate in ranked[:top_k]]
+
+
+def match_entry(item, value):
+    return {
+        'item_id': item['item_id'],
+        'item_type': item['item_type'],
+        'case_id': item.get('case_id', ''),
+        'score': Decimal(str(round(value, 4))),
+    }
+
+
+def candidate_items(table, item):
+    """query GSI1 (สถานะรอรับคืน) ในช่วงเวลา ±MATCH_WINDOW_DAYS เฉพาะประเภทตรงข้าม
+
+    ทุกหมวดหมู่ — rank_candidates คัดเฉพาะคู่ที่ same_block อีกชั้น
+    """
+    created = datetime.datetime.fromisoformat(item['created_at'])
+    window = datetime.timedelta(days=MATCH_WINDOW_DAYS)
+    params = {
+        'IndexName': 'GSI1',
+        'KeyConditionExpression': Key('gsi1_pk').eq(f'STATUS#{OPEN_STATUS}') &
+                                  Key('gsi1_sk').between((created - window).isoformat(), (created + window).isoformat()),
+        'FilterExpression': Attr('item_type').eq(OPPOSITE_TYPE[item['item_type']]),
+        'ProjectionExpression': ', '.join(f'#a{i}' for i in range(len(MATCH_ATTRS))),
+        'ExpressionAttributeNames': {f'#a{i}': attr for i, attr in enumerate(MATCH_ATTRS)},
+    }
+    while True:
+        response = table.query(**params)
+        yield from response.get('Items', [])
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        params['ExclusiveStartKey'] = last_key
+
+
+def merge_matches(existing, entry, top_k=MATCH_TOP_K):
+    merged = [m for m in (existing or []) if m.get('item_id') != entry['item_id']] + [entry]
+    merged.sort(key=lambda m: m['score'], reverse=True)
+    return merged[:top_k]
+
+
+def update_matches(table, key, existing, entries):
+    """merge entries เข้า matches ของ key โดยมีเงื่อนไขว่า matches ยังเป็น existing
+
+    ถ้าถูกเขียนแทรกจะอ่านค่าใหม่แล้วลองอีก คืน False ถ้า item ไม่มีแล้วหรือชนครบ MATCH_WRITE_RETRIES ครั้ง
+    """
+    for _ in range(MATCH_WRITE_RETRIES):
+        updated = list(existing or [])
+        for entry in entries:
+            updated = merge_matches(updated, entry)
+        if existing is not None and updated == existing:
+            return True
+        values = {':matches': updated}
+        if existing is None:
+            condition = 'attribute_exists(item_id) AND attribute_not_exists(#matches)'
+        else:
+            condition = 'attribute_exists(item_id) AND #matches = :old'
+            values[':old'] = existing
+        try:
+            table.update_item(
+                Key=key,
+                UpdateExpression='SET #matches = :matches',
+                ConditionExpression=condition,
+                ExpressionAttributeNames={'#matches': 'matches'},
+                ExpressionAttributeValues=values
+            )
+            return True
+        except table.meta.client.exceptions.ConditionalCheckFailedException:
+            row = table.get_item(Key=key, ConsistentRead=True, ProjectionExpression='#matches',
+                                 ExpressionAttributeNames={'#matches': 'matches'}).get('Item')
+            if row is None:
+                print(f"[WARN] Match target deleted: {key['item_id']}")
+                return False
+            existing = row.get('matches')
+    print(f"[WARN] Matches of {key['item_id']} kept changing, skipped")
+    return False
+
+
+def find_matches(table, item):
+    """หา match ของ item ที่เพิ่งบันทึก แล้วเก็บไว้ที่ item และที่ฝั่งตรงข้ามแต่ละรายการ"""
+    candidates = list(candidate_items(table, item))
+    matches = rank_candidates(item, candidates)
+    item_key = {'item_id': item['item_id'], 'item_type': item['item_type']}
+    if not update_matches(table, item_key, item.get('matches'), matches):
+        return []
+    by_id = {c['item_id']: c for c in candidates}
+    for match in matches:
+        counterpart = by_id[match['item_id']]
+        update_matches(table, {'item_id': counterpart['item_id'], 'item_type': counterpart['item_type']},
+                       counterpart.get('matches'), [match_entry(item, float(match['score']))])
+    print(f"[MATCH] {item['item_id']}: {len(matches)} matches from {len(candidates)} candidates")
+    return matches
+
+
+def submit(table, item):
+    """จับคู่ item ที่เพิ่งบันทึก: ส่งให้ matching_function แบบ async ถ้าตั้งไว้ ไม่งั้นทำใน request นี้"""
+    if not MATCH_WORKER_FUNCTION:
+        find_matches(table, item)
+        return
+    key = {'item_id': item['item_id'], 'item_type': item['item_type']}
+    clients.client('lambda').invoke(FunctionName=MATCH_WORKER_FUNCTION, InvocationType='Event',
+                                    Payload=json.dumps({'items': [key]}).encode('utf-8'))
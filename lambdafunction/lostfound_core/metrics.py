@@ -0,0 +1,236 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# เวลาต่อขั้นตอน (span) และตัวนับของแต่ละ request ส่งออกเป็น CloudWatch Embedded Metric Format (EMF)
+# 1 บรรทัด JSON ต่อ request บน stdout — CloudWatch Logs แปลงเป็น metric ให้เอง ไม่ต้องเรียก API
+#
+# - ทุก call ของ client ที่สร้างจาก clients.py เป็น span อัตโนมัติ (เช่น dynamodb.Query, s3.PutObject)
+#   พร้อม ConsumedCapacity (ขอ ReturnConsumedCapacity=TOTAL ให้ทุก operation ที่รองรับ) และจำนวน item ที่อ่าน
+# - ขั้นตอนอื่นครอบด้วย `with metrics.span('ชื่อ'):`
+# - สรุป p50/p95/p99 จาก log ที่เก็บมาด้วย metrics_report.py
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'LostFound')
+
+DIMENSIONS = ['Function', 'Action']
+READ_OPERATIONS = ('GetItem', 'BatchGetItem', 'Query', 'Scan', 'TransactGetItems')
+
+
+def metric_unit(name):
+    if name.endswith('Bytes'):
+        return 'Bytes'
+    if name.endswith('CapacityUnits') or name.startswith('Items') or name.startswith('Aws'):
+        return 'Count'
+    return 'Milliseconds'
+
+
+class Trace:
+    """span และตัวนับของ request เดียว (thread-safe เพราะ scan แบบขนานเรียก AWS จากหลาย thread)"""
+
+    __slots__ = ('function', 'action', 'request_id', 'started', 'spans', 'counters', 'properties', '_lock')
+
+    def __init__(self, function, request_id=None):
+        self.function = function
+        self.action = None
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.spans = {}
+        self.counters = {}
+        self.properties = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, name, ms):
+        with self._lock:
+            total, calls = self.spans.get(name, (0.0, 0))
+            self.spans[name] = (total + ms, calls + 1)
+
+    def count(self, name, value):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def document(self):
+        values = {'Duration': round((time.perf_counter() - self.started) * 1000, 3)}
+        values.update({name: round(total, 3) for name, (total, _) in self.spans.items()})
+        values.update({name: (round(v, 3) if isinstance(v, float) else v) for name, v in self.counters.items()})
+        doc = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': METRICS_NAMESPACE,
+                    'Dimensions': [DIMENSIONS],
+                    'Metrics': [{'Name': name, 'Unit': metric_unit(name)} for name in values],
+                }],
+            },
+            'Function': self.function,
+            'Action': self.action or 'none',
+        }
+        doc.update(values)
+        doc['SpanCalls'] = {name: calls for name, (_, calls) in self.spans.items()}
+        if self.request_id:
+            doc['RequestId'] = self.request_id
+        doc.update(self.properties)
+        return doc
+
+
+# Lambda ทำงานทีละ request ต่อ container จึงเก็บ trace ปัจจุบันไว้ที่ระดับโมดูลได้
+_current = None
+
+
+def start(function, request_id=None):
+    global _current
+    _current = Trace(function, request_id) if METRICS_ENABLED else None
+    return _current
+
+
+def finish(**properties):
+    """พิมพ์ EMF ของ request ปัจจุบันแล้วปิด trace"""
+    global _current
+    trace, _current = _current, None
+    if trace is None:
+        return None
+    trace.properties.update(properties)
+    doc = trace.document()
+    print(json.dumps(doc, ensure_ascii=False, separators=(',', ':'), default=str))
+    return doc
+
+
+def set_action(action):
+    if _current is not None:
+        _current.action = action
+
+
+def set_property(name, value):
+    if _current is not None:
+        _current.properties[name] = value
+
+
+def count(name, value=1):
+    if _current is not None:
+        _current.count(name, value)
+
+
+@contextmanager
+def span(name):
+    trace = _current
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_span(name, (time.perf_counter() - started) * 1000)
+
+
+class Stopwatch:
+    """สะสมเวลาของฟังก์ชันที่ถูกเรียกหลายครั้ง (เช่น predicate ต่อ item) แล้วบันทึกเป็น span เดียว
+
+    เรียกจากหลาย thread ได้ (parallel scan) — เวลาที่ได้เป็นผลรวมของทุก thread ไม่ใช่เวลาจริง
+    """
+
+    __slots__ = ('name', 'counter', 'elapsed', 'calls', '_lock')
+
+    def __init__(self, name, counter=None):
+        self.name = name
+        self.counter = counter
+        self.elapsed = 0.0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def wrap(self, func):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.elapsed += elapsed
+                    self.calls += 1
+        return timed
+
+    def record(self):
+        if _current is not None and self.calls:
+            _current.add_span(self.name, self.elapsed * 1000)
+            if self.counter:
+                _current.count(self.counter, self.calls)
+
+
+def traced(function):
+    """decorator สำหรับ handler ที่ไม่ได้ผ่าน Router (S3 trigger, EventBridge schedule)"""
+    def decorate(handler):
+        def wrapper(event, context):
+            start(function, getattr(context, 'aws_request_id', None))
+            set_action(handler.__name__)
+            try:
+                return handler(event, context)
+            finally:
+                finish()
+        return wrapper
+    return decorate
+
+
+# ---- botocore hooks ----
+
+def instrument(client):
+    """ผูก hook เข้ากับ client (client ของ resource ใช้ resource.meta.client)"""
+    if not METRICS_ENABLED:
+        return client
+    service = client.meta.service_model.service_id.hyphenize()
+    events = client.meta.events
+    if service == 'dynamodb':
+        events.register('before-parameter-build.dynamodb', _request_capacity)
+    events.register(f'before-call.{service}', _before_call)
+    events.register(f'after-call.{service}', _after_call)
+    events.register(f'after-call-error.{service}', _after_call_error)
+    return client
+
+
+def _request_capacity(params, model, **kwargs):
+    if 'ReturnConsumedCapacity' in model.input_shape.members:
+        params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+
+
+def _before_call(model, context, **kwargs):
+    context['metrics_started'] = time.perf_counter()
+
+
+def _call_span(name, context):
+    trace = _current
+    started = context.pop('metrics_started', None)
+    if trace is None or started is None:
+        return None
+    trace.add_span(name, (time.perf_counter() - started) * 1000)
+    trace.count('AwsCalls', 1)
+    return trace
+
+
+def _after_call(http_response, parsed, model, context, **kwargs):
+    trace = _call_span(f"{model.service_model.service_id.hyphenize()}.{model.name}", context)
+    if trace is None:
+        return
+    if 'Error' in parsed:
+        trace.count('AwsErrors', 1)
+        return
+    capacity = parsed.get('ConsumedCapacity')
+    if capacity:
+        units = sum(c.get('CapacityUnits', 0) for c in (capacity if isinstance(capacity, list) else [capacity]))
+        kind = 'ReadCapacityUnits' if model.name in READ_OPERATIONS else 'WriteCapacityUnits'
+        trace.count(kind, float(units))
+    if 'ScannedCount' in parsed:
+        trace.count('ItemsScanned', parsed['ScannedCount'])
+        trace.count('ItemsRead', parsed.get('Count', 0))
+    elif model.name == 'BatchGetItem':
+        trace.count('ItemsRead', sum(len(items) for items in parsed.get('Responses', {}).values()))
+    elif model.name == 'GetItem':
+        trace.count('ItemsRead', 1 if parsed.get('Item') else 0)
+
+
+def _after_call_error(context, event_name, **kwargs):
+    # after-call-error ไม่ส่ง model มา ใช้ชื่อ event (after-call-error.<service>.<operation>) แทน
+    trace = _call_span(event_name.split('.', 1)[1], context)
+    if trace is not None:
+        trace.count('AwsErrors', 1)
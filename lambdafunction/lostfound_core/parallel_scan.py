@@ -0,0 +1,118 @@
+import os
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Scan แบบขนานด้วย Segment/TotalSegments สำหรับคำค้นที่ไม่มี index ใช้ได้ (ต้องอ่านทั้งตาราง)
+#
+# - แต่ละ segment อ่านใน thread ของตัวเอง (ใช้ client ซึ่ง thread-safe ไม่ใช่ Table resource)
+#   และกรองด้วย predicate ทันทีที่ได้แต่ละหน้า
+# - ได้ครบ limit แล้วทุก segment หยุดอ่านทันที
+# - cursor เก็บ ExclusiveStartKey ของทุก segment (None = segment นั้นอ่านครบแล้ว) จึงแบ่งหน้าต่อได้ตรง
+# - จำนวน segment ตามขนาดตาราง: 1 segment ต่อ PAGES_PER_SEGMENT หน้า (หน้าละ ~1 MB)
+
+PAGES_PER_SEGMENT = int(os.environ.get('SCAN_PAGES_PER_SEGMENT', '4'))
+MAX_SEGMENTS = int(os.environ.get('SCAN_MAX_SEGMENTS', '16'))
+DEFAULT_SEGMENTS = int(os.environ.get('SCAN_DEFAULT_SEGMENTS', '4'))
+SCAN_PAGE_BYTES = 1024 * 1024
+KEY_ATTRS = ('item_id', 'item_type')
+
+_segment_counts = {}
+
+
+def segment_count(table):
+    """จำนวน segment ที่เหมาะกับขนาดตาราง (DescribeTable อัปเดตทุก ~6 ชม. จึง cache ไว้ทั้ง container)"""
+    if table.name not in _segment_counts:
+        try:
+            size = table.meta.client.describe_table(TableName=table.name)['Table'].get('TableSizeBytes', 0)
+            pages = math.ceil(size / SCAN_PAGE_BYTES)
+            _segment_counts[table.name] = max(1, min(MAX_SEGMENTS, math.ceil(pages / PAGES_PER_SEGMENT)))
+        except Exception as e:
+            print(f"[WARN] DescribeTable failed, using {DEFAULT_SEGMENTS} scan segments: {e}")
+            _segment_counts[table.name] = DEFAULT_SEGMENTS
+    return _segment_counts[table.name]
+
+
+def new_cursor(segments):
+    """cursor เริ่มต้น: ทุก segment เริ่มจากต้นตาราง"""
+    return {'scan_segments': [{}] * segments}
+
+
+def is_cursor(start_key):
+    segments = start_key.get('scan_segments') if isinstance(start_key, dict) else None
+    return (isinstance(segments, list) and 0 < len(segments) <= MAX_SEGMENTS
+            and all(key is None or isinstance(key, dict) for key in segments))
+
+
+class _Collector:
+    """เก็บผลจากทุก segment และบอกให้หยุดเมื่อครบ limit"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.items = []
+        self.lock = threading.Lock()
+        self.full = threading.Event()
+
+    def offer(self, item):
+        """คืน False ถ้าครบ limit แล้ว (item นี้ยังไม่ถูกนับว่าอ่านแล้ว)"""
+        with self.lock:
+            if self.full.is_set():
+                return False
+            self.items.append(item)
+            if self.limit and len(self.items) >= self.limit:
+                self.full.set()
+            return True
+
+
+def _scan_segment(table, params, segment, total, start_key, predicate, collector):
+    """อ่าน 1 segment จนจบหรือจน collector เต็ม คืน key สำหรับอ่านต่อ (None = อ่านครบแล้ว)"""
+    client = table.meta.client
+    params = dict(params, TableName=table.name, Segment=segment, TotalSegments=total)
+    if start_key:
+        params['ExclusiveStartKey'] = start_key
+    resume_key = start_key or {}
+    while not collector.full.is_set():
+        response = client.scan(**params)
+        for item in response.get('Items', []):
+            if collector.full.is_set():
+                return resume_key
+            if predicate is None or predicate(item):
+                if not collector.offer(item):
+                    return resume_key
+            resume_key = {attr: item[attr] for attr in KEY_ATTRS}
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return None
+        params['ExclusiveStartKey'] = resume_key = last_key
+    return resume_key
+
+
+def scan(table, params=None, predicate=None, limit=None, cursor=None, segments=None):
+    """Scan ทั้งตารางแบบขนาน กรองด้วย predicate และหยุดเมื่อได้ครบ limit
+
+    cursor มาจากผลครั้งก่อน (หรือ None = เริ่มใหม่) คืน (items, cursor ถัดไป หรือ None ถ้าอ่านครบตาราง)
+    ลำดับของ item ไม่แน่นอน (มาจากหลาย segment พร้อมกัน)
+    """
+    if cursor is None:
+        cursor = new_cursor(segments or segment_count(table))
+    starts = cursor['scan_segments']
+    total = len(starts)
+    collector = _Collector(limit)
+    pending = [segment for segment, start in enumerate(starts) if start is not None]
+    if not pending:
+        return [], None
+    if len(pending) == 1:
+        # segment เดียวไม่ต้องใช้ thread
+        keys = [_scan_segment(table, params or {}, pending[0], total, starts[pending[0]], predicate, collector)]
+    else:
+        with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+            keys = list(pool.map(
+                lambda segment: _scan_segment(table, params or {}, segment, total, starts[segment],
+                                              predicate, collector),
+                pending))
+    next_starts = list(starts)
+    for segment, key in zip(pending, keys):
+        next_starts[segment] = key
+    if all(start is None for start in next_starts):
+        return collector.items, None
+    return collector.items, {'scan_segments': next_starts}
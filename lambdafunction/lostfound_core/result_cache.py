@@ -0,0 +1,73 @@
+import os
+import time
+from collections import OrderedDict
+
+# Cache ผลค้นหาภายใน container ของ Lambda (อยู่ได้ข้าม request ตอน warm)
+# ทุก key ผูกกับ generation counter ในตารางหลัก ซึ่งทุก handler ที่เขียนข้อมูลต้องเพิ่มค่า
+# ดังนั้นหลังแก้ไขข้อมูล cache เก่าจะไม่ถูกใช้อีกทันที ไม่ต้องรอ TTL
+
+CACHE_TTL_SECONDS = float(os.environ.get('SEARCH_CACHE_TTL_SECONDS', '60'))
+CACHE_MAX_ENTRIES = int(os.environ.get('SEARCH_CACHE_MAX_ENTRIES', '128'))
+
+GENERATION_KEY = {'item_id': 'META#GENERATION', 'item_type': 'META'}
+
+
+class TTLCache:
+    """LRU cache ขนาดจำกัดที่แต่ละ entry หมดอายุหลัง ttl วินาที"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def generation_state(table):
+    """(generation ล่าสุด, updated_at ของการเขียนที่ bump ล่าสุดส่งมา หรือ None) — ConsistentRead"""
+    item = table.get_item(Key=GENERATION_KEY, ConsistentRead=True).get('Item', {})
+    return int(item.get('generation', 0)), item.get('updated_at')
+
+
+def current_generation(table):
+    """อ่าน generation ล่าสุด (ConsistentRead เพื่อไม่ให้เห็นค่าเก่าหลังการเขียน)"""
+    return generation_state(table)[0]
+
+
+def bump_generation(table, updated_at=None):
+    """เรียกหลังทุกการเขียนที่มีผลต่อผลค้นหา
+
+    updated_at คือค่า updated_at ที่การเขียนนั้นตั้งให้ item (หรือ tombstone) — snapshot ใช้ตัดสินว่า
+    GSI4 ซึ่ง eventually consistent เห็นการเขียนนี้แล้วหรือยัง
+    """
+    params = {
+        'UpdateExpression': 'ADD #generation :one',
+        'ExpressionAttributeNames': {'#generation': 'generation'},
+        'ExpressionAttributeValues': {':one': 1},
+    }
+    if updated_at:
+        params['UpdateExpression'] += ' SET #updated_at = :updated_at'
+        params['ExpressionAttributeNames']['#updated_at'] = 'updated_at'
+        params['ExpressionAttributeValues'][':updated_at'] = updated_at
+    table.update_item(Key=GENERATION_KEY, **params)
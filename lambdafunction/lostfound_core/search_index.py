@@ -0,0 +1,206 @@
+import os
+import json
+import time
+from boto3.dynamodb.conditions import Key
+
+from . import clients
+
+# Inverted character n-gram index สำหรับการค้นหาแบบ contains_flexible
+# ใช้ n-gram ระดับตัวอักษรแทนการตัดคำ เพราะภาษาไทยไม่มีช่องว่างคั่นคำ
+#
+# ตาราง index: gram (HASH) + item_id (RANGE), เก็บ item_type ไว้เพื่อประกอบ Key ของตารางหลัก
+#   gram = '<group>#<n-gram>' เช่น 'keyword#กระ', 'location#sc3'
+#
+# ติดตั้งครั้งแรก (หรือซ่อม index): สร้างตาราง index แล้วรัน backfill จากโฟลเดอร์ lambdafunction
+#   python -m lostfound_core.search_index
+# rebuild() เขียน BUILT_KEY ตอนจบ — search-items-function ใช้ index เฉพาะเมื่อมี row นี้
+# (index ที่ว่างหรือสร้างไม่เสร็จจะไม่มี candidate เลย ทุกคำค้นจะได้ 0 รายการ) ถ้าไม่มีจะ scan แทน
+# item ที่เขียนหลังจากนั้นถูก index โดย handler ที่เขียนผ่าน submit() — ถ้าตั้ง SEARCH_INDEX_WORKER_FUNCTION
+# จะ invoke search_index_function แบบ async (InvocationType=Event) ไม่ต้องรอ batch write ใน request
+# ไม่ได้ตั้งจะ index ใน request เดิม (ใช้ได้เพราะจำนวน gram ต่อ item ถูกจำกัดด้วย MAX_INDEXED_CHARS)
+#
+# field ที่ยาวเกิน MAX_INDEXED_CHARS index แค่ส่วนต้น และเขียน posting '<group>#*' ไว้ด้วย
+# lookup() รวม posting นี้เป็น candidate ทุกครั้ง (ตรวจซ้ำด้วย contains_flexible อยู่แล้ว) ผลจึงเท่ากับการ scan
+# เปลี่ยน FIELD_GROUPS หรือ MAX_INDEXED_CHARS แล้วต้อง rebuild ใหม่
+
+SEARCH_INDEX_TABLE_NAME = os.environ.get('SEARCH_INDEX_TABLE_NAME', 'Items_TU_SearchIndex')
+NGRAM_SIZE = 3
+MAX_QUERY_GRAMS = 6
+# row บอกว่า rebuild() ทำจนจบแล้ว (group META ไม่ชนกับ gram ของ FIELD_GROUPS)
+BUILT_KEY = {'gram': 'META#BUILT', 'item_id': 'META'}
+# item ที่ details ยาวมากเคยสร้าง posting หลายพันแถว ตัดไว้ที่ความยาวนี้ (หลัง normalize_text)
+MAX_INDEXED_CHARS = int(os.environ.get('SEARCH_INDEX_MAX_CHARS', '120'))
+OVERFLOW_GRAM = '*'
+SEARCH_INDEX_WORKER_FUNCTION = os.environ.get('SEARCH_INDEX_WORKER_FUNCTION', '')
+# container ที่ยังไม่เห็น BUILT_KEY ตรวจซ้ำทุก BUILT_RECHECK_SECONDS (เห็นแล้วไม่ต้องตรวจอีก)
+BUILT_RECHECK_SECONDS = float(os.environ.get('SEARCH_INDEX_RECHECK_SECONDS', '300'))
+
+# กลุ่ม field ตรงกับเงื่อนไขค้นหาใน search-items-function
+# details อยู่ใน keyword อยู่แล้ว จึงไม่ index ซ้ำเป็นกลุ่มแยก — lookup('details', ...) ใช้ posting ของ keyword
+# (ได้ candidate มากขึ้นเล็กน้อย แต่เขียน index น้อยลงครึ่งหนึ่ง)
+FIELD_GROUPS = {
+    'keyword': ('category', 'brand', 'details', 'case_id'),
+    'location': ('location',),
+}
+LOOKUP_GROUPS = {'details': 'keyword'}
+INDEXED_FIELDS = ('item_id', 'item_type') + tuple(f for fields in FIELD_GROUPS.values() for f in fields)
+
+
+def get_index_table():
+    return clients.table(SEARCH_INDEX_TABLE_NAME)
+
+
+_built = False
+_built_checked_at = None
+
+
+def is_built(index_table=None):
+    """index สร้างครบแล้วหรือยัง (มี BUILT_KEY)"""
+    global _built, _built_checked_at
+    if _built:
+        return True
+    if _built_checked_at is not None and time.monotonic() - _built_checked_at < BUILT_RECHECK_SECONDS:
+        return False
+    index_table = index_table or get_index_table()
+    _built = 'Item' in index_table.get_item(Key=BUILT_KEY, ProjectionExpression='gram')
+    _built_checked_at = time.monotonic()
+    if not _built:
+        print("[WARN] Search index not built yet: run python -m lostfound_core.search_index")
+    return _built
+
+
+def mark_built(index_table, count):
+    index_table.put_item(Item=dict(BUILT_KEY, count=count, built_at=int(time.time())))
+
+
+def normalize_text(text):
+    if not text:
+        return ''
+    return str(text).lower().replace(' ', '').replace('.', '').replace('-', '')
+
+
+def ngrams(normalized):
+    return {normalized[i:i + NGRAM_SIZE] for i in range(len(normalized) - NGRAM_SIZE + 1)}
+
+
+def item_grams(item):
+    """คืน set ของ gram key ทั้งหมดที่ item นี้ต้องมีใน index"""
+    grams = set()
+    for group, fields in FIELD_GROUPS.items():
+        for field in fields:
+            text = normalize_text(item.get(field, ''))
+            if len(text) > MAX_INDEXED_CHARS:
+                text = text[:MAX_INDEXED_CHARS]
+                grams.add(f'{group}#{OVERFLOW_GRAM}')
+            for gram in ngrams(text):
+                grams.add(f'{group}#{gram}')
+    return grams
+
+
+def index_item(item, previous=None, index_table=None):
+    """เขียน posting ของ item (และลบ posting เก่าที่ไม่ใช้แล้วถ้ามี previous)"""
+    index_table = index_table or get_index_table()
+    new_grams = item_grams(item)
+    old_grams = item_grams(previous) if previous else set()
+    item_id = item['item_id']
+    with index_table.batch_writer() as batch:
+        for gram in new_grams - old_grams:
+            batch.put_item(Item={'gram': gram, 'item_id': item_id, 'item_type': item['item_type']})
+        for gram in old_grams - new_grams:
+            batch.delete_item(Key={'gram': gram, 'item_id': item_id})
+
+
+def submit(item, previous=None):
+    """index item หลังบันทึก: ส่งให้ search_index_function แบบ async ถ้าตั้งไว้ ไม่งั้นทำใน request นี้"""
+    if not SEARCH_INDEX_WORKER_FUNCTION:
+        index_item(item, previous)
+        return
+    job = {'item': slim(item)}
+    if previous:
+        job['previous'] = slim(previous)
+    clients.client('lambda').invoke(FunctionName=SEARCH_INDEX_WORKER_FUNCTION, InvocationType='Event',
+                                    Payload=json.dumps({'jobs': [job]}).encode('utf-8'))
+
+
+def slim(item):
+    """เหลือเฉพาะ field ที่ index ใช้ (payload เล็กและไม่มี Decimal)"""
+    return {field: str(item[field]) for field in INDEXED_FIELDS if item.get(field) is not None}
+
+
+def unindex_item(item, index_table=None):
+    index_table = index_table or get_index_table()
+    with index_table.batch_writer() as batch:
+        for gram in item_grams(item):
+            batch.delete_item(Key={'gram': gram, 'item_id': item['item_id']})
+
+
+def query_grams(term):
+    """เลือก gram ของคำค้นแบบกระจายตลอดคำ ไม่เกิน MAX_QUERY_GRAMS ตัว"""
+    grams = sorted(ngrams(normalize_text(term)), key=normalize_text(term).find)
+    if len(grams) <= MAX_QUERY_GRAMS:
+        return grams
+    step = (len(grams) - 1) / (MAX_QUERY_GRAMS - 1)
+    return [grams[round(i * step)] for i in range(MAX_QUERY_GRAMS)]
+
+
+def lookup(group, term, index_table=None):
+    """คืน {item_id: item_type} ของ item ที่อาจมี term อยู่ใน group
+
+    ผลเป็น superset ของผลจริง ต้องตรวจซ้ำด้วย contains_flexible เสมอ
+    คืน None ถ้าคำค้นสั้นกว่า NGRAM_SIZE (ใช้ index ไม่ได้)
+    """
+    grams = query_grams(term)
+    if not grams:
+        return None
+    index_table = index_table or get_index_table()
+    group = LOOKUP_GROUPS.get(group, group)
+    # item ที่ยาวเกิน MAX_INDEXED_CHARS อาจมีคำค้นอยู่ในส่วนที่ไม่ได้ index ต้องเป็น candidate เสมอ
+    overflow = postings_of(index_table, f'{group}#{OVERFLOW_GRAM}')
+    candidates = None
+    for gram in grams:
+        candidates = postings_of(index_table, f'{group}#{gram}', candidates)
+        if not candidates:
+            break
+    candidates.update(overflow)
+    return candidates
+
+
+def postings_of(index_table, gram, within=None):
+    """{item_id: item_type} ของ posting ใน gram (ถ้าให้ within จะเก็บเฉพาะ item ที่อยู่ใน within)"""
+    postings = {}
+    params = {
+        'KeyConditionExpression': Key('gram').eq(gram),
+        'ProjectionExpression': 'item_id, item_type',
+    }
+    while True:
+        response = index_table.query(**params)
+        for row in response.get('Items', []):
+            if within is None or row['item_id'] in within:
+                postings[row['item_id']] = row['item_type']
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return postings
+        params['ExclusiveStartKey'] = last_key
+
+
+def rebuild(table, index_table=None):
+    """สร้าง index ใหม่จากตารางหลักทั้งหมด (ใช้ตอนติดตั้งครั้งแรกหรือซ่อม index) แล้วเขียน BUILT_KEY"""
+    index_table = index_table or get_index_table()
+    count = 0
+    params = {}
+    while True:
+        response = table.scan(**params)
+        for item in response.get('Items', []):
+            if item.get('item_type') in ['FOUND', 'LOST']:
+                index_item(item, index_table=index_table)
+                count += 1
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            mark_built(index_table, count)
+            return count
+        params['ExclusiveStartKey'] = last_key
+
+
+if __name__ == '__main__':
+    # python -m lostfound_core.search_index (รันจากโฟลเดอร์ lambdafunction)
+    print(f"Indexed {rebuild(clients.table())} items into {SEARCH_INDEX_TABLE_NAME}")
@@ -0,0 +1,216 @@
+import os
+import gzip
+import json
+import time
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from . import changes, clients, item_keys, parallel_scan, result_cache
+from .handler import dumps
+from .search_index import normalize_text
+
+# snapshot ของผลค้นหา: attribute ที่แสดงในผลค้นหาของทุก item เก็บเป็นคอลัมน์ในไฟล์ JSON (gzip) ไฟล์เดียวใน S3
+# search-items-function โหลดครั้งเดียวต่อ container แล้วกรองทีละคอลัมน์ใน memory
+# แทนการอ่าน item จาก DynamoDB (แปลง Decimal + encode ทีละ item) ทุกคำค้น
+#
+#   {"version": 1, "built_at": <cursor>, "generation": <n>, "count": <n>,
+#    "columns": {"item_id": [...], ..., "norm_keyword": [...], "norm_location": [...], "norm_details": [...]}}
+#
+# - norm_* คือข้อความที่ normalize_text แล้ว (norm_keyword = category/brand/details/case_id คั่นด้วย \0)
+# - สร้างด้วย build() จาก snapshot_function.py (ตั้งเวลา หรือเรียกหลังเขียนจำนวนมาก) — ข้ามถ้า generation ไม่เปลี่ยน
+# - ระหว่างรอสร้างใหม่ ทุก container ไล่ตามการเขียนด้วย changes.iter_changes (GSI4) ตั้งแต่ built_at
+#   เมื่อ generation เปลี่ยน ผลจาก snapshot จึงตรงกับตารางเสมอ — ถ้า GSI4 ยังไม่เห็นการเขียนที่ bump ล่าสุด
+#   (cursor < updated_at ที่ bump_generation บันทึกไว้) คำค้นนั้นอ่านจาก DynamoDB แทน
+# - ไฟล์ไม่มีข้อมูลผู้แจ้ง (ชื่อ/เบอร์/รหัสนักศึกษา) view ที่ต้องใช้ (admin) อ่านจาก DynamoDB ตามเดิม
+# - SEARCH_SNAPSHOT_BUCKET ต้องเป็น bucket private แยกจาก bucket รูป (object ในนั้นเปิดเป็น URL สาธารณะ)
+#   ไม่มีค่า default: ถ้าไม่ได้ตั้งจะไม่ใช้ snapshot และ build() จะ error
+
+SNAPSHOT_BUCKET = os.environ.get('SEARCH_SNAPSHOT_BUCKET', '')
+SNAPSHOT_ENABLED = bool(SNAPSHOT_BUCKET) and os.environ.get('SEARCH_SNAPSHOT_ENABLED', 'true').lower() == 'true'
+SNAPSHOT_KEY = os.environ.get('SEARCH_SNAPSHOT_KEY', 'snapshots/search.json.gz')
+# container ตรวจ ETag ของไฟล์ใน S3 ทุก RECHECK_SECONDS (304 ถ้าไม่เปลี่ยน ไม่ต้องโหลดใหม่)
+RECHECK_SECONDS = float(os.environ.get('SEARCH_SNAPSHOT_RECHECK_SECONDS', '300'))
+VERSION = 1
+
+# attribute ที่ผลค้นหาแบบมี view/fields ส่งกลับได้ (view card/detail ของ search-items-function — admin อ่านจาก DynamoDB)
+ATTRS = ('item_id', 'item_type', 'case_id', 'category', 'brand', 'details', 'location', 'date', 'time',
+         'status', 'created_at', 'updated_at', 'image_url', 'thumbnail_url', 'medium_url', 'image_key',
+         'image_status')
+KEYWORD_FIELDS = ('category', 'brand', 'details', 'case_id')
+# ตัวคั่นระหว่าง field ใน norm_keyword (คำค้นที่ normalize แล้วจะไม่คร่อมสอง field)
+KEYWORD_SEPARATOR = '\0'
+
+
+def keyword_text(item):
+    return KEYWORD_SEPARATOR.join(normalize_text(item.get(field, '')) for field in KEYWORD_FIELDS)
+
+
+def to_columns(items):
+    """แปลง item เป็นคอลัมน์ (attribute ที่ไม่มีเป็น null) พร้อมคอลัมน์ข้อความที่ normalize แล้ว"""
+    columns = {attr: [item.get(attr) for item in items] for attr in ATTRS}
+    columns['norm_keyword'] = [keyword_text(item) for item in items]
+    columns['norm_location'] = [normalize_text(item.get('location', '')) for item in items]
+    columns['norm_details'] = [normalize_text(item.get('details', '')) for item in items]
+    return columns
+
+
+def _narrow(rows, column, test):
+    return [i for i in rows if test(column[i])]
+
+
+class Snapshot:
+    """snapshot ที่โหลดแล้ว + การเปลี่ยนแปลงหลัง built_at (item_id -> item หรือ None = ถูกลบ)"""
+
+    def __init__(self, payload, etag=None):
+        self.columns = payload['columns']
+        self.count = payload['count']
+        self.built_at = payload['built_at']
+        self.generation = payload.get('generation')
+        self.etag = etag
+        self.cursor = self.built_at
+        self.overrides = {}
+
+    def catch_up(self, table, generation):
+        """อ่านการเขียนหลัง cursor จาก GSI4 (เฉพาะเมื่อ generation เปลี่ยนจากครั้งก่อน)
+
+        เลื่อน generation เฉพาะเมื่อ cursor ถึง updated_at ของการเขียนที่ bump ล่าสุดแล้ว
+        ถ้า GSI4 ยังไม่เห็นการเขียนนั้น คง generation เดิมไว้ (current() คืน None) แล้วไล่ใหม่ใน request ถัดไป
+        """
+        if generation == self.generation:
+            return 0
+        _, written_at = result_cache.generation_state(table)
+        read = 0
+        for item in changes.iter_changes(table, changes.read_from(self.cursor)):
+            if item['item_type'] == changes.TOMBSTONE_TYPE:
+                self.overrides[item['item_id']] = None
+            else:
+                self.overrides[item['item_id']] = {attr: item[attr] for attr in ATTRS if attr in item}
+            self.cursor = max(self.cursor, item['updated_at'])
+            read += 1
+        if written_at and self.cursor < written_at:
+            print(f"[INFO] Search snapshot behind GSI4: cursor {self.cursor} < {written_at}")
+            return read
+        self.generation = generation
+        return read
+
+    def item(self, row):
+        return {attr: self.columns[attr][row] for attr in ATTRS if self.columns[attr][row] is not None}
+
+    def select(self, filters, predicate):
+        """กรองทีละคอลัมน์ (เงื่อนไขเดียวกับ matches_filters) + ตรวจ item ที่เปลี่ยนหลัง snapshot ด้วย predicate"""
+        columns = self.columns
+        rows = range(self.count)
+        for name in ('item_type', 'status', 'category', 'date'):
+            if filters[name]:
+                rows = _narrow(rows, columns[name], lambda value, wanted=filters[name]: value == wanted)
+        if filters['created_from']:
+            rows = _narrow(rows, columns['created_at'], lambda value: (value or '') >= filters['created_from'])
+        if filters['created_to']:
+            rows = _narrow(rows, columns['created_at'], lambda value: (value or '') <= filters['created_to'])
+        for name, column in (('keyword', 'norm_keyword'), ('location', 'norm_location'),
+                             ('more_details', 'norm_details')):
+            term = normalize_text(filters[name])
+            if term:
+                rows = _narrow(rows, columns[column], lambda value, term=term: term in value)
+            elif filters[name]:
+                # คำค้นที่ normalize แล้วว่าง (เช่น '-') ตรงกับ field ที่ไม่ว่าง — ตรวจด้วย predicate ให้ตรงกันทุกกรณี
+                rows = [row for row in rows if predicate(self.item(row))]
+        item_ids = columns['item_id']
+        items = [self.item(row) for row in rows if item_ids[row] not in self.overrides]
+        items += [item for item in self.overrides.values() if item is not None and predicate(item)]
+        return items
+
+
+_current = None
+_checked_at = None
+
+
+def load(s3=None):
+    """snapshot ของ container (โหลดครั้งแรก แล้วตรวจ ETag ทุก RECHECK_SECONDS) คืน None ถ้ายังไม่มีไฟล์"""
+    global _current, _checked_at
+    if _checked_at is not None and time.monotonic() - _checked_at < RECHECK_SECONDS:
+        return _current
+    s3 = s3 or clients.s3()
+    params = {'Bucket': SNAPSHOT_BUCKET, 'Key': SNAPSHOT_KEY}
+    if _current is not None and _current.etag:
+        params['IfNoneMatch'] = _current.etag
+    try:
+        response = s3.get_object(**params)
+    except ClientError as e:
+        code = e.response.get('Error', {}).get('Code')
+        if code in ('304', 'NotModified'):
+            _checked_at = time.monotonic()
+            return _current
+        if code not in ('NoSuchKey', '404'):
+            # AccessDenied ฯลฯ: รอ RECHECK_SECONDS ก่อนลองใหม่ ไม่ยิง S3 ซ้ำทุก request
+            _checked_at = time.monotonic()
+            raise
+        print("[WARN] Search snapshot not built yet")
+        _current, _checked_at = None, time.monotonic()
+        return None
+    except Exception:
+        _checked_at = time.monotonic()
+        raise
+    payload = json.loads(gzip.decompress(response['Body'].read()))
+    if payload.get('version') != VERSION:
+        print(f"[WARN] Unsupported snapshot version: {payload.get('version')}")
+        _current, _checked_at = None, time.monotonic()
+        return None
+    _current = Snapshot(payload, response.get('ETag'))
+    _checked_at = time.monotonic()
+    print(f"[INFO] Loaded search snapshot: {_current.count} items (built {_current.built_at})")
+    return _current
+
+
+def current(table, generation):
+    """snapshot ที่ไล่ตามการเขียนถึง generation นี้แล้ว หรือ None (ไม่มีไฟล์ / เก่ากว่าอายุ tombstone)"""
+    snapshot = load()
+    if snapshot is None:
+        return None
+    if changes.expired(snapshot.cursor):
+        print(f"[WARN] Search snapshot too old to catch up: {snapshot.built_at}")
+        return None
+    snapshot.catch_up(table, generation)
+    if snapshot.generation != generation:
+        return None
+    return snapshot
+
+
+def built_generation(s3):
+    """generation ของไฟล์ปัจจุบันใน S3 (metadata) หรือ None ถ้ายังไม่มี"""
+    try:
+        head = s3.head_object(Bucket=SNAPSHOT_BUCKET, Key=SNAPSHOT_KEY)
+    except ClientError:
+        return None
+    generation = head.get('Metadata', {}).get('generation')
+    return int(generation) if generation and generation.isdigit() else None
+
+
+def build(table, s3=None, force=False, segments=None):
+    """อ่าน item ทั้งหมด (parallel scan) แล้วเขียน snapshot ใหม่ ข้ามถ้า generation ไม่เปลี่ยนตั้งแต่ครั้งก่อน"""
+    if not SNAPSHOT_BUCKET:
+        raise ValueError('SEARCH_SNAPSHOT_BUCKET not set (must be a private bucket, not the image bucket)')
+    s3 = s3 or clients.s3()
+    generation = result_cache.current_generation(table)
+    if not force and built_generation(s3) == generation:
+        print(f"[INFO] Search snapshot up to date (generation {generation})")
+        return {'skipped': True, 'generation': generation}
+    # cursor ก่อนเริ่มอ่าน: การเขียนระหว่าง scan จะถูกไล่ตามด้วย GSI4 ภายหลัง
+    built_at = changes.now()
+    params = {
+        'ProjectionExpression': ', '.join(f'#a{i}' for i in range(len(ATTRS))),
+        'ExpressionAttributeNames': {f'#a{i}': attr for i, attr in enumerate(ATTRS)},
+        'FilterExpression': Attr('item_type').is_in(list(item_keys.ITEM_TYPES)),
+    }
+    items, _ = parallel_scan.scan(table, params, segments=segments)
+    items.sort(key=lambda i: i.get('created_at', ''), reverse=True)
+    payload = {'version': VERSION, 'built_at': built_at, 'generation': generation,
+               'count': len(items), 'columns': to_columns(items)}
+    body = gzip.compress(dumps(payload).encode('utf-8'))
+    s3.put_object(
+        Bucket=SNAPSHOT_BUCKET, Key=SNAPSHOT_KEY, Body=body,
+        ContentType='application/json', ContentEncoding='gzip',
+        Metadata={'generation': str(generation), 'built-at': built_at}
+    )
+    print(f"[SUCCESS] Search snapshot: {len(items)} items, {len(body)} bytes (generation {generation})")
+    return {'skipped': False, 'generation': generation, 'count': len(items), 'bytes': len(body)}
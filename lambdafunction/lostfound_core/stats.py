@@ -0,0 +1,217 @@
+import os
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from . import clients, parallel_scan
+from .matching import category_group
+
+# ตัวนับสำเร็จรูปสำหรับหน้า admin (ไม่ต้อง scan หรือ query GSI ทุก status เพื่อนับ)
+# เก็บเป็น meta row ในตารางหลัก เหมือน generation counter ของ result_cache
+#
+#   META#STATS              total, type#FOUND, status#รอรับคืน, category#บัตร, ...
+#   META#STATS#<YYYY-MM>    จำนวน item ที่แจ้งต่อวัน: attribute ชื่อ YYYY-MM-DD
+#
+# ทุก handler ที่เพิ่ม/ลบ item หรือเปลี่ยน status/category เรียก record() หลังเขียนสำเร็จ (ADD แบบ atomic)
+# category เป็นข้อความอิสระ จึงนับตามกลุ่มของ matching.CATEGORY_GROUPS (นอกกลุ่มนับเป็น OTHER_CATEGORY)
+# จำนวนตัวนับจึงคงที่ — ตัวนับแบบเก่าที่ใช้ข้อความตรง ๆ read() รวมเข้ากลุ่มให้ และหายไปเมื่อ rebuild()
+# ถ้าตัวนับเพี้ยน (เช่น Lambda ตายระหว่างเขียนกับนับ) รัน rebuild() จาก stats_reconcile_function.py
+
+STATS_KEY = {'item_id': 'META#STATS', 'item_type': 'META'}
+DAY_ITEM_PREFIX = 'META#STATS#'
+DEFAULT_DAYS = 30
+MAX_DAYS = 366
+# จำนวน segment ของ rebuild (0 = ตามขนาดตาราง แบบเดียวกับ parallel_scan)
+SCAN_SEGMENTS = int(os.environ.get('STATS_SCAN_SEGMENTS', '0'))
+ITEM_TYPES = ('FOUND', 'LOST')
+# ตรงกับตัวเลือก "อื่น ๆ" ของ found.html
+OTHER_CATEGORY = 'อื่น ๆ'
+# BatchGetItem ที่ยังมี UnprocessedKeys หลังส่งครบจำนวนนี้ถือว่าอ่านไม่ได้ (StatsUnavailable)
+BATCH_RETRIES = 5
+
+
+class StatsUnavailable(Exception):
+    pass
+
+
+def category_label(category):
+    return category_group(category) or OTHER_CATEGORY
+
+
+def counter_names(item):
+    """ตัวนับใน META#STATS ที่ item นี้ถูกนับอยู่"""
+    names = ['total', f"type#{item['item_type']}"]
+    if item.get('status'):
+        names.append(f"status#{item['status']}")
+    if item.get('category'):
+        names.append(f"category#{category_label(item['category'])}")
+    return names
+
+
+def day_of(item):
+    return (item.get('created_at') or '')[:10]
+
+
+def item_deltas(old=None, new=None):
+    """คืน (delta ของ META#STATS, delta ต่อวัน) จากค่าก่อนและหลังเขียน (None = ไม่มี item)"""
+    summary = {}
+    days = {}
+    for item, sign in ((old, -1), (new, 1)):
+        if not item or item.get('item_type') not in ITEM_TYPES:
+            continue
+        for name in counter_names(item):
+            summary[name] = summary.get(name, 0) + sign
+        if day_of(item):
+            days[day_of(item)] = days.get(day_of(item), 0) + sign
+    return ({k: v for k, v in summary.items() if v}, {k: v for k, v in days.items() if v})
+
+
+def _add(table, key, deltas):
+    names = list(deltas)
+    table.update_item(
+        Key=key,
+        UpdateExpression='ADD ' + ', '.join(f'#c{i} :v{i}' for i in range(len(names))),
+        ExpressionAttributeNames={f'#c{i}': name for i, name in enumerate(names)},
+        ExpressionAttributeValues={f':v{i}': deltas[name] for i, name in enumerate(names)}
+    )
+
+
+def add(table, summary, days=None):
+    """เพิ่ม/ลดตัวนับ (1 UpdateItem ต่อ row ที่เปลี่ยน)"""
+    if summary:
+        _add(table, STATS_KEY, summary)
+    by_month = {}
+    for day, delta in (days or {}).items():
+        by_month.setdefault(day[:7], {})[day] = delta
+    for month, deltas in by_month.items():
+        _add(table, {'item_id': f'{DAY_ITEM_PREFIX}{month}', 'item_type': 'META'}, deltas)
+
+
+def record(table, old=None, new=None):
+    """นับการเขียน 1 ครั้ง: สร้าง (new), ลบ (old) หรือแก้ไข (old และ new)"""
+    record_all(table, [(old, new)])
+
+
+def record_all(table, changes):
+    """นับการเขียนหลายรายการ [(old, new), ...] รวมเป็น UpdateItem เดียวต่อ row"""
+    summary, days = {}, {}
+    for old, new in changes:
+        item_summary, item_days = item_deltas(old, new)
+        for name, delta in item_summary.items():
+            summary[name] = summary.get(name, 0) + delta
+        for day, delta in item_days.items():
+            days[day] = days.get(day, 0) + delta
+    add(table, {k: v for k, v in summary.items() if v}, {k: v for k, v in days.items() if v})
+
+
+def _counts(row):
+    return {name: int(value) for name, value in row.items() if name not in ('item_id', 'item_type', 'reconciled_at')}
+
+
+def read(table, days=DEFAULT_DAYS):
+    """อ่านตัวนับทั้งหมด + จำนวนต่อวันย้อนหลัง days วัน (BatchGetItem ครั้งเดียว ขอซ้ำเฉพาะ UnprocessedKeys)
+
+    raise StatsUnavailable ถ้ายังอ่านไม่ครบหลัง BATCH_RETRIES ครั้ง (ไม่คืนตัวนับที่ขาดเป็น 0)
+    """
+    today = datetime.datetime.utcnow().date()
+    first_day = today - datetime.timedelta(days=days - 1)
+    months = sorted({(first_day + datetime.timedelta(days=n)).strftime('%Y-%m') for n in range(days)})
+    keys = [STATS_KEY] + [{'item_id': f'{DAY_ITEM_PREFIX}{month}', 'item_type': 'META'} for month in months]
+    rows = {}
+    request = {table.name: {'Keys': keys}}
+    # key ที่ถูก throttle กลับมาใน UnprocessedKeys ต้องขอซ้ำจนครบ ไม่งั้นตัวนับหายเป็น 0
+    for attempt in range(BATCH_RETRIES):
+        if attempt:
+            clients.backoff(attempt - 1)
+        response = clients.dynamodb().batch_get_item(RequestItems=request)
+        rows.update((row['item_id'], row) for row in response.get('Responses', {}).get(table.name, []))
+        request = response.get('UnprocessedKeys')
+        if not request:
+            break
+    else:
+        missing = len(request.get(table.name, {}).get('Keys', []))
+        raise StatsUnavailable(f'{missing} stats rows still unprocessed after {BATCH_RETRIES} attempts')
+
+    summary = _counts(rows.get(STATS_KEY['item_id'], {}))
+    grouped = {'by_type': {}, 'by_status': {}, 'by_category': {}}
+    for name, value in summary.items():
+        group, _, label = name.partition('#')
+        target = {'type': 'by_type', 'status': 'by_status', 'category': 'by_category'}.get(group)
+        if group == 'category':
+            label = category_label(label)
+        if target and value:
+            grouped[target][label] = grouped[target].get(label, 0) + value
+    grouped['by_category'] = {label: value for label, value in grouped['by_category'].items() if value}
+    by_day = {}
+    for n in range(days):
+        day = (first_day + datetime.timedelta(days=n)).isoformat()
+        row = rows.get(f'{DAY_ITEM_PREFIX}{day[:7]}', {})
+        by_day[day] = int(row.get(day, 0))
+    return {
+        'total': summary.get('total', 0),
+        **grouped,
+        'by_day': by_day,
+        'reconciled_at': rows.get(STATS_KEY['item_id'], {}).get('reconciled_at'),
+    }
+
+
+def _scan_segment(table, segment, total_segments):
+    """นับ 1 segment ของ parallel scan (ใช้ client ซึ่ง thread-safe แทน Table resource)"""
+    client = table.meta.client
+    params = {
+        'TableName': table.name,
+        'Segment': segment,
+        'TotalSegments': total_segments,
+        'ProjectionExpression': '#id, #type, #status, #category, #created_at',
+        'ExpressionAttributeNames': {'#id': 'item_id', '#type': 'item_type', '#status': 'status',
+                                     '#category': 'category', '#created_at': 'created_at'},
+    }
+    summary, days, day_rows = {}, {}, set()
+    while True:
+        response = client.scan(**params)
+        for item in response.get('Items', []):
+            if item['item_id'].startswith(DAY_ITEM_PREFIX):
+                day_rows.add(item['item_id'])
+            if item.get('item_type') not in ITEM_TYPES:
+                continue
+            for name in counter_names(item):
+                summary[name] = summary.get(name, 0) + 1
+            if day_of(item):
+                days[day_of(item)] = days.get(day_of(item), 0) + 1
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return summary, days, day_rows
+        params['ExclusiveStartKey'] = last_key
+
+
+def rebuild(table, segments=SCAN_SEGMENTS):
+    """นับใหม่ทั้งตารางด้วย parallel scan แล้วเขียนทับตัวนับทั้งหมด
+
+    การเขียนที่เกิดระหว่าง rebuild อาจนับไม่ตรง ควรตั้งเวลารันช่วงที่ใช้งานน้อย
+    """
+    segments = segments or parallel_scan.segment_count(table)
+    with ThreadPoolExecutor(max_workers=segments) as pool:
+        parts = list(pool.map(lambda segment: _scan_segment(table, segment, segments), range(segments)))
+    summary, days, old_rows = {}, {}, set()
+    for part_summary, part_days, part_rows in parts:
+        for name, value in part_summary.items():
+            summary[name] = summary.get(name, 0) + value
+        for day, value in part_days.items():
+            days[day] = days.get(day, 0) + value
+        old_rows |= part_rows
+
+    by_month = {}
+    for day, value in days.items():
+        by_month.setdefault(f'{DAY_ITEM_PREFIX}{day[:7]}', {})[day] = value
+    reconciled_at = datetime.datetime.utcnow().isoformat()
+    with table.batch_writer() as batch:
+        batch.put_item(Item={**STATS_KEY, 'total': 0, **summary, 'reconciled_at': reconciled_at})
+        for item_id, counts in by_month.items():
+            batch.put_item(Item={'item_id': item_id, 'item_type': 'META', **counts})
+        for item_id in old_rows - set(by_month):
+            batch.delete_item(Key={'item_id': item_id, 'item_type': 'META'})
+    return {'total': summary.get('total', 0), 'counters': len(summary), 'months': len(by_month)}
+
+
+if __name__ == '__main__':
+    # python -m lostfound_core.stats (รันจากโฟลเดอร์ lambdafunction)
+    print(f"Rebuilt stats: {rebuild(clients.table())}")
@@ -0,0 +1,165 @@
+import os
+import re
+import time
+
+from . import image_upload, item_keys
+
+# กันการแจ้งซ้ำจาก retry ของ LIFF / เน็ตหลุด / กดส่งสองครั้ง
+# browser สุ่ม client_token ครั้งเดียวต่อฟอร์ม และส่ง token เดิมทุกครั้งที่ส่งฟอร์มนั้นซ้ำ
+#
+#   REQUEST#<item_type>#<token>   target_item_id, case_id, state (pending/done), claimed_at, expires_at
+#
+# - คำขอแรกจอง token ด้วย put แบบมีเงื่อนไข แล้วจึงจอง case_id และเขียน item — คำขอซ้ำได้ case_id เดิมกลับไป
+#   (คำขอซ้ำไม่จอง case_id เลย จึงไม่มี CASE# ที่ต้องคืน)
+# - ถ้าคำขอแรกค้าง pending นานเกิน CLAIM_TIMEOUT_SECONDS (Lambda ตายกลางทาง)
+#   คำขอถัดไปทำต่อด้วย item_id/case_id เดิม และ put item แบบมีเงื่อนไขจึงไม่เกิด item ซ้ำ
+# - expires_at คือ attribute TTL ของตาราง (ต้องเปิด Time to Live ของ Items_TU ที่ attribute นี้)
+
+TOKEN_TTL_SECONDS = int(os.environ.get('CLIENT_TOKEN_TTL_SECONDS', str(24 * 3600)))
+CLAIM_TIMEOUT_SECONDS = int(os.environ.get('CLIENT_TOKEN_CLAIM_TIMEOUT', '30'))
+TTL_ATTRIBUTE = 'expires_at'
+
+_TOKEN_PATTERN = re.compile(r'^[A-Za-z0-9_\-]{8,128}$')
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+class RequestInProgress(Exception):
+    pass
+
+
+class Submission:
+    """item_id/case_id ของการแจ้ง 1 ครั้ง (replay=True: token นี้บันทึกสำเร็จไปแล้ว)"""
+    __slots__ = ('item_type', 'token', 'item_id', 'case_id', 'replay')
+
+    def __init__(self, item_type, token, item_id, case_id, replay=False):
+        self.item_type = item_type
+        self.token = token
+        self.item_id = item_id
+        self.case_id = case_id
+        self.replay = replay
+
+
+def request_key(item_type, token):
+    return {'item_id': f'REQUEST#{item_type}#{token}', 'item_type': 'META'}
+
+
+def _claim(table, item_type, token, item_id):
+    """จอง token คืน row ที่มีผล (ของคำขอนี้ หรือของคำขอก่อนหน้าที่ใช้ token เดียวกัน)"""
+    conditional_failed = table.meta.client.exceptions.ConditionalCheckFailedException
+    key = request_key(item_type, token)
+    now = int(time.time())
+    row = dict(key, target_item_id=item_id, state='pending',
+               claimed_at=now, **{TTL_ATTRIBUTE: now + TOKEN_TTL_SECONDS})
+    try:
+        # row ที่หมดอายุแล้วแต่ TTL ยังไม่ลบ (ลบช้าได้ถึง ~2 วัน) ถือว่าไม่มี
+        table.put_item(
+            Item=row,
+            ConditionExpression='attribute_not_exists(item_id) OR #expires_at < :now',
+            ExpressionAttributeNames={'#expires_at': TTL_ATTRIBUTE},
+            ExpressionAttributeValues={':now': now}
+        )
+        return row
+    except conditional_failed:
+        pass
+    existing = table.get_item(Key=key, ConsistentRead=True).get('Item')
+    if existing is None:
+        raise RequestInProgress('Request already in progress')
+    if existing.get('state') == 'done':
+        return existing
+    if existing['claimed_at'] > now - CLAIM_TIMEOUT_SECONDS:
+        raise RequestInProgress('Request already in progress')
+    # คำขอเดิมค้าง: รับช่วงต่อ (เงื่อนไข claimed_at กันสองคำขอรับช่วงพร้อมกัน)
+    try:
+        table.update_item(
+            Key=key,
+            UpdateExpression='SET #claimed_at = :now',
+            ConditionExpression='#claimed_at = :claimed_at',
+            ExpressionAttributeNames={'#claimed_at': 'claimed_at'},
+            ExpressionAttributeValues={':now': now, ':claimed_at': existing['claimed_at']}
+        )
+    except conditional_failed:
+        raise RequestInProgress('Request already in progress')
+    print(f"[INFO] Resuming stale submission {token}")
+    return existing
+
+
+def start(table, item_type, token=None):
+    """เตรียม item_id และ case_id (จองแล้ว) สำหรับการแจ้ง 1 ครั้ง
+
+    ถ้ามี token จะจอง token ก่อนแล้วจึงจอง case_id — token ที่บันทึกสำเร็จแล้วได้ Submission ที่ replay=True
+    """
+    if token is not None and not _TOKEN_PATTERN.match(str(token)):
+        raise InvalidToken('Invalid client_token')
+    item_id = item_keys.new_item_id(item_type)
+    if not token:
+        return Submission(item_type, None, item_id, item_keys.new_case_id(table, item_type, item_id))
+    claimed = _claim(table, item_type, token, item_id)
+    case_id = claimed.get('case_id')
+    if not case_id:
+        # token เป็นของคำขอนี้แล้ว (หรือรับช่วงคำขอที่ตายก่อนจอง case_id) จึงจอง case_id ได้
+        case_id = _assign_case_id(table, item_type, token, claimed['target_item_id'])
+    return Submission(item_type, token, claimed['target_item_id'], case_id,
+                      replay=claimed['state'] == 'done')
+
+
+def _assign_case_id(table, item_type, token, item_id):
+    """จอง case_id ให้ token ที่จองได้แล้ว — จองไม่ได้จะยกเลิก token ให้ส่งใหม่ได้ทันที"""
+    key = request_key(item_type, token)
+    try:
+        case_id = item_keys.new_case_id(table, item_type, item_id)
+    except Exception:
+        table.delete_item(Key=key)
+        raise
+    table.update_item(
+        Key=key,
+        UpdateExpression='SET #case_id = :case_id',
+        ExpressionAttributeNames={'#case_id': 'case_id'},
+        ExpressionAttributeValues={':case_id': case_id}
+    )
+    return case_id
+
+
+def save(table, item, submission):
+    """เขียน item ของ submission คืน False ถ้า item นี้ถูกเขียนไปแล้ว (คำขอก่อนหน้าตายหลังเขียน)"""
+    # นับการใช้รูปก่อนเขียน item: ถ้าเขียนไม่สำเร็จตัวนับเกินได้ (รูปไม่ถูกลบ) แต่ไม่ขาด (รูปถูกลบทั้งที่ยังใช้อยู่)
+    image_key = image_upload.key_from_url(item.get('image_url'))
+    if image_key:
+        image_upload.retain(table, image_key)
+    try:
+        table.put_item(Item=item, ConditionExpression='attribute_not_exists(item_id)')
+        saved = True
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        print(f"[INFO] Item already saved: {item['item_id']}")
+        saved = False
+    if submission.token:
+        try:
+            table.update_item(
+                Key=request_key(submission.item_type, submission.token),
+                UpdateExpression='SET #state = :done',
+                ExpressionAttributeNames={'#state': 'state'},
+                ExpressionAttributeValues={':done': 'done'}
+            )
+        except Exception as e:
+            print(f"[WARN] Client token update failed: {e}")
+    return saved
+
+
+def abandon(table, submission):
+    """ยกเลิกการจองเมื่อเขียน item ไม่สำเร็จ ให้ลองส่งใหม่ได้ทันทีไม่ต้องรอ CLAIM_TIMEOUT_SECONDS"""
+    try:
+        if submission.token:
+            table.delete_item(
+                Key=request_key(submission.item_type, submission.token),
+                ConditionExpression='#target = :item_id',
+                ExpressionAttributeNames={'#target': 'target_item_id'},
+                ExpressionAttributeValues={':item_id': submission.item_id}
+            )
+        # คำขอที่รับช่วงต่ออาจมี item ของคำขอเดิมอยู่แล้ว: คืน case_id เฉพาะเมื่อไม่มี item
+        key = {'item_id': submission.item_id, 'item_type': submission.item_type}
+        if 'Item' not in table.get_item(Key=key, ConsistentRead=True, ProjectionExpression='item_id'):
+            item_keys.release_case_id(table, submission.case_id)
+    except Exception as e:
+        print(f"[WARN] Submission cleanup failed: {e}")
@@ -0,0 +1,20 @@
+from lostfound_core import clients, matching, metrics
+
+# worker ของการจับคู่ LOST <-> FOUND (MATCH_WORKER_FUNCTION): handler invoke แบบ async ด้วย
+# {'items': [{'item_id': ..., 'item_type': ...}]} หลังบันทึก item แล้ว
+# อ่าน item ใหม่ (ConsistentRead) ก่อนจับคู่ — item ที่ถูกลบไปก่อนถึงคิวจะถูกข้าม
+# ถ้าล้มเหลว Lambda retry async invoke ให้เอง 2 ครั้ง (เขียน match ซ้ำได้ merge_matches ไม่เพิ่มรายการซ้ำ)
+
+
+@metrics.traced('matching_function')
+def lambda_handler(event, context):
+    table = clients.table()
+    matched = 0
+    for key in event.get('items', []):
+        item = table.get_item(Key=key, ConsistentRead=True).get('Item')
+        if not item:
+            print(f"[WARN] Item not found: {key['item_id']}")
+            continue
+        matching.find_matches(table, item)
+        matched += 1
+    return {'matched': matched}
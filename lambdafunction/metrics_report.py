@@ -0,0 +1,112 @@
+import sys
+import json
+import argparse
+
+# สรุป p50/p95/p99 ต่อขั้นตอน (span) จาก log ที่มีบรรทัด EMF ของ lostfound_core.metrics
+# ใช้กับไฟล์ที่ export จาก CloudWatch Logs หรือ stdout ของ benchmark (บรรทัดอื่นจะถูกข้าม)
+#
+#   python metrics_report.py log1.txt log2.txt ...
+#   aws logs tail /aws/lambda/search-items-function --since 1h | python metrics_report.py
+#   python metrics_report.py --function search-items-function --json logs.txt
+
+PERCENTILES = (50, 95, 99)
+# ตัวนับที่แสดงค่าเฉลี่ยต่อ request
+COUNTERS = ('ReadCapacityUnits', 'WriteCapacityUnits', 'ItemsScanned', 'ItemsRead', 'ItemsFiltered',
+            'ItemsReturned', 'AwsCalls', 'RequestBytes', 'ResponseBytes', 'ImageBytes')
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, -(-len(ordered) * pct // 100) - 1))
+    return ordered[int(rank)]
+
+
+def parse_line(line, decoder=json.JSONDecoder()):
+    """คืนเอกสาร EMF จากบรรทัด log (อาจมี timestamp/request id นำหน้า) หรือ None"""
+    start = line.find('{"_aws"')
+    if start < 0:
+        return None
+    try:
+        doc, _ = decoder.raw_decode(line, start)
+    except ValueError:
+        return None
+    return doc if isinstance(doc, dict) else None
+
+
+def read_documents(streams):
+    for stream in streams:
+        for line in stream:
+            doc = parse_line(line)
+            if doc is not None:
+                yield doc
+
+
+def aggregate(docs, function=None):
+    """จัดกลุ่มตาม (Function, Action): เวลาของแต่ละ span (ms ต่อ request) และตัวนับ"""
+    groups = {}
+    for doc in docs:
+        if function and doc.get('Function') != function:
+            continue
+        metric_names = [m['Name'] for directive in doc['_aws'].get('CloudWatchMetrics', [])
+                        for m in directive.get('Metrics', []) if m.get('Unit') == 'Milliseconds']
+        group = groups.setdefault((doc.get('Function'), doc.get('Action')), {'requests': 0, 'stages': {}, 'counters': {}})
+        group['requests'] += 1
+        for name in metric_names:
+            if isinstance(doc.get(name), (int, float)):
+                group['stages'].setdefault(name, []).append(doc[name])
+        for name in COUNTERS:
+            if isinstance(doc.get(name), (int, float)):
+                group['counters'].setdefault(name, []).append(doc[name])
+    return groups
+
+
+def summarize(groups):
+    summary = []
+    for (function, action), group in sorted(groups.items(), key=lambda kv: (str(kv[0][0]), str(kv[0][1]))):
+        stages = []
+        for name, values in group['stages'].items():
+            stage = {'stage': name, 'requests': len(values)}
+            stage.update({f'p{pct}': round(percentile(values, pct), 3) for pct in PERCENTILES})
+            stages.append(stage)
+        # Duration ก่อน แล้วเรียงตาม p99 จากมากไปน้อย (ขั้นตอนที่ควรแก้ก่อนอยู่บนสุด)
+        stages.sort(key=lambda s: (s['stage'] != 'Duration', -s['p99']))
+        counters = {name: round(sum(values) / group['requests'], 3) for name, values in group['counters'].items()}
+        summary.append({'function': function, 'action': action, 'requests': group['requests'],
+                        'stages': stages, 'mean_per_request': counters})
+    return summary
+
+
+def print_summary(summary):
+    for group in summary:
+        print(f"\n{group['function']} / {group['action']}  ({group['requests']} requests)")
+        print(f"  {'stage':<28} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for stage in group['stages']:
+            print(f"  {stage['stage']:<28} {stage['requests']:>6} {stage['p50']:>9.2f} {stage['p95']:>9.2f} {stage['p99']:>9.2f}")
+        if group['mean_per_request']:
+            print('  mean per request: ' + ', '.join(f'{k}={v:g}' for k, v in group['mean_per_request'].items()))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='สรุป latency ต่อขั้นตอนจาก log แบบ EMF')
+    parser.add_argument('files', nargs='*', help='ไฟล์ log (ไม่ระบุ = อ่านจาก stdin)')
+    parser.add_argument('--function', help='เฉพาะ Function นี้')
+    parser.add_argument('--json', action='store_true', help='แสดงผลเป็น JSON')
+    args = parser.parse_args(argv)
+
+    streams = [open(path, encoding='utf-8', errors='replace') for path in args.files] or [sys.stdin]
+    try:
+        summary = summarize(aggregate(read_documents(streams), args.function))
+    finally:
+        for stream in streams:
+            if stream is not sys.stdin:
+                stream.close()
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    elif not summary:
+        print('No EMF records found')
+    else:
+        print_summary(summary)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
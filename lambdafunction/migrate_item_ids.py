@@ -0,0 +1,150 @@
+import sys
+
+from lostfound_core import changes, clients, image_upload, item_keys, result_cache, search_index
+
+# ย้าย item ที่ใช้ item_id แบบเก่า (ITEM#<epoch>-<hex>) ไปเป็นแบบใหม่ที่มี item_type ต่อท้าย
+# item_id เป็น partition key จึงต้องเขียน item ใหม่แล้วลบตัวเก่าใน transaction เดียวกัน
+#
+# หลังย้าย item แล้ว scan อีกรอบเพื่อแก้ที่ที่อ้างถึง id เดิม (fix_references):
+#   matches[].item_id ของ item อื่น, CASE#<case_id>.target_item_id, IMAGE#<key>.holders,
+#   VARIANTS#<key>.waiting — id ใหม่คำนวณจาก id เดิมกับ item_type ได้เสมอ จึงรันซ้ำได้
+#   (ถ้ารอบก่อนล้มเหลวกลางทาง รันใหม่จะแก้ส่วนที่เหลือ) ส่วน posting ของ n-gram index ย้ายทีละ item
+#
+#   python migrate_item_ids.py            ย้ายทั้งหมด
+#   python migrate_item_ids.py --dry-run  แสดงรายการที่จะย้าย/แก้เท่านั้น
+
+
+def legacy_items(table):
+    params = {}
+    while True:
+        response = table.scan(**params)
+        for item in response.get('Items', []):
+            if item.get('item_type') in item_keys.ITEM_TYPES and item_keys.key_for(item['item_id']) is None:
+                yield item
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        params['ExclusiveStartKey'] = last_key
+
+
+def migrate_item(table, item):
+    # updated_at ใหม่ + tombstone ของ id เดิม: หน้าเว็บที่ใช้ delta sync เห็นการย้ายเป็นลบแล้วเพิ่ม
+    timestamp = changes.now()
+    new_item = dict(item, item_id=f"{item['item_id']}#{item['item_type']}", updated_at=timestamp)
+    table.meta.client.transact_write_items(TransactItems=[
+        {'Put': {
+            'TableName': table.name,
+            'Item': new_item,
+            'ConditionExpression': 'attribute_not_exists(item_id)'
+        }},
+        {'Delete': {
+            'TableName': table.name,
+            'Key': {'item_id': item['item_id'], 'item_type': item['item_type']},
+            'ConditionExpression': 'attribute_exists(item_id)'
+        }},
+        {'Put': {
+            'TableName': table.name,
+            'Item': changes.tombstone(item, timestamp)
+        }}
+    ])
+    try:
+        search_index.unindex_item(item)
+        search_index.index_item(new_item)
+    except Exception as e:
+        print(f"[WARN] Search index update failed for {new_item['item_id']}: {e}")
+    return new_item
+
+
+def migrated_id(item_id, item_type):
+    """id ใหม่ของ id ที่อ้างถึง (None ถ้าเป็นแบบใหม่อยู่แล้ว)"""
+    if item_keys.key_for(item_id) is not None or item_type not in item_keys.ITEM_TYPES:
+        return None
+    return f'{item_id}#{item_type}'
+
+
+def rewritten(row):
+    """คืน (attribute, ค่าเดิม, ค่าใหม่) ถ้า row นี้อ้างถึง item_id แบบเก่า ไม่งั้นคืน None"""
+    row_id = row['item_id']
+    if row.get('item_type') in item_keys.ITEM_TYPES and row.get('matches'):
+        matches = [dict(m, item_id=migrated_id(m['item_id'], m.get('item_type')) or m['item_id'])
+                   for m in row['matches']]
+        if matches != row['matches']:
+            return 'matches', row['matches'], matches
+    elif row_id.startswith('CASE#') and row.get('target_item_id'):
+        new_id = migrated_id(row['target_item_id'], row.get('target_item_type'))
+        if new_id:
+            return 'target_item_id', row['target_item_id'], new_id
+    elif row_id.startswith(image_upload.IMAGE_REF_PREFIX) and row.get('holders'):
+        # key ของรูปขึ้นต้นด้วย folder (found/ lost/) ซึ่งตรงกับ item_type ของ item ที่ถือรูป
+        item_type = row_id[len(image_upload.IMAGE_REF_PREFIX):].split('/', 1)[0].upper()
+        holders = {migrated_id(h, item_type) or h for h in row['holders']}
+        if holders != row['holders']:
+            return 'holders', row['holders'], holders
+    elif row_id.startswith('VARIANTS#') and row.get('waiting'):
+        waiting = set()
+        for entry in row['waiting']:
+            item_id, item_type = entry.rsplit('|', 1)
+            waiting.add(f"{migrated_id(item_id, item_type) or item_id}|{item_type}")
+        if waiting != row['waiting']:
+            return 'waiting', row['waiting'], waiting
+    return None
+
+
+def fix_references(table, dry_run=False):
+    """แก้ row ที่ยังอ้างถึง item_id แบบเก่า (เขียนแบบมีเงื่อนไขว่าค่ายังเท่าเดิม) คืน (แก้แล้ว, ข้าม)"""
+    fixed, skipped = 0, 0
+    params = {}
+    while True:
+        response = table.scan(**params)
+        for row in response.get('Items', []):
+            change = rewritten(row)
+            if change is None:
+                continue
+            attribute, old, new = change
+            if dry_run:
+                print(f"[DRY RUN] {row['item_id']}: {attribute}")
+                fixed += 1
+                continue
+            try:
+                table.update_item(
+                    Key={'item_id': row['item_id'], 'item_type': row['item_type']},
+                    UpdateExpression='SET #attr = :new',
+                    ConditionExpression='#attr = :old',
+                    ExpressionAttributeNames={'#attr': attribute},
+                    ExpressionAttributeValues={':new': new, ':old': old}
+                )
+                fixed += 1
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                # ถูกแก้ระหว่างนี้ (เช่นมี match ใหม่) รันซ้ำเพื่อแก้ค่าล่าสุด
+                print(f"[WARN] {row['item_id']} changed during migration, re-run to fix {attribute}")
+                skipped += 1
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return fixed, skipped
+        params['ExclusiveStartKey'] = last_key
+
+
+def migrate(table, dry_run=False):
+    migrated, failed = 0, 0
+    for item in legacy_items(table):
+        if dry_run:
+            print(f"[DRY RUN] {item['item_id']} -> {item['item_id']}#{item['item_type']}")
+            migrated += 1
+            continue
+        try:
+            new_item = migrate_item(table, item)
+            print(f"[SUCCESS] {item['item_id']} -> {new_item['item_id']}")
+            migrated += 1
+        except Exception as e:
+            print(f"[ERROR] {item['item_id']}: {e}")
+            failed += 1
+    fixed, skipped = fix_references(table, dry_run)
+    print(f"Fixed {fixed} references, {skipped} skipped")
+    if (migrated or fixed) and not dry_run:
+        result_cache.bump_generation(table)
+    return migrated, failed + skipped
+
+
+if __name__ == '__main__':
+    migrated, failed = migrate(clients.table(), dry_run='--dry-run' in sys.argv)
+    print(f"Migrated {migrated} items, {failed} failed")
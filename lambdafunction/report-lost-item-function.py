@@ -1,126 +1,152 @@
-import json
-import base64
-import boto3
-import os
-import uuid
-import datetime
-import secrets
-
-DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME', 'Items_TU')
-S3_BUCKET_NAME = os.environ.get('S3_BUCKET_NAME', 'tu-lostfound-pictures')
-
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-s3 = boto3.client('s3', region_name='us-east-1')
-table = dynamodb.Table(DYNAMODB_TABLE_NAME)
-
-CORS_HEADERS = {
-    'Access-Control-Allow-Origin': '*',
-    'Access-Control-Allow-Methods': 'POST, OPTIONS',
-    'Access-Control-Allow-Headers': 'Content-Type'
-}
-
-def lambda_handler(event, context):
-    if event['requestContext']['http']['method'] == 'OPTIONS':
-        return {'statusCode': 204, 'headers': CORS_HEADERS, 'body': ''}
-    
-    try:
-        body = json.loads(event['body'])
-        
-        # รับข้อมูลจากฟอร์ม
-        category = body.get('itemDescription', '')  # แมปจาก itemDescription -> category
-        brand = body.get('brandOrId', '')  # แมปจาก brandOrId -> brand
-        details = body.get('distinguishingFeatures', '')  # แมปจาก distinguishingFeatures -> details
-        location = body.get('lostLocation')  # แมปจาก lostLocation -> location
-        date = body.get('lostDate')  # แมปจาก lostDate -> date
-        time = body.get('lostTime', '')  # แมปจาก lostTime -> time
-        reporter_name = body.get('reporterName')
-        reporter_contact = body.get('reporterContact')
-        reporter_student_id = body.get('reporterStudentId', '')
-        image_base64 = body.get('imageBase64', '')
-        
-        # Validate
-        if not all([category, location, date, reporter_name, reporter_contact]):
-            raise ValueError("Missing required fields")
-            
-    except Exception as e:
-        print(f"Error parsing input: {e}")
-        return {
-            'statusCode': 400,
-            'headers': CORS_HEADERS,
-            'body': json.dumps({'error': f'Invalid input: {str(e)}'})
-        }
-    
-    # อัปโหลดรูปภาพ
-    image_url = None
-    if image_base64:
-        try:
-            header, encoded_data = image_base64.split(',', 1)
-            missing_padding = len(encoded_data) % 4
-            if missing_padding:
-                encoded_data += '=' * (4 - missing_padding)
-            
-            image_data = base64.b64decode(encoded_data)
-            file_ext = header.split(';')[0].split('/')[1]
-            file_name = f"{uuid.uuid4()}.{file_ext}"
-            s3_key = f"lost/{date}/{file_name}"
-            
-            s3.put_object(
-                Bucket=S3_BUCKET_NAME,
-                Key=s3_key,
-                Body=image_data,
-                ContentType=f'image/{file_ext}'
-            )
-            image_url = f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/{s3_key}"
-        except Exception as e:
-            print(f"Image upload error: {e}")
-    
-    # บันทึกลง DynamoDB
-    try:
-        item_id = f"ITEM#{int(datetime.datetime.now().timestamp())}-{secrets.token_hex(4)}"
-        case_id = f"L{secrets.randbelow(900000) + 100000}"
-        timestamp = datetime.datetime.utcnow().isoformat()
-        
-        item = {
-            'item_id': item_id,
-            'item_type': 'LOST',
-            'case_id': case_id,
-            'category': category,
-            'brand': brand,
-            'details': details,
-            'location': location,
-            'date': date,
-            'time': time,
-            'status': 'รอรับคืน',
-            'reporter_name': reporter_name,
-            'reporter_contact': reporter_contact,
-            'reporter_student_id': reporter_student_id,
-            'created_at': timestamp,
-            'updated_at': timestamp,
-            'gsi1_pk': 'STATUS#รอรับคืน',
-            'gsi1_sk': timestamp,
-            'gsi2_pk': f'CATEGORY#{category}',
-            'gsi2_sk': timestamp
-        }
-        
-        if image_url:
-            item['image_url'] = image_url
-        
-        table.put_item(Item=item)
-        
-        return {
-            'statusCode': 200,
-            'headers': CORS_HEADERS,
-            'body': json.dumps({
-                'status': 'success',
-                'caseId': case_id,
-                'message': 'Lost item reported successfully'
-            })
-        }
-        
-    except Exception as e:
-        print(f"DynamoDB error: {e}")
-        return {
-            'statusCode': 500,
-            'headers': CORS_HEADERS,
-            'body': json.dumps({'error': 'Failed to save data'})
-        }
+import base64
+import binascii
+
+from lostfound_core import clients, image_ingest, image_upload, item_model, matching, metrics, result_cache, search_index, stats, submissions
+from lostfound_core.handler import Router, success_response, error_response
+
+router = Router('report-lost-item-function')
+clients.warm()
+image_ingest.check_config()
+
+
+def lambda_handler(event, context):
+    return router.dispatch(event, context)
+
+
+# ขอ presigned URL สำหรับอัปโหลดรูปตรงไป S3 (โฟลเดอร์ lost/)
+@router.route('get_upload_url')
+def get_upload_url(body):
+    try:
+        upload = image_upload.create_upload(
+            clients.s3(),
+            'lost',
+            body.get('content_type', 'image/jpeg'),
+            body.get('content_length'),
+            str(body.get('method', 'POST')).upper(),
+            body.get('content_sha256')
+        )
+    except (image_upload.UploadError, ValueError, TypeError) as e:
+        return error_response(f'Invalid input: {str(e)}', 400)
+    return success_response(**upload)
+
+
+# ฟอร์มแจ้งของหายไม่มี action
+@router.fallback
+def report_lost(body):
+    # รับข้อมูลจากฟอร์ม (itemDescription -> category, brandOrId -> brand, distinguishingFeatures -> details, ...)
+    image_base64 = body.get('imageBase64', '')
+    image_key = body.get('imageKey', '')
+    client_token = body.get('clientToken') or body.get('client_token')
+
+    # Validate
+    try:
+        values = item_model.form_values('LOST', body)
+    except item_model.InvalidItem as e:
+        print(f"Error parsing input: {e}")
+        return error_response(f'Invalid input: {str(e)}', 400)
+
+    # รูปที่อัปโหลดผ่าน presigned URL แล้ว: ตรวจว่ามีไฟล์จริงก่อนรับคำขอ
+    image_url = None
+    if image_key:
+        try:
+            with metrics.span('verify_upload'):
+                image_url = image_upload.verify_upload(clients.s3(), image_key)
+        except image_upload.UploadError as e:
+            return error_response(f'Invalid input: {str(e)}', 400)
+
+    # รูป base64: แค่ถอดรหัสใน request นี้ ส่วนตรวจไฟล์/encode ใหม่/อัปโหลดทำใน worker ของคิวรูป
+    # ถอดรหัสไม่ได้ตอบ 400 ก่อนจอง clientToken (ส่งใหม่ด้วย token เดิมได้)
+    image_data = None
+    if image_base64 and not image_key:
+        try:
+            header, encoded_data = image_base64.split(',', 1)
+            missing_padding = len(encoded_data) % 4
+            if missing_padding:
+                encoded_data += '=' * (4 - missing_padding)
+
+            with metrics.span('decode_image'):
+                image_data = base64.b64decode(encoded_data)
+            content_type = header.split(';')[0].split(':', 1)[-1]
+        except (binascii.Error, ValueError) as e:
+            print(f"Image decode error: {e}")
+            return error_response('Invalid input: Invalid imageBase64', 400)
+        metrics.count('ImageBytes', len(image_data))
+
+    table = clients.table()
+    # clientToken เดิม (retry / กดซ้ำ) ได้ caseId เดิมกลับไปโดยไม่สร้าง item และรูปใหม่
+    try:
+        with metrics.span('start_submission'):
+            submission = submissions.start(table, 'LOST', client_token)
+    except submissions.InvalidToken as e:
+        return error_response(f'Invalid input: {str(e)}', 400)
+    except submissions.RequestInProgress as e:
+        return error_response(str(e), 409)
+    except Exception as e:
+        print(f"DynamoDB error: {e}")
+        return error_response('Failed to save data', 500)
+    if submission.replay:
+        print(f"Duplicate submission: {submission.case_id}")
+        return success_response(caseId=submission.case_id, message='Lost item reported successfully', replayed=True)
+
+    # บันทึกลง DynamoDB
+    try:
+        case_id = submission.case_id
+        record = item_model.new_item(submission, values)
+        if image_url:
+            record.image_url = image_url
+        if image_key:
+            record.image_key = image_key
+        if image_data:
+            record.image_status = image_ingest.PENDING
+        item = record.to_item()
+
+        if not submissions.save(table, item, submission):
+            return success_response(caseId=case_id, message='Lost item reported successfully', replayed=True)
+
+        try:
+            with metrics.span('index_item'):
+                search_index.submit(item)
+        except Exception as e:
+            print(f"Search index update error: {e}")
+
+        try:
+            with metrics.span('update_stats'):
+                stats.record(table, new=item)
+        except Exception as e:
+            print(f"Stats update error: {e}")
+
+        try:
+            with metrics.span('find_matches'):
+                matching.submit(table, item)
+        except Exception as e:
+            print(f"Matching error: {e}")
+
+        if image_url:
+            try:
+                # URL ของรูปย่อบันทึกเมื่อ image_resize_function สร้างเสร็จแล้วเท่านั้น
+                with metrics.span('attach_variants'):
+                    image_upload.attach_variants(table, {'item_id': item['item_id'], 'item_type': 'LOST'}, image_url)
+            except Exception as e:
+                print(f"Variant URL update error: {e}")
+
+        try:
+            with metrics.span('bump_generation'):
+                result_cache.bump_generation(table, item['updated_at'])
+        except Exception as e:
+            print(f"Cache generation bump error: {e}")
+
+        if image_data:
+            job = {'item_id': item['item_id'], 'item_type': 'LOST'}
+            try:
+                with metrics.span('enqueue_image'):
+                    job = image_ingest.stage(clients.s3(), 'lost', image_data, content_type, item['item_id'], 'LOST')
+                    image_ingest.enqueue(job)
+            except Exception as e:
+                image_ingest.fail(job, e)
+
+        return success_response(caseId=case_id, message='Lost item reported successfully')
+
+    except Exception as e:
+        print(f"DynamoDB error: {e}")
+        submissions.abandon(table, submission)
+        return error_response('Failed to save data', 500)
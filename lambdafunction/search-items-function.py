@@ -1,165 +1,767 @@
-import json
-import boto3
-import os
-import decimal
-from boto3.dynamodb.conditions import Key, Attr
-
-
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, decimal.Decimal):
-            return int(obj) if obj % 1 == 0 else float(obj)
-        return super(DecimalEncoder, self).default(obj)
-
-
-DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME', 'Items_TU')
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-table = dynamodb.Table(DYNAMODB_TABLE_NAME)
-
-
-CORS_HEADERS = {
-    'Access-Control-Allow-Origin': '*',
-    'Access-Control-Allow-Methods': 'POST, OPTIONS, GET',
-    'Access-Control-Allow-Headers': 'Content-Type, Authorization'
-}
-
-
-def lambda_handler(event, context):
-    print(f"Received event: {json.dumps(event)}")
-    
-    # CORS Preflight
-    if event.get('requestContext', {}).get('http', {}).get('method') == 'OPTIONS':
-        return {
-            'statusCode': 200,  # ⚠️ เปลี่ยนจาก 204 เป็น 200
-            'headers': CORS_HEADERS,
-            'body': json.dumps({'status': 'ok'})
-        }
-    
-    try:
-        body = json.loads(event.get('body', '{}'))
-        print(f"Search params: {body}")
-        
-        # ⚠️ รับตัวแปรทั้งหมด (เพิ่ม status และ search_mode)
-        search_mode = body.get('search_mode', '')  # ✅ เพิ่มใหม่
-        keyword = body.get('keyword', '').strip()
-        location = body.get('location', '').strip()
-        date = body.get('date', '').strip()
-        more_details = body.get('moreDetails', '').strip()
-        status_filter = body.get('status', '').strip()  # ✅ เพิ่มใหม่
-        
-        print(f"search_mode: {search_mode}, status: {status_filter}")
-        
-        # ✅ ถ้าเป็น admin mode และมี status filter ให้ใช้ GSI
-        if search_mode == 'admin' and status_filter:
-            print(f"[ADMIN MODE] Querying by status: {status_filter}")
-            try:
-                response = table.query(
-                    IndexName='GSI1',
-                    KeyConditionExpression=Key('gsi1_pk').eq(f'STATUS#{status_filter}')
-                )
-                all_items = response.get('Items', [])
-                print(f"[GSI Query] Found {len(all_items)} items with status {status_filter}")
-            except Exception as gsi_error:
-                print(f"[WARN] GSI query failed: {gsi_error}")
-                print("[INFO] Falling back to Scan with filter")
-                # ถ้า GSI ไม่มี ใช้ Scan + FilterExpression แทน
-                response = table.scan(
-                    FilterExpression=Attr('status').eq(status_filter)
-                )
-                all_items = response.get('Items', [])
-        else:
-            # Scan ทั้งตาราง (กรณีไม่มี status filter)
-            print("[INFO] Scanning all items")
-            response = table.scan()
-            all_items = response.get('Items', [])
-        
-        # ✅ กรองทั้ง FOUND และ LOST
-        filtered_items = [
-            item for item in all_items 
-            if item.get('item_type') in ['FOUND', 'LOST']
-        ]
-        
-        print(f"Total items before filtering: {len(filtered_items)}")
-        print(f"  FOUND: {len([i for i in filtered_items if i.get('item_type') == 'FOUND'])}")
-        print(f"  LOST: {len([i for i in filtered_items if i.get('item_type') == 'LOST'])}")
-        
-        # ฟังก์ชันค้นหาแบบยืดหยุ่น
-        def normalize_text(text):
-            if not text:
-                return ''
-            return str(text).lower().replace(' ', '').replace('.', '').replace('-', '')
-        
-        def contains_flexible(field_value, search_term):
-            if not search_term:
-                return True
-            if not field_value:
-                return False
-            normalized_field = normalize_text(field_value)
-            normalized_search = normalize_text(search_term)
-            return normalized_search in normalized_field
-        
-        # กรองตาม keyword
-        if keyword:
-            filtered_items = [
-                item for item in filtered_items
-                if (
-                    contains_flexible(item.get('category', ''), keyword) or
-                    contains_flexible(item.get('brand', ''), keyword) or
-                    contains_flexible(item.get('details', ''), keyword) or
-                    contains_flexible(item.get('case_id', ''), keyword)
-                )
-            ]
-            print(f"After keyword filter: {len(filtered_items)} items")
-        
-        # กรองตาม location
-        if location:
-            filtered_items = [
-                item for item in filtered_items
-                if contains_flexible(item.get('location', ''), location)
-            ]
-            print(f"After location filter: {len(filtered_items)} items")
-        
-        # กรองตาม date
-        if date:
-            filtered_items = [
-                item for item in filtered_items
-                if item.get('date') == date
-            ]
-            print(f"After date filter: {len(filtered_items)} items")
-        
-        # กรองตาม more_details
-        if more_details:
-            filtered_items = [
-                item for item in filtered_items
-                if contains_flexible(item.get('details', ''), more_details)
-            ]
-            print(f"After more_details filter: {len(filtered_items)} items")
-        
-        # เรียงตามวันที่ล่าสุด
-        filtered_items.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        
-        print(f"Final result: {len(filtered_items)} items")
-        
-        return {
-            'statusCode': 200,
-            'headers': CORS_HEADERS,
-            'body': json.dumps({
-                'status': 'success',
-                'count': len(filtered_items),
-                'items': filtered_items
-            }, cls=DecimalEncoder, ensure_ascii=False)
-        }
-        
-    except Exception as e:
-        print(f"Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        
-        return {
-            'statusCode': 500,
-            'headers': CORS_HEADERS,
-            'body': json.dumps({
-                'status': 'error',
-                'error': str(e)
-            }, ensure_ascii=False)
-        }
+import json
+import os
+import base64
+import heapq
+from boto3.dynamodb.conditions import Key, Attr
+
+from lostfound_core import changes, clients, item_keys, metrics, parallel_scan, result_cache, search_index, snapshot
+from lostfound_core.handler import Router, dumps, ndjson_response, success_response, error_response
+from lostfound_core.search_index import normalize_text
+
+router = Router('search-items-function', field='search_mode')
+clients.warm()
+
+# ขนาดหน้าเริ่มต้น / สูงสุด และจำนวน item ที่อ่านจาก DynamoDB ต่อครั้ง
+# คำค้นทุกครั้งแบ่งหน้า (ไม่ส่ง page_size = PAGE_SIZE) ขอหน้าถัดไปด้วย next_token
+# ลำดับข้ามหน้า: plan ใน ORDERED_PLANS เรียงล่าสุดก่อนทั้งผลลัพธ์ ส่วน plan ที่อ่านจาก scan หรือ n-gram index
+# เรียงเฉพาะภายในหน้า (response มี ordered = false) client ที่ต้องการลำดับรวมต้องเรียงเองหลังได้ครบทุกหน้า
+PAGE_SIZE = int(os.environ.get('SEARCH_PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = int(os.environ.get('SEARCH_MAX_PAGE_SIZE', '200'))
+READ_BATCH_SIZE = int(os.environ.get('SEARCH_READ_BATCH_SIZE', '200'))
+SEARCH_INDEX_ENABLED = os.environ.get('SEARCH_INDEX_ENABLED', 'true').lower() == 'true'
+BATCH_GET_SIZE = 100
+
+# search_mode=stream: จำนวน item ต่อ chunk และขนาด body สูงสุด (response ของ Lambda จำกัด 6 MB)
+STREAM_CHUNK_SIZE = int(os.environ.get('SEARCH_STREAM_CHUNK_SIZE', '200'))
+STREAM_MAX_BYTES = int(os.environ.get('SEARCH_STREAM_MAX_BYTES', str(5 * 1024 * 1024)))
+
+# cache ระดับ container: ผลค้นหาต่อ query และชุด item จากการ scan ทั้งตารางต่อ generation
+RESULT_CACHE = result_cache.TTLCache()
+SCAN_CACHE = result_cache.TTLCache(max_entries=1)
+
+# plan ที่ผลเรียงตาม created_at (ล่าสุดก่อน) ต่อเนื่องข้าม next_token
+ORDERED_PLANS = ('snapshot', 'scan_cache', 'gsi2_category', 'gsi1_status', 'gsi1_status_fanout')
+
+# attribute ที่ประกอบเป็น ExclusiveStartKey ของตารางหลักและ GSI
+TABLE_KEY_ATTRS = ('item_id', 'item_type')
+GSI1_KEY_ATTRS = ('gsi1_pk', 'gsi1_sk', 'item_id', 'item_type')
+GSI2_KEY_ATTRS = ('gsi2_pk', 'gsi2_sk', 'item_id', 'item_type')
+GSI3_KEY_ATTRS = ('gsi3_pk', 'gsi3_sk', 'item_id', 'item_type')
+
+# view ของผลค้นหา -> attribute ที่ส่งกลับ (ใช้เป็น ProjectionExpression ด้วย)
+# card ไม่มีข้อมูลส่วนตัวของผู้แจ้ง และไม่มี gsi_* ทุก view
+CARD_ATTRS = ['item_id', 'item_type', 'case_id', 'category', 'brand', 'details', 'location',
+              'date', 'time', 'status', 'created_at', 'image_url', 'thumbnail_url']
+DETAIL_ATTRS = CARD_ATTRS + ['medium_url', 'updated_at']
+ADMIN_ATTRS = DETAIL_ATTRS + ['image_key', 'image_status', 'reporter_name', 'reporter_contact',
+                              'reporter_student_id']
+VIEWS = {'card': CARD_ATTRS, 'detail': DETAIL_ATTRS, 'admin': ADMIN_ATTRS}
+
+# attribute ที่ต้องอ่านเสมอเมื่อใช้ projection: ใช้กรอง (matches_filters) และทำ cursor
+REQUIRED_ATTRS = sorted(set(TABLE_KEY_ATTRS + GSI1_KEY_ATTRS + GSI2_KEY_ATTRS + (
+    'case_id', 'category', 'brand', 'details', 'location', 'date', 'status', 'created_at')))
+
+# สถานะทั้งหมดที่ Admin_Update ยอมให้ตั้ง (ใช้ query GSI1 ครบทุก partition)
+STATUSES = ['แจ้งแล้ว', 'รอรับคืน', 'คืนเจ้าของแล้ว', 'หมดอายุ']
+
+
+# ฟังก์ชันค้นหาแบบยืดหยุ่น
+def contains_flexible(field_value, search_term):
+    if not search_term:
+        return True
+    if not field_value:
+        return False
+    normalized_field = normalize_text(field_value)
+    normalized_search = normalize_text(search_term)
+    return normalized_search in normalized_field
+
+
+def matches_filters(item, filters):
+    """เงื่อนไขเดียวกับการกรองเดิม แต่ตรวจทีละ item ระหว่างอ่านแต่ละหน้า
+
+    ตรวจทุกเงื่อนไขเสมอ แม้บางเงื่อนไขจะถูกส่งไปเป็น KeyCondition/FilterExpression แล้ว
+    """
+    if item.get('item_type') not in ['FOUND', 'LOST']:
+        return False
+    if filters['item_type'] and item.get('item_type') != filters['item_type']:
+        return False
+    if filters['status'] and item.get('status') != filters['status']:
+        return False
+    if filters['category'] and item.get('category') != filters['category']:
+        return False
+    created_at = item.get('created_at', '')
+    if filters['created_from'] and created_at < filters['created_from']:
+        return False
+    if filters['created_to'] and created_at > filters['created_to']:
+        return False
+    keyword = filters['keyword']
+    if keyword and not (
+        contains_flexible(item.get('category', ''), keyword) or
+        contains_flexible(item.get('brand', ''), keyword) or
+        contains_flexible(item.get('details', ''), keyword) or
+        contains_flexible(item.get('case_id', ''), keyword)
+    ):
+        return False
+    if filters['location'] and not contains_flexible(item.get('location', ''), filters['location']):
+        return False
+    if filters['date'] and item.get('date') != filters['date']:
+        return False
+    if filters['more_details'] and not contains_flexible(item.get('details', ''), filters['more_details']):
+        return False
+    return True
+
+
+def encode_token(key):
+    raw = dumps(key)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_token(token):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+    except Exception:
+        raise ValueError('Invalid next_token')
+    if not isinstance(key, dict) or not key:
+        raise ValueError('Invalid next_token')
+    if 'scan_segments' in key and not parallel_scan.is_cursor(key):
+        raise ValueError('Invalid next_token')
+    if 'after' in key and not (isinstance(key['after'], list) and len(key['after']) == 2
+                               and all(isinstance(part, str) for part in key['after'])):
+        raise ValueError('Invalid next_token')
+    return key
+
+
+def iter_items(read, params, key_attrs, start_key=None):
+    """อ่านทุกหน้าของ scan/query ตาม LastEvaluatedKey
+
+    คืน (item, resume_key) โดย resume_key คือ ExclusiveStartKey
+    ที่ใช้อ่านต่อหลัง item นั้นได้ทันที
+    """
+    params = dict(params)
+    if start_key:
+        params['ExclusiveStartKey'] = start_key
+    while True:
+        response = read(**params)
+        for item in response.get('Items', []):
+            yield item, {attr: item[attr] for attr in key_attrs if attr in item}
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        params['ExclusiveStartKey'] = last_key
+
+
+def collect_matches(read, params, key_attrs, predicate, page_size=None, start_key=None):
+    """เก็บ item ที่ผ่าน predicate จนครบ page_size แล้วหยุดอ่านทันที
+
+    คืน (items, next_key) — next_key เป็น None เมื่ออ่านครบทั้งตารางแล้ว
+    """
+    matched = []
+    for item, resume_key in iter_items(read, params, key_attrs, start_key):
+        if predicate(item):
+            matched.append(item)
+            if page_size and len(matched) >= page_size:
+                return matched, resume_key
+    return matched, None
+
+
+def index_candidates(filters):
+    """หา Key ของ item ที่อาจตรงเงื่อนไขจาก n-gram index
+
+    คืน None ถ้าไม่มีคำค้นที่ยาวพอจะใช้ index ได้ (ต้อง scan แทน)
+    """
+    candidates = None
+    for group, term in [('keyword', filters['keyword']),
+                        ('location', filters['location']),
+                        ('details', filters['more_details'])]:
+        if not term:
+            continue
+        found = search_index.lookup(group, term)
+        if found is None:
+            continue
+        if candidates is None:
+            candidates = found
+        else:
+            candidates = {k: v for k, v in candidates.items() if k in found}
+    return candidates
+
+
+def projection_params(projection):
+    """แปลงรายชื่อ attribute เป็น ProjectionExpression (ใช้ชื่อแทนเพราะ status/date เป็น reserved word)"""
+    if not projection:
+        return {}
+    attrs = sorted(set(projection) | set(REQUIRED_ATTRS))
+    return {
+        'ProjectionExpression': ', '.join(f'#p{i}' for i in range(len(attrs))),
+        'ExpressionAttributeNames': {f'#p{i}': attr for i, attr in enumerate(attrs)},
+    }
+
+
+def shape_items(items, projection):
+    if not projection:
+        return items
+    return [{attr: item[attr] for attr in projection if attr in item} for item in items]
+
+
+def collect_candidates(candidates, predicate, page_size=None, start_key=None, projection=None):
+    """อ่าน item จากรายการ candidate ด้วย BatchGetItem (item_id ใหม่ก่อน) แล้วกรองซ้ำ"""
+    keys = [{'item_id': item_id, 'item_type': item_type}
+            for item_id, item_type in sorted(candidates.items(), reverse=True)]
+    if start_key:
+        keys = [k for k in keys if k['item_id'] < start_key.get('item_id', '')]
+    matched = []
+    for i in range(0, len(keys), BATCH_GET_SIZE):
+        chunk = keys[i:i + BATCH_GET_SIZE]
+        fetched = {}
+        request = {clients.DYNAMODB_TABLE_NAME: dict(projection_params(projection), Keys=chunk)}
+        while request:
+            response = clients.dynamodb().batch_get_item(RequestItems=request)
+            for item in response.get('Responses', {}).get(clients.DYNAMODB_TABLE_NAME, []):
+                fetched[item['item_id']] = item
+            request = response.get('UnprocessedKeys') or None
+        # เรียงตาม chunk เดิมเพื่อให้ cursor ต่อหน้าได้ถูกต้อง
+        for key in chunk:
+            item = fetched.get(key['item_id'])
+            if item and predicate(item):
+                matched.append(item)
+                if page_size and len(matched) >= page_size:
+                    return matched, key
+    return matched, None
+
+
+def sort_key_condition(pk_name, sk_name, pk_value, created_from='', created_to=''):
+    condition = Key(pk_name).eq(pk_value)
+    if created_from and created_to:
+        return condition & Key(sk_name).between(created_from, created_to)
+    if created_from:
+        return condition & Key(sk_name).gte(created_from)
+    if created_to:
+        return condition & Key(sk_name).lte(created_to)
+    return condition
+
+
+def filter_expression(filters, skip=()):
+    """แปลงเงื่อนไขแบบ exact match เป็น FilterExpression เพื่อลดข้อมูลที่ส่งกลับมา"""
+    conditions = []
+    if filters['item_type'] and 'item_type' not in skip:
+        conditions.append(Attr('item_type').eq(filters['item_type']))
+    else:
+        conditions.append(Attr('item_type').is_in(['FOUND', 'LOST']))
+    if filters['status'] and 'status' not in skip:
+        conditions.append(Attr('status').eq(filters['status']))
+    if filters['category'] and 'category' not in skip:
+        conditions.append(Attr('category').eq(filters['category']))
+    if 'created' not in skip:
+        if filters['created_from']:
+            conditions.append(Attr('created_at').gte(filters['created_from']))
+        if filters['created_to']:
+            conditions.append(Attr('created_at').lte(filters['created_to']))
+    if filters['date']:
+        conditions.append(Attr('date').eq(filters['date']))
+    expression = conditions[0]
+    for condition in conditions[1:]:
+        expression = expression & condition
+    return expression
+
+
+def plan_index_query(filters, read_params):
+    """เลือก GSI ที่คัดได้แคบที่สุด: category (GSI2) ก่อน status (GSI1)
+
+    คืน (ชื่อ plan, params ของ query, key attrs) หรือ None ถ้าไม่มี GSI ที่ใช้ได้
+    """
+    if filters['category']:
+        pk_name, sk_name, pk_value, skip = 'gsi2_pk', 'gsi2_sk', f"CATEGORY#{filters['category']}", ('category', 'created')
+        plan, index_name, key_attrs = 'gsi2_category', 'GSI2', GSI2_KEY_ATTRS
+    elif filters['status']:
+        pk_name, sk_name, pk_value, skip = 'gsi1_pk', 'gsi1_sk', f"STATUS#{filters['status']}", ('status', 'created')
+        plan, index_name, key_attrs = 'gsi1_status', 'GSI1', GSI1_KEY_ATTRS
+    else:
+        return None
+    params = dict(
+        read_params,
+        IndexName=index_name,
+        KeyConditionExpression=sort_key_condition(
+            pk_name, sk_name, pk_value, filters['created_from'], filters['created_to']),
+        FilterExpression=filter_expression(filters, skip),
+        ScanIndexForward=False
+    )
+    return plan, params, key_attrs
+
+
+def iter_status_fanout(filters, read_params, start_key=None):
+    """query GSI1 ทุก status ด้วยช่วง gsi1_sk แล้ว merge ตามเวลาล่าสุดก่อน (ไม่ต้องเรียงใน memory)
+
+    คืน (item, resume_key) เรียงตาม created_at จากใหม่ไปเก่า
+    """
+    cursor = (start_key.get('gsi1_sk', ''), start_key.get('item_id', '')) if start_key else None
+    created_to = filters['created_to']
+    if cursor and (not created_to or cursor[0] < created_to):
+        created_to = cursor[0]
+    streams = []
+    for status in STATUSES:
+        params = dict(
+            read_params,
+            IndexName='GSI1',
+            KeyConditionExpression=sort_key_condition(
+                'gsi1_pk', 'gsi1_sk', f'STATUS#{status}', filters['created_from'], created_to),
+            FilterExpression=filter_expression(filters, ('created',)),
+            ScanIndexForward=False
+        )
+        streams.append(item for item, _ in iter_items(clients.table().query, params, GSI1_KEY_ATTRS))
+    for item in heapq.merge(*streams, key=lambda i: (i.get('gsi1_sk', ''), i['item_id']), reverse=True):
+        if cursor and (item.get('gsi1_sk', ''), item['item_id']) >= cursor:
+            continue
+        yield item, {attr: item[attr] for attr in GSI1_KEY_ATTRS if attr in item}
+
+
+def collect_status_fanout(filters, predicate, read_params, page_size=None, start_key=None):
+    """ช่วงวันที่อย่างเดียว: GSI1 ทุก status เรียงตามเวลาล่าสุดก่อน"""
+    matched = []
+    for item, resume_key in iter_status_fanout(filters, read_params, start_key):
+        if predicate(item):
+            matched.append(item)
+            if page_size and len(matched) >= page_size:
+                return matched, resume_key
+    return matched, None
+
+
+def order_key(item):
+    return item.get('created_at', ''), item['item_id']
+
+
+def page_sorted(items, page_size=None, start_key=None):
+    """แบ่งหน้าผลที่อยู่ใน memory ทั้งชุด: เรียงล่าสุดก่อน แล้วต่อจาก (created_at, item_id) ของ item สุดท้าย
+
+    คืน (items, next_key) โดย next_key = {'after': [created_at, item_id]}
+    """
+    items = sorted(items, key=order_key, reverse=True)
+    if start_key:
+        after = tuple(start_key['after'])
+        items = [item for item in items if order_key(item) < after]
+    if not page_size or len(items) <= page_size:
+        return items, None
+    items = items[:page_size]
+    return items, {'after': list(order_key(items[-1]))}
+
+
+def find_items(filters, predicate, page_size=None, start_key=None, generation=None, projection=None):
+    """query planner: เลือกวิธีอ่านข้อมูลที่ถูกที่สุดตามเงื่อนไขที่มี
+
+    ลำดับ: snapshot ใน memory > scan ที่ cache ไว้ > GSI2 (category) > GSI1 (status) > n-gram index
+    > GSI1 ทุก status (ช่วงวันที่) > parallel scan + FilterExpression
+    คืน (items, next_key, ชื่อ plan)
+    """
+    table = clients.table()
+    read_params = projection_params(projection)
+    if page_size:
+        read_params['Limit'] = READ_BATCH_SIZE
+    
+    # next_token ของผลใน memory (snapshot / scan cache) ต่อได้เฉพาะจากผลชุดเดียวกัน
+    memory_cursor = bool(start_key) and 'after' in start_key
+
+    # ✅ snapshot แบบคอลัมน์ (S3 ครั้งเดียวต่อ container): คำค้นที่ขอ view/fields ที่ snapshot มีครบ
+    # item เต็ม (ไม่ส่ง view/fields) ยังอ่านจาก DynamoDB
+    if (snapshot.SNAPSHOT_ENABLED and generation is not None and (not start_key or memory_cursor)
+            and projection and set(projection) <= set(snapshot.ATTRS)):
+        try:
+            with metrics.span('load_snapshot'):
+                current = snapshot.current(table, generation)
+        except Exception as snapshot_error:
+            print(f"[WARN] Search snapshot unavailable: {snapshot_error}")
+            current = None
+        if current is not None:
+            print(f"[PLAN] snapshot: {current.count} items + {len(current.overrides)} changes")
+            items, next_key = page_sorted(current.select(filters, predicate), page_size, start_key)
+            return items, next_key, 'snapshot'
+
+    if memory_cursor:
+        # หน้าแรกมาจาก snapshot แต่ container นี้ใช้ไม่ได้: อ่านทั้งตารางครั้งเดียวต่อ generation แล้วตัดหน้าแบบเดียวกัน
+        raw_items = SCAN_CACHE.get(generation) if generation is not None else None
+        if raw_items is None:
+            print("[PLAN] parallel_scan (memory cursor)")
+            raw_items, _ = parallel_scan.scan(table)
+            if generation is not None:
+                SCAN_CACHE.put(generation, raw_items)
+        items, next_key = page_sorted([item for item in raw_items if predicate(item)], page_size, start_key)
+        return items, next_key, 'scan_cache'
+    
+    # ✅ ถ้ามีชุด item ที่ scan ไว้แล้วใน generation นี้ กรองจาก memory ได้เลย
+    # (เฉพาะหน้าแรก เพราะ cursor ของแต่ละวิธีอ่านไม่เหมือนกัน)
+    use_scan_cache = not page_size and generation is not None
+    raw_items = SCAN_CACHE.get(generation) if generation is not None and not start_key else None
+    if raw_items is not None:
+        print(f"[CACHE] Scan hit ({len(raw_items)} items)")
+        items, next_key = page_sorted([item for item in raw_items if predicate(item)], page_size)
+        return items, next_key, 'scan_cache'
+    
+    # ✅ GSI query พร้อมเงื่อนไขช่วงเวลาบน sort key (เรียงล่าสุดก่อน)
+    index_plan = plan_index_query(filters, read_params)
+    if index_plan:
+        plan, params, key_attrs = index_plan
+        print(f"[PLAN] {plan}: {params['IndexName']}")
+        try:
+            items, next_key = collect_matches(table.query, params, key_attrs, predicate, page_size, start_key)
+            return items, next_key, plan
+        except Exception as gsi_error:
+            if start_key:
+                raise
+            print(f"[WARN] GSI query failed: {gsi_error}")
+            print("[INFO] Falling back to Scan with filter")
+            # ถ้า GSI ไม่มี ใช้ Scan + FilterExpression แทน
+            items, next_key = collect_matches(
+                table.scan, dict(read_params, FilterExpression=filter_expression(filters)),
+                TABLE_KEY_ATTRS, predicate, page_size
+            )
+            return items, next_key, 'scan'
+    
+    # ✅ ลองใช้ n-gram index ถ้ามีคำค้นที่ยาวพอ (เฉพาะเมื่อ rebuild จนจบแล้ว — index ว่างจะได้ 0 รายการทุกคำค้น)
+    if SEARCH_INDEX_ENABLED:
+        try:
+            candidates = index_candidates(filters) if search_index.is_built() else None
+        except Exception as index_error:
+            print(f"[WARN] Search index lookup failed: {index_error}")
+            print("[INFO] Falling back to Scan")
+            candidates = None
+        if candidates is not None:
+            print(f"[PLAN] ngram_index: {len(candidates)} candidate items")
+            items, next_key = collect_candidates(candidates, predicate, page_size, start_key, projection)
+            return items, next_key, 'ngram_index'
+    
+    # ✅ มีแต่ช่วงวันที่ ใช้ GSI1 ทุก status แทนการ scan
+    if filters['created_from'] or filters['created_to']:
+        print("[PLAN] gsi1_status_fanout")
+        items, next_key = collect_status_fanout(filters, predicate, read_params, page_size, start_key)
+        return items, next_key, 'gsi1_status_fanout'
+    
+    if use_scan_cache:
+        # Scan ทั้งตาราง (แบบขนาน) ครั้งเดียวแล้วเก็บไว้ใช้กับคำค้นอื่นใน generation เดียวกัน
+        print("[PLAN] parallel_scan (caching)")
+        raw_items, _ = parallel_scan.scan(table)
+        SCAN_CACHE.put(generation, raw_items)
+        return [item for item in raw_items if predicate(item)], None, 'parallel_scan'
+    
+    scan_params = dict(read_params, FilterExpression=filter_expression(filters))
+    if start_key and not parallel_scan.is_cursor(start_key):
+        # next_token จาก scan ทีละหน้าแบบเดิม อ่านต่อแบบเดิมให้จบ
+        print("[PLAN] scan")
+        items, next_key = collect_matches(table.scan, scan_params, TABLE_KEY_ATTRS, predicate, page_size, start_key)
+        return items, next_key, 'scan'
+    
+    # Scan ทั้งตารางแบบขนาน — กรองระหว่างอ่านและหยุดทุก segment เมื่อได้ครบ page_size
+    print("[PLAN] parallel_scan")
+    items, next_key = parallel_scan.scan(table, scan_params, predicate, page_size, start_key)
+    return items, next_key, 'parallel_scan'
+
+
+def iter_ordered(filters, read_params, start_key=None):
+    """อ่าน item เรียงตาม created_at จากใหม่ไปเก่าจาก GSI โดยตรง (sort key ของ GSI คือเวลาสร้าง)
+
+    category -> GSI2, status -> GSI1, นอกนั้น -> GSI1 ทุก status แล้ว merge
+    คืน (ชื่อ plan, iterator ของ (item, resume_key))
+    """
+    index_plan = plan_index_query(filters, read_params)
+    if index_plan:
+        plan, params, key_attrs = index_plan
+        return plan, iter_items(clients.table().query, params, key_attrs, start_key)
+    return 'gsi1_status_fanout', iter_status_fanout(filters, read_params, start_key)
+
+
+def parse_filters(body):
+    """อ่านเงื่อนไขค้นหาทั้งหมดจาก body (ค่าที่ไม่ได้ส่งมาเป็น '')"""
+    filters = {
+        'keyword': str(body.get('keyword', '')).strip(),
+        'location': str(body.get('location', '')).strip(),
+        'date': str(body.get('date', '')).strip(),
+        'more_details': str(body.get('moreDetails', '')).strip(),
+        'status': str(body.get('status', '')).strip(),
+        'category': str(body.get('category', '')).strip(),
+        'item_type': str(body.get('item_type', '')).strip().upper(),
+        'created_from': str(body.get('created_from', '')).strip(),
+        'created_to': str(body.get('created_to', '')).strip(),
+    }
+    if filters['item_type'] and filters['item_type'] not in ['FOUND', 'LOST']:
+        raise ValueError(f"Invalid item_type: {filters['item_type']}")
+    # วันที่อย่างเดียว (YYYY-MM-DD) ให้รวมทั้งวันนั้น
+    if len(filters['created_to']) == 10:
+        filters['created_to'] += 'T23:59:59.999999'
+    return filters
+
+
+def parse_projection(body):
+    """fields (รายชื่อ attribute) หรือ view (card/detail/admin) — ไม่ส่งมาเลยได้ item เต็มแบบเดิม"""
+    fields = body.get('fields')
+    if fields:
+        if isinstance(fields, str):
+            fields = [f.strip() for f in fields.split(',') if f.strip()]
+        unknown = [f for f in fields if f not in ADMIN_ATTRS]
+        if unknown:
+            raise ValueError(f"Invalid fields: {', '.join(map(str, unknown))}")
+        return list(dict.fromkeys(fields))
+    view = body.get('view')
+    if not view:
+        return None
+    if view not in VIEWS:
+        raise ValueError(f'Invalid view: {view}')
+    return VIEWS[view]
+
+
+def parse_page_size(body):
+    """คืน None (อ่านทั้งหมดแบบเดิม) ถ้า client ไม่ได้ขอแบ่งหน้า"""
+    requested = body.get('page_size')
+    if requested in (None, ''):
+        return PAGE_SIZE if body.get('next_token') else None
+    try:
+        requested = int(requested)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid page_size: {requested}')
+    if requested <= 0:
+        raise ValueError(f'Invalid page_size: {requested}')
+    return min(requested, MAX_PAGE_SIZE)
+
+
+# ✅ ผลจับคู่ LOST <-> FOUND ของ item เดียว (อ่านจาก item โดยตรง ไม่ต้องค้นทั้งตาราง)
+@router.route('matches')
+def matches_response(body):
+    item_id = body.get('item_id')
+    if not item_id:
+        return error_response('Missing item_id', 400)
+    try:
+        projection = parse_projection(body) or CARD_ATTRS
+    except ValueError as ve:
+        return error_response(str(ve), 400)
+    
+    table = clients.table()
+    key = item_keys.key_for(item_id)
+    if key:
+        item = table.get_item(Key=key).get('Item')
+    else:
+        condition = Key('item_id').eq(item_id) & Key('item_type').between(*item_keys.ITEM_TYPES)
+        found = table.query(KeyConditionExpression=condition, Limit=1).get('Items', [])
+        item = found[0] if found else None
+    if not item:
+        return error_response('Item not found', 404)
+    
+    matches = item.get('matches', [])
+    scores = {m['item_id']: m['score'] for m in matches}
+    candidates = {m['item_id']: m['item_type'] for m in matches}
+    matched_items, _ = collect_candidates(candidates, lambda i: True, projection=projection)
+    matched_items = shape_items(matched_items, projection)
+    for matched in matched_items:
+        matched['match_score'] = scores.get(matched['item_id'])
+    matched_items.sort(key=lambda m: m['match_score'] or 0, reverse=True)
+    metrics.count('ItemsReturned', len(matched_items))
+    
+    return success_response(item_id=item_id, count=len(matched_items), items=matched_items)
+
+
+# ✅ ค้นหาด้วยเลขเคส (F123456 / L123456) ผ่าน GSI3: ตรงตัว = Query ครั้งเดียว, ขึ้นต้นด้วย = key range
+# ไม่ส่ง view/fields มาได้ view card (ไม่มีข้อมูลผู้แจ้ง)
+@router.route('lookup_case')
+def lookup_case(body):
+    case_id = str(body.get('case_id', '')).strip().upper()
+    next_token = body.get('next_token') or ''
+    try:
+        if not item_keys.CASE_ID_PATTERN.match(case_id) and not item_keys.CASE_PREFIX_PATTERN.match(case_id):
+            raise ValueError(f'Invalid case_id: {case_id}')
+        projection = parse_projection(body) or CARD_ATTRS
+        page_size = parse_page_size(body) or PAGE_SIZE
+        start_key = decode_token(next_token) if next_token else None
+    except ValueError as ve:
+        return error_response(str(ve), 400)
+    
+    exact = bool(item_keys.CASE_ID_PATTERN.match(case_id))
+    pk = item_keys.case_index_keys(case_id)['gsi3_pk']
+    condition = Key('gsi3_pk').eq(pk)
+    if exact:
+        condition &= Key('gsi3_sk').eq(case_id)
+    elif len(case_id) > 1:
+        condition &= Key('gsi3_sk').begins_with(case_id)
+    params = dict(projection_params(projection), IndexName=item_keys.CASE_INDEX,
+                  KeyConditionExpression=condition, Limit=page_size)
+    if start_key:
+        params['ExclusiveStartKey'] = {k: start_key[k] for k in GSI3_KEY_ATTRS if k in start_key}
+    response = clients.table().query(**params)
+    items = shape_items(response.get('Items', []), projection)
+    last_key = response.get('LastEvaluatedKey')
+    metrics.set_property('plan', 'case_exact' if exact else 'case_prefix')
+    metrics.count('ItemsReturned', len(items))
+    
+    return success_response(
+        case_id=case_id,
+        count=len(items),
+        items=items,
+        next_token=encode_token(last_key) if last_key and not exact else None
+    )
+
+
+# ✅ delta sync: เฉพาะ item ที่สร้าง/แก้/ลบหลัง cursor (cursor มากับผลค้นหาแบบ stream และแบบปกติ)
+# items = item ที่ตรงเงื่อนไขค้นหาเดิม, deleted = item_id ที่ถูกลบหรือไม่ตรงเงื่อนไขแล้ว
+# ไม่ตัดหน้ากลางกลุ่มที่ updated_at เท่ากัน (batch action ใช้เวลาเดียวกันทั้งชุด) — มี next_token ให้ขอต่อทันที
+# reset=True: cursor เก่าเกินอายุ tombstone ให้โหลดรายการใหม่ทั้งหมด
+@router.route('changes_since')
+def changes_since(body):
+    next_token = body.get('next_token') or ''
+    try:
+        if not body.get('cursor'):
+            raise ValueError('Missing cursor')
+        cursor = changes.parse_cursor(body['cursor'])
+        filters = parse_filters(body)
+        projection = parse_projection(body)
+        page_size = parse_page_size(body) or MAX_PAGE_SIZE
+        after = changes.parse_cursor(decode_token(next_token).get('changes_after')) if next_token else None
+    except ValueError as ve:
+        return error_response(str(ve), 400)
+    
+    if changes.expired(cursor):
+        metrics.set_property('plan', 'changes_reset')
+        return success_response(reset=True, count=0, items=[], deleted=[], cursor=None, next_token=None)
+    
+    read_attrs = list(projection) + ['updated_at', 'deleted_type'] if projection else None
+    read_params = dict(projection_params(read_attrs), Limit=READ_BATCH_SIZE)
+    since = after or changes.read_from(cursor)
+    
+    items, deleted = [], []
+    last_change = None
+    has_more = False
+    with metrics.span('find_items'):
+        for item in changes.iter_changes(clients.table(), since, read_params):
+            if len(items) + len(deleted) >= page_size and item['updated_at'] != last_change:
+                has_more = True
+                break
+            last_change = item['updated_at']
+            if item['item_type'] != changes.TOMBSTONE_TYPE and matches_filters(item, filters):
+                items.append(item)
+            else:
+                deleted.append(item['item_id'])
+    metrics.set_property('plan', 'gsi4_changes')
+    metrics.count('ItemsReturned', len(items) + len(deleted))
+    
+    # ไม่มีอะไรเปลี่ยน: คง cursor เดิม (ไม่เลื่อนเป็นเวลาปัจจุบัน เพราะ GSI อาจยังไม่เห็นการเขียนล่าสุด)
+    next_cursor = last_change or after or cursor
+    # next_token ใช้ key changes_after ('after' เป็นของ next_token ผลใน memory ที่ decode_token ตรวจรูปแบบไว้)
+    return success_response(
+        reset=False,
+        count=len(items),
+        items=shape_items(items, projection),
+        deleted=list(dict.fromkeys(deleted)),
+        cursor=next_cursor,
+        next_token=encode_token({'changes_after': next_cursor}) if has_more else None
+    )
+
+
+# ✅ ผลค้นหาขนาดใหญ่ (หน้า admin): NDJSON ทีละ chunk เรียงตามเวลาจาก index ไม่ต้องเก็บทั้งหมดใน memory
+@router.route('stream')
+def stream_search(body):
+    next_token = body.get('next_token') or ''
+    try:
+        filters = parse_filters(body)
+        projection = parse_projection(body)
+        chunk_size = parse_page_size(body) or STREAM_CHUNK_SIZE
+        start_key = decode_token(next_token) if next_token else None
+    except ValueError as ve:
+        return error_response(str(ve), 400)
+    
+    # cursor สำหรับ changes_since: เวลาก่อนเริ่มอ่าน (client เก็บของหน้าแรกไว้)
+    sync_cursor = changes.now()
+    read_params = dict(projection_params(projection), Limit=READ_BATCH_SIZE)
+    plan, source = iter_ordered(filters, read_params, start_key)
+    print(f"[PLAN] stream {plan}: chunk_size={chunk_size}")
+    
+    filter_timer = metrics.Stopwatch('filter', 'ItemsFiltered')
+    encode_timer = metrics.Stopwatch('json_encode')
+    predicate = filter_timer.wrap(lambda item: matches_filters(item, filters))
+    encode = encode_timer.wrap(dumps)
+    
+    # หยุดอ่านทันทีที่ครบ chunk หรือ body ใกล้ถึงขีดจำกัด แล้วให้ client ขอ chunk ถัดไปด้วย next_token
+    lines = []
+    size = 0
+    next_key = None
+    with metrics.span('find_items'):
+        for item, resume_key in source:
+            if not predicate(item):
+                continue
+            line = encode(shape_items([item], projection)[0])
+            lines.append(line)
+            size += len(line.encode('utf-8')) + 1
+            if len(lines) >= chunk_size or size >= STREAM_MAX_BYTES:
+                next_key = resume_key
+                break
+    filter_timer.record()
+    encode_timer.record()
+    metrics.set_property('plan', plan)
+    metrics.count('ItemsReturned', len(lines))
+    
+    return ndjson_response(lines, {
+        'status': 'success',
+        'count': len(lines),
+        'plan': plan,
+        'cursor': sync_cursor,
+        'next_token': encode_token(next_key) if next_key else None
+    })
+
+
+def lambda_handler(event, context):
+    return router.dispatch(event, context)
+
+
+@router.fallback
+def search(body):
+    print(f"Search params: {body}")
+    
+    # ⚠️ รับตัวแปรทั้งหมด (เพิ่ม status และ search_mode)
+    search_mode = body.get('search_mode', '')  # ✅ เพิ่มใหม่
+    next_token = body.get('next_token') or ''
+    
+    try:
+        filters = parse_filters(body)
+        projection = parse_projection(body)
+        page_size = parse_page_size(body) or PAGE_SIZE
+        start_key = decode_token(next_token) if next_token else None
+    except ValueError as ve:
+        return error_response(str(ve), 400)
+    
+    print(f"search_mode: {search_mode}, status: {filters['status']}, page_size: {page_size}")
+    
+    # เวลากรองรวมทุก item บันทึกเป็น span 'filter' (จำนวน item ที่ตรวจ = ItemsFiltered)
+    filter_timer = metrics.Stopwatch('filter', 'ItemsFiltered')
+    
+    @filter_timer.wrap
+    def predicate(item):
+        return matches_filters(item, filters)
+    
+    # ✅ cache ผูกกับ generation — ถ้าอ่าน generation ไม่ได้ก็ข้าม cache ไป
+    generation = None
+    try:
+        generation = result_cache.current_generation(clients.table())
+    except Exception as gen_error:
+        print(f"[WARN] Cache generation read failed: {gen_error}")
+    
+    cache_key = (
+        generation, page_size, next_token, tuple(projection or ()),
+        tuple(normalize_text(v) if k in ('keyword', 'location', 'more_details') else v
+              for k, v in sorted(filters.items()))
+    )
+    cached = RESULT_CACHE.get(cache_key) if generation is not None else None
+    if cached is not None:
+        print(f"[CACHE] Result hit (generation {generation})")
+        filtered_items, next_key, plan, sync_cursor = cached
+    else:
+        # cursor สำหรับ changes_since: เวลาก่อนเริ่มอ่าน (ผลจาก cache ใช้ cursor ของตอนที่อ่านจริง)
+        sync_cursor = changes.now()
+        with metrics.span('find_items'):
+            filtered_items, next_key, plan = find_items(
+                filters, predicate, page_size, start_key, generation, projection)
+        filter_timer.record()
+        # เรียงตามวันที่ล่าสุด
+        with metrics.span('sort'):
+            filtered_items.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+        if generation is not None:
+            RESULT_CACHE.put(cache_key, (filtered_items, next_key, plan, sync_cursor))
+    metrics.set_property('plan', plan)
+    metrics.set_property('cache_hit', cached is not None)
+    metrics.count('ItemsReturned', len(filtered_items))
+    
+    # จำนวนแยกตามประเภท/สถานะใช้ action stats ของ Admin_Update (ตัวนับสำเร็จรูป) ไม่ต้องนับซ้ำที่นี่
+    print(f"Final result: {len(filtered_items)} items")
+    
+    with metrics.span('shape'):
+        items = shape_items(filtered_items, projection)
+    result = {
+        'count': len(filtered_items),
+        'items': items,
+        'plan': plan,
+        'ordered': plan in ORDERED_PLANS,
+        'cursor': sync_cursor,
+        'page_size': page_size,
+        'next_token': encode_token(next_key) if next_key else None,
+    }
+    return success_response(**result)
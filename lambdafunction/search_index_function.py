@@ -0,0 +1,14 @@
+from lostfound_core import metrics, search_index
+
+# worker ของ n-gram index (SEARCH_INDEX_WORKER_FUNCTION): handler ที่เขียน item invoke แบบ async ด้วย
+# {'jobs': [{'item': {...}, 'previous': {...}}]} — item มีเฉพาะ field ใน search_index.INDEXED_FIELDS
+# ถ้าล้มเหลว Lambda retry async invoke ให้เอง 2 ครั้ง (index_item เขียนซ้ำได้ไม่มีผลข้างเคียง)
+
+
+@metrics.traced('search_index_function')
+def lambda_handler(event, context):
+    jobs = event.get('jobs', [])
+    for job in jobs:
+        search_index.index_item(job['item'], previous=job.get('previous'))
+    print(f"[SUCCESS] Indexed {len(jobs)} items")
+    return {'indexed': len(jobs)}
@@ -0,0 +1,14 @@
+from lostfound_core import clients, metrics, snapshot
+
+# สร้าง snapshot ของผลค้นหา (lostfound_core/snapshot.py) ใหม่จากตารางหลัก
+# ตั้งเวลาเรียกด้วย EventBridge schedule (เช่น ทุก 15 นาที) — ถ้าไม่มีการเขียนตั้งแต่ครั้งก่อน (generation เดิม) จะข้าม
+# ระหว่างรอบ search-items-function ไล่ตามการเขียนจาก GSI4 เอง จึงไม่ต้องเรียกหลังทุกการเขียน
+# event {"force": true} สร้างใหม่แม้ generation ไม่เปลี่ยน, {"segments": 8} กำหนดจำนวน segment ของ scan
+
+
+@metrics.traced('search_snapshot_function')
+def lambda_handler(event, context):
+    event = event or {}
+    segments = int(event['segments']) if event.get('segments') else None
+    result = snapshot.build(clients.table(), force=bool(event.get('force')), segments=segments)
+    return {'status': 'success', **result}
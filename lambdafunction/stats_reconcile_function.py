@@ -0,0 +1,13 @@
+from lostfound_core import clients, metrics, stats
+
+# นับตัวนับของ dashboard (lostfound_core/stats.py) ใหม่ทั้งหมดจากตารางหลักด้วย parallel scan
+# ตั้งเวลาเรียกด้วย EventBridge schedule ช่วงที่ใช้งานน้อย (เช่น วันละครั้งตอนตี 3)
+# event {"segments": 8} กำหนดจำนวน segment ของ scan ได้ (ค่าเริ่มต้น STATS_SCAN_SEGMENTS หรือตามขนาดตาราง)
+
+
+@metrics.traced('stats_reconcile_function')
+def lambda_handler(event, context):
+    segments = int((event or {}).get('segments', stats.SCAN_SEGMENTS))
+    result = stats.rebuild(clients.table(), segments)
+    print(f"[SUCCESS] Reconciled stats: {result}")
+    return {'status': 'success', **result}
@@ -0,0 +1,80 @@
+import os
+import sys
+import json
+import importlib.util
+
+import pytest
+
+LAMBDA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, LAMBDA_DIR)
+
+# moto ต้องมี credential/region (ค่าปลอม) ก่อนสร้าง client
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+
+boto3 = pytest.importorskip('boto3')
+moto = pytest.importorskip('moto')
+
+from lostfound_core import clients, parallel_scan, search_index, snapshot  # noqa: E402
+
+# ตารางเดียวกับที่ใช้จริง (Database/) ใน moto: key หลัก + GSI1-4
+KEY_ATTRS = ('item_id', 'item_type', 'gsi1_pk', 'gsi1_sk', 'gsi2_pk', 'gsi2_sk', 'gsi3_pk', 'gsi3_sk', 'updated_at')
+INDEXES = {'GSI1': ('gsi1_pk', 'gsi1_sk'), 'GSI2': ('gsi2_pk', 'gsi2_sk'),
+           'GSI3': ('gsi3_pk', 'gsi3_sk'), 'GSI4': ('item_type', 'updated_at')}
+
+
+def create_tables():
+    ddb = boto3.resource('dynamodb', region_name=clients.REGION)
+    table = ddb.create_table(
+        TableName=clients.DYNAMODB_TABLE_NAME,
+        KeySchema=[{'AttributeName': 'item_id', 'KeyType': 'HASH'}, {'AttributeName': 'item_type', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[{'AttributeName': name, 'AttributeType': 'S'} for name in KEY_ATTRS],
+        BillingMode='PAY_PER_REQUEST',
+        GlobalSecondaryIndexes=[{
+            'IndexName': name,
+            'KeySchema': [{'AttributeName': pk, 'KeyType': 'HASH'}, {'AttributeName': sk, 'KeyType': 'RANGE'}],
+            'Projection': {'ProjectionType': 'ALL'},
+        } for name, (pk, sk) in INDEXES.items()],
+    )
+    ddb.create_table(
+        TableName=search_index.SEARCH_INDEX_TABLE_NAME,
+        KeySchema=[{'AttributeName': 'gram', 'KeyType': 'HASH'}, {'AttributeName': 'item_id', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[{'AttributeName': 'gram', 'AttributeType': 'S'},
+                              {'AttributeName': 'item_id', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    boto3.client('s3', region_name=clients.REGION).create_bucket(Bucket=clients.S3_BUCKET_NAME)
+    return table
+
+
+def reset_state():
+    """ล้าง state ระดับ container ของ lostfound_core (client, cache) ระหว่าง test"""
+    clients.reset()
+    parallel_scan._segment_counts.clear()
+    search_index._built, search_index._built_checked_at = False, None
+    snapshot._current, snapshot._checked_at = None, None
+
+
+@pytest.fixture
+def table():
+    """ตาราง Items_TU ว่าง ๆ ใน moto (พร้อม index table และ bucket รูป)"""
+    with moto.mock_aws():
+        reset_state()
+        yield create_tables()
+        reset_state()
+
+
+def load_handler(filename):
+    """โหลดไฟล์ handler ใหม่ทุกครั้ง (ชื่อไฟล์มี '-' import ตรง ๆ ไม่ได้ และ cache ระดับ module ไม่ค้างข้าม test)"""
+    name = os.path.splitext(filename)[0].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, os.path.join(LAMBDA_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def post(handler, body):
+    """เรียก handler แบบ API Gateway (HTTP API) คืน (statusCode, body ที่ถอด JSON แล้ว)"""
+    response = handler.lambda_handler({'requestContext': {'http': {'method': 'POST'}}, 'body': json.dumps(body)}, None)
+    return response['statusCode'], json.loads(response['body'])
@@ -0,0 +1,79 @@
+import pytest
+
+from conftest import load_handler, post
+from lostfound_core import clients, image_upload, item_model, search_index, stats
+
+KEY = 'found/2026-10-01/legacy.jpg'
+
+
+@pytest.fixture
+def admin(table):
+    records = []
+    for i in range(3):
+        created = f'2026-10-0{i + 1}T09:00:00'
+        record = item_model.ItemRecord(
+            item_id=f'ITEM#{1790000000 + i}-{i:08x}#FOUND', item_type='FOUND', case_id=f'F00000{i}',
+            status='แจ้งแล้ว', created_at=created, updated_at=created, category='บัตร', brand='บัตรนักศึกษา',
+            details='ชื่อ สมชาย', location='SC3', date=created[:10])
+        records.append(record.to_item())
+    records[0]['image_url'] = image_upload.image_url_for(KEY)
+    clients.s3().put_object(Bucket=clients.S3_BUCKET_NAME, Key=KEY, Body=b'jpeg')
+    for item in records:
+        table.put_item(Item=item)
+        search_index.index_item(item)
+    stats.record_all(table, [(None, item) for item in records])
+    return load_handler('Admin_Update.py'), [item['item_id'] for item in records]
+
+
+def item(table, item_id):
+    return table.get_item(Key={'item_id': item_id, 'item_type': 'FOUND'}).get('Item')
+
+
+def test_batch_change_status(admin, table):
+    handler, ids = admin
+    status, body = post(handler, {'action': 'batch_change_status', 'status': 'รอรับคืน',
+                                  'item_ids': ids[:2] + ['ITEM#1-0#FOUND']})
+    assert status == 200
+    assert (body['status'], body['succeeded'], body['failed']) == ('partial', 2, 1)
+    assert body['results'][2] == {'item_id': 'ITEM#1-0#FOUND', 'status': 'error', 'error': 'Item not found',
+                                  'retryable': False}
+    assert [item(table, i)['status'] for i in ids] == ['รอรับคืน', 'รอรับคืน', 'แจ้งแล้ว']
+    assert item(table, ids[0])['gsi1_pk'] == 'STATUS#รอรับคืน'
+    counts = stats.read(table)
+    assert counts['by_status']['รอรับคืน'] == 2
+    assert counts['by_status']['แจ้งแล้ว'] == 1
+
+
+def test_batch_change_status_rejects_unknown_status(admin):
+    handler, ids = admin
+    status, body = post(handler, {'action': 'batch_change_status', 'status': 'หาย', 'item_ids': ids})
+    assert status == 400
+    assert body['error'] == 'Invalid status: หาย'
+
+
+def test_batch_delete_removes_items_images_and_postings(admin, table):
+    handler, ids = admin
+    status, body = post(handler, {'action': 'batch_delete', 'item_ids': ids[:2]})
+    assert status == 200
+    assert body['succeeded'] == 2
+    assert [item(table, i) is None for i in ids] == [True, True, False]
+    assert 'Contents' not in clients.s3().list_objects_v2(Bucket=clients.S3_BUCKET_NAME, Prefix=KEY)
+    assert set(search_index.lookup('keyword', 'สมชาย')) == {ids[2]}
+    assert stats.read(table)['total'] == 1
+
+
+def test_unprocessed_keys_are_reported_retryable(admin, table, monkeypatch):
+    handler, ids = admin
+    monkeypatch.setattr(clients, 'backoff', lambda attempt: None)
+    ddb = clients.dynamodb()
+
+    class Throttled:
+        def batch_get_item(self, RequestItems):
+            return {'Responses': {}, 'UnprocessedKeys': RequestItems}
+
+    monkeypatch.setattr(clients, 'dynamodb', lambda: Throttled())
+    status, body = post(handler, {'action': 'batch_delete', 'item_ids': ids[:1]})
+    monkeypatch.setattr(clients, 'dynamodb', lambda: ddb)
+    assert status == 200
+    assert body['results'][0]['retryable'] is True
+    assert item(table, ids[0]) is not None
@@ -0,0 +1,68 @@
+import pytest
+
+from conftest import load_handler, post
+from lostfound_core import item_model
+
+CASES = ('F123450', 'F123451', 'F123452', 'F123459', 'F124000', 'L123451')
+
+
+@pytest.fixture
+def search(table):
+    with table.batch_writer() as batch:
+        for i, case_id in enumerate(CASES):
+            item_type = 'FOUND' if case_id[0] == 'F' else 'LOST'
+            created = f'2025-03-{i + 1:02d}T10:00:00'
+            record = item_model.ItemRecord(
+                item_id=f'ITEM#{1740787200 + i}-{i:08x}#{item_type}', item_type=item_type, case_id=case_id,
+                status='ยังไม่ได้รับคืน' if item_type == 'FOUND' else 'ยังไม่พบ',
+                created_at=created, updated_at=created, category='บัตร', brand='-', details='บัตรนักศึกษา',
+                location='SC3', reporter_name='สมชาย', reporter_contact='0811111111')
+            batch.put_item(Item=record.to_item())
+    return load_handler('search-items-function.py')
+
+
+def case_ids(body):
+    return sorted(item['case_id'] for item in body['items'])
+
+
+def test_exact_case_id(search):
+    status, body = post(search, {'search_mode': 'lookup_case', 'case_id': ' f123451 '})
+    assert status == 200
+    assert body['case_id'] == 'F123451'
+    assert case_ids(body) == ['F123451']
+    assert body['next_token'] is None
+    # ไม่ส่ง view มาได้ view card: ไม่มีข้อมูลผู้แจ้ง
+    assert 'reporter_contact' not in body['items'][0]
+
+
+def test_exact_case_id_not_found(search):
+    status, body = post(search, {'search_mode': 'lookup_case', 'case_id': 'L999999'})
+    assert status == 200
+    assert body['count'] == 0
+
+
+def test_prefix_pages_through_key_range(search):
+    seen, request = [], {'search_mode': 'lookup_case', 'case_id': 'F1234', 'page_size': 2}
+    for _ in range(5):
+        status, body = post(search, request)
+        assert status == 200
+        assert body['count'] <= 2
+        seen += case_ids(body)
+        if not body['next_token']:
+            break
+        request = dict(request, next_token=body['next_token'])
+    assert sorted(seen) == ['F123450', 'F123451', 'F123452', 'F123459']
+
+
+def test_type_prefix_lists_one_type(search):
+    status, body = post(search, {'search_mode': 'lookup_case', 'case_id': 'L', 'view': 'admin'})
+    assert status == 200
+    assert case_ids(body) == ['L123451']
+    assert body['items'][0]['reporter_contact'] == '0811111111'
+
+
+@pytest.mark.parametrize('case_id', ['', 'X123456', 'F1234567', 'F12a', '123456'])
+def test_invalid_case_id(search, case_id):
+    status, body = post(search, {'search_mode': 'lookup_case', 'case_id': case_id})
+    assert status == 400
+    assert body['error'] == f'Invalid case_id: {case_id.upper()}'
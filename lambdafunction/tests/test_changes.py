@@ -0,0 +1,100 @@
+import datetime
+
+import pytest
+
+from conftest import load_handler, post
+from lostfound_core import changes, item_model
+
+NOW = datetime.datetime.utcnow().replace(microsecond=0)
+CURSOR = (NOW - datetime.timedelta(minutes=10)).isoformat()
+
+
+def at(minutes):
+    return (NOW - datetime.timedelta(minutes=minutes)).isoformat()
+
+
+def record(i, item_type, updated_at):
+    return item_model.ItemRecord(
+        item_id=f'ITEM#{1740787200 + i}-{i:08x}#{item_type}', item_type=item_type, case_id=f'{item_type[0]}{300000 + i}',
+        status='ยังไม่ได้รับคืน' if item_type == 'FOUND' else 'ยังไม่พบ', created_at=at(60), updated_at=updated_at,
+        category='บัตร', brand='-', details='บัตรนักศึกษา', location='SC3').to_item()
+
+
+@pytest.fixture
+def search(table):
+    with table.batch_writer() as batch:
+        batch.put_item(Item=record(0, 'FOUND', at(60)))    # ก่อน cursor
+        batch.put_item(Item=record(1, 'FOUND', at(5)))
+        batch.put_item(Item=record(2, 'LOST', at(4)))
+        # batch action: updated_at เดียวกันทั้งชุด
+        for i in range(3, 6):
+            batch.put_item(Item=record(i, 'FOUND', at(3)))
+    changes.record_deleted(table, [{'item_id': 'ITEM#1740787299-00000063#FOUND', 'item_type': 'FOUND'}], at(2))
+    return load_handler('search-items-function.py')
+
+
+def changed(body):
+    return [item['item_id'] for item in body['items']]
+
+
+def test_changes_since_returns_items_and_tombstones(search):
+    status, body = post(search, {'search_mode': 'changes_since', 'cursor': CURSOR})
+    assert status == 200
+    assert body['reset'] is False
+    assert changed(body) == [record(i, t, '')['item_id'] for i, t in
+                             [(1, 'FOUND'), (2, 'LOST'), (3, 'FOUND'), (4, 'FOUND'), (5, 'FOUND')]]
+    assert body['deleted'] == ['ITEM#1740787299-00000063#FOUND']
+    assert body['cursor'] == at(2)
+    assert body['next_token'] is None
+
+
+def test_item_no_longer_matching_filters_is_deleted(search):
+    status, body = post(search, {'search_mode': 'changes_since', 'cursor': CURSOR, 'item_type': 'found'})
+    assert status == 200
+    assert record(2, 'LOST', '')['item_id'] in body['deleted']
+    assert all(item['item_type'] == 'FOUND' for item in body['items'])
+
+
+def test_pages_do_not_split_same_timestamp(search):
+    request = {'search_mode': 'changes_since', 'cursor': CURSOR, 'page_size': 2}
+    status, first = post(search, request)
+    assert status == 200
+    assert len(changed(first)) == 2
+    assert first['next_token']
+
+    status, second = post(search, dict(request, next_token=first['next_token']))
+    assert status == 200
+    # ทั้งชุดที่ updated_at เท่ากันมาในหน้าเดียว แม้เกิน page_size
+    assert changed(second) == [record(i, 'FOUND', '')['item_id'] for i in range(3, 6)]
+    assert second['next_token']
+
+    status, third = post(search, dict(request, next_token=second['next_token']))
+    assert third['items'] == []
+    assert third['deleted'] == ['ITEM#1740787299-00000063#FOUND']
+    assert third['next_token'] is None
+    assert third['cursor'] == at(2)
+
+
+def test_nothing_changed_keeps_cursor(search):
+    status, body = post(search, {'search_mode': 'changes_since', 'cursor': NOW.isoformat()})
+    assert status == 200
+    assert body['count'] == 0
+    assert body['cursor'] == NOW.isoformat()
+
+
+def test_expired_cursor_resets(search):
+    old = (NOW - datetime.timedelta(seconds=changes.TOMBSTONE_TTL_SECONDS + 60)).isoformat()
+    status, body = post(search, {'search_mode': 'changes_since', 'cursor': old})
+    assert status == 200
+    assert body['reset'] is True
+    assert body['cursor'] is None
+
+
+@pytest.mark.parametrize('cursor, error', [(None, 'Missing cursor'), ('yesterday', 'Invalid cursor: yesterday')])
+def test_bad_cursor(search, cursor, error):
+    request = {'search_mode': 'changes_since'}
+    if cursor:
+        request['cursor'] = cursor
+    status, body = post(search, request)
+    assert status == 400
+    assert body['error'] == error
@@ -0,0 +1,78 @@
+import datetime
+
+import pytest
+
+from conftest import load_handler
+from lostfound_core import clients, image_upload, item_model
+
+OLD = (datetime.datetime.utcnow() - datetime.timedelta(days=120)).isoformat()
+NEW = (datetime.datetime.utcnow() - datetime.timedelta(days=5)).isoformat()
+OWN_KEY = 'found/2025-01-01/own.jpg'
+SHARED_KEY = 'found/sha256/' + 'cd' * 32 + '.jpg'
+
+
+def put(table, n, created, image_key=None, status='รอรับคืน'):
+    record = item_model.ItemRecord(
+        item_id=f'ITEM#{1735689600 + n}-{n:08x}#FOUND', item_type='FOUND', case_id=f'F10000{n}', status=status,
+        created_at=created, updated_at=created, category='บัตร', details='บัตรนักศึกษา', location='SC3',
+        date=created[:10], image_url=image_upload.image_url_for(image_key) if image_key else None)
+    table.put_item(Item=record.to_item())
+    return record.item_id
+
+
+@pytest.fixture
+def sweeper(table, monkeypatch):
+    s3 = clients.s3()
+    for key in (OWN_KEY, SHARED_KEY):
+        for k in [key] + image_upload.variant_keys(key):
+            s3.put_object(Bucket=clients.S3_BUCKET_NAME, Key=k, Body=b'jpeg')
+    table.put_item(Item={'item_id': image_upload.IMAGE_REF_PREFIX + SHARED_KEY, 'item_type': 'META', 'refs': 2})
+    handler = load_handler('expiry_sweeper_function.py')
+    monkeypatch.setattr(handler, 'ARCHIVE_STORAGE_CLASS', 'STANDARD_IA')
+    monkeypatch.setattr(handler, 'MAX_WRITES_PER_SECOND', 10000)
+    return handler
+
+
+def storage_class(key):
+    return clients.s3().head_object(Bucket=clients.S3_BUCKET_NAME, Key=key).get('StorageClass', 'STANDARD')
+
+
+def status(table, item_id):
+    return table.get_item(Key={'item_id': item_id, 'item_type': 'FOUND'})['Item']['status']
+
+
+def test_sweep_expires_old_items_and_archives_unshared_images(sweeper, table):
+    own = put(table, 1, OLD, OWN_KEY)
+    shared = put(table, 2, OLD, SHARED_KEY)
+    recent = put(table, 3, NEW, SHARED_KEY)
+    returned = put(table, 4, OLD, status='คืนเจ้าของแล้ว')
+
+    assert sweeper.lambda_handler({}, None) == {'status': 'success', 'expired': 2, 'complete': True}
+    assert [status(table, i) for i in (own, shared, recent, returned)] == [
+        'หมดอายุ', 'หมดอายุ', 'รอรับคืน', 'คืนเจ้าของแล้ว']
+    assert {storage_class(k) for k in [OWN_KEY] + image_upload.variant_keys(OWN_KEY)} == {'STANDARD_IA'}
+    # item ที่ยังรอรับคืนใช้รูปเดียวกันอยู่
+    assert {storage_class(k) for k in [SHARED_KEY] + image_upload.variant_keys(SHARED_KEY)} == {'STANDARD'}
+
+
+def test_copy_event_does_not_retrigger_resize(sweeper, table):
+    resize = load_handler('image_resize_function.py')
+    event = {'Records': [{'eventName': 'ObjectCreated:Copy', 's3': {'object': {'key': OWN_KEY}}}]}
+    assert resize.lambda_handler(event, None)['processed'] == 0
+
+
+def test_sweep_resumes_from_checkpoint(sweeper, table, monkeypatch):
+    monkeypatch.setattr(sweeper, 'PAGE_SIZE', 1)
+    for n in range(3):
+        put(table, n, OLD)
+
+    class Context:
+        def get_remaining_time_in_millis(self):
+            return 0
+
+    first = sweeper.lambda_handler({}, Context())
+    assert (first['expired'], first['complete']) == (1, False)
+    assert sweeper.load_checkpoint() is not None
+    second = sweeper.lambda_handler({}, None)
+    assert (second['expired'], second['complete']) == (2, True)
+    assert sweeper.load_checkpoint() is None
@@ -0,0 +1,72 @@
+import pytest
+
+from conftest import load_handler, post
+from lostfound_core import clients, image_upload
+
+requests = pytest.importorskip('requests')
+
+FORM = {'category': 'โทรศัพท์', 'brand': 'iPhone 13', 'details': 'เคสใส', 'location': 'SC3', 'date': '2026-10-01',
+        'reporter_name': 'สมหญิง', 'reporter_contact': '0899999999'}
+IMAGE = b'\xff\xd8\xff\xe0' + b'0' * 60
+
+
+@pytest.fixture
+def found(table):
+    return load_handler('found_items_function.py')
+
+
+def found_items(table):
+    return [item for item in table.scan()['Items'] if item['item_type'] == 'FOUND']
+
+
+def test_presigned_post_upload_and_confirm(found):
+    status, upload = post(found, {'action': 'get_upload_url', 'content_type': 'image/jpeg',
+                                  'content_length': len(IMAGE)})
+    assert status == 200
+    assert upload['method'] == 'POST'
+    response = requests.post(upload['upload_url'], data=upload['fields'],
+                             files={'file': ('photo.jpg', IMAGE, 'image/jpeg')})
+    assert response.status_code in (200, 204)
+
+    status, confirmed = post(found, {'action': 'confirm_upload', 'image_key': upload['image_key']})
+    assert status == 200
+    assert confirmed['image_url'] == upload['image_url']
+
+
+def test_confirm_rejects_missing_and_invalid_uploads(found):
+    status, body = post(found, {'action': 'confirm_upload', 'image_key': 'found/2026-10-01/nope.jpg'})
+    assert status == 400
+    assert body['error'].startswith('Invalid image_key') or body['error'].startswith('Image not uploaded')
+
+    _, upload = post(found, {'action': 'get_upload_url', 'content_type': 'image/jpeg'})
+    clients.s3().put_object(Bucket=clients.S3_BUCKET_NAME, Key=upload['image_key'], Body=b'<html>',
+                            ContentType='text/html')
+    status, body = post(found, {'action': 'confirm_upload', 'image_key': upload['image_key']})
+    assert status == 400
+    assert body['error'].startswith('Rejected upload')
+    assert 'Contents' not in clients.s3().list_objects_v2(Bucket=clients.S3_BUCKET_NAME, Prefix=upload['image_key'])
+
+
+@pytest.mark.parametrize('content_length, error', [
+    ('abc', 'Invalid content_length: abc'),
+    ('1e3', 'Invalid content_length: 1e3'),
+    (True, 'Invalid content_length: True'),
+    (0, 'Invalid content_length: 0'),
+    (image_upload.MAX_IMAGE_BYTES + 1, f'Image too large (max {image_upload.MAX_IMAGE_BYTES} bytes)'),
+])
+def test_get_upload_url_rejects_bad_content_length(found, content_length, error):
+    status, body = post(found, {'action': 'get_upload_url', 'content_length': content_length})
+    assert status == 400
+    assert body['error'] == error
+
+
+def test_report_found_with_uploaded_image(found, table):
+    _, upload = post(found, {'action': 'get_upload_url', 'content_type': 'image/jpeg', 'method': 'PUT'})
+    requests.put(upload['upload_url'], data=IMAGE, headers=upload['headers'])
+    status, _ = post(found, dict(FORM, action='report_found', image_key=upload['image_key']))
+    assert status == 200
+    item = found_items(table)[0]
+    assert item['image_key'] == upload['image_key']
+    assert item['image_url'] == upload['image_url']
+    # รูปย่อยังไม่ถูกสร้าง จึงยังไม่มี URL ของรูปย่อ
+    assert 'thumbnail_url' not in item
@@ -0,0 +1,190 @@
+import io
+import json
+import base64
+
+import pytest
+
+from conftest import load_handler, post
+from lostfound_core import clients, image_ingest, image_upload
+
+Image = pytest.importorskip('PIL.Image')
+
+FORM = {'itemDescription': 'กระเป๋าสตางค์', 'lostLocation': 'SC3', 'lostDate': '2026-10-01',
+        'reporterName': 'สมชาย', 'reporterContact': '0811111111'}
+
+
+def jpeg(size=(64, 48), color=(200, 10, 10)):
+    """JPEG ที่มี EXIF (orientation หมุน 90° และชื่อผู้ผลิต)"""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x010f] = 'PhoneMaker'
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'JPEG', exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+def report_with_image(data):
+    handler = load_handler('report-lost-item-function.py')
+    status, body = post(handler, dict(FORM, imageBase64='data:image/jpeg;base64,' + base64.b64encode(data).decode()))
+    assert status == 200, body
+
+
+def lost_item(table):
+    items = [item for item in table.scan()['Items'] if item['item_type'] == 'LOST']
+    assert len(items) == 1
+    return items[0]
+
+
+def refs(table, key):
+    return table.get_item(Key={'item_id': image_upload.IMAGE_REF_PREFIX + key, 'item_type': 'META'})['Item']['refs']
+
+
+@pytest.fixture
+def memory_queue(monkeypatch):
+    monkeypatch.setattr(image_ingest, 'IMAGE_QUEUE_URL', 'memory')
+    image_ingest.memory_queue.messages.clear()
+    yield image_ingest.memory_queue
+    image_ingest.memory_queue.messages.clear()
+
+
+def test_worker_marks_item_ready(table, memory_queue):
+    report_with_image(jpeg())
+    item = lost_item(table)
+    assert item['image_status'] == image_ingest.PENDING
+    assert 'image_url' not in item
+    assert len(memory_queue) == 1
+
+    assert image_ingest.drain() == 1
+    item = lost_item(table)
+    assert item['image_status'] == image_ingest.READY
+    assert item['image_url'] == image_upload.image_url_for(item['image_key'])
+    assert 'image_error' not in item
+    stored = clients.s3().get_object(Bucket=clients.S3_BUCKET_NAME, Key=item['image_key'])['Body'].read()
+    image = Image.open(io.BytesIO(stored))
+    assert image.size == (48, 64)
+    assert not dict(image.getexif())
+    assert refs(table, item['image_key']) == 1
+
+
+def test_invalid_image_marks_item_failed(table, memory_queue):
+    report_with_image(b'not an image')
+    image_ingest.drain()
+    item = lost_item(table)
+    assert item['image_status'] == image_ingest.FAILED
+    assert 'Unreadable image' in item['image_error']
+    assert 'image_url' not in item
+
+
+def test_sqs_worker_retries_then_fails(table, memory_queue, monkeypatch):
+    worker = load_handler('image_ingest_function.py')
+    report_with_image(jpeg())
+    body = memory_queue.messages.popleft()
+
+    def broken(*args, **kwargs):
+        raise RuntimeError('S3 unavailable')
+    monkeypatch.setattr(image_upload, 'store_content', broken)
+    for attempt in range(1, image_ingest.MAX_ATTEMPTS):
+        event = {'Records': [{'messageId': 'm1', 'body': body,
+                              'attributes': {'ApproximateReceiveCount': str(attempt)}}]}
+        assert worker.lambda_handler(event, None) == {'batchItemFailures': [{'itemIdentifier': 'm1'}]}
+        assert lost_item(table)['image_status'] == image_ingest.PENDING
+
+    event = {'Records': [{'messageId': 'm1', 'body': body,
+                          'attributes': {'ApproximateReceiveCount': str(image_ingest.MAX_ATTEMPTS)}}]}
+    assert worker.lambda_handler(event, None) == {'batchItemFailures': []}
+    item = lost_item(table)
+    assert item['image_status'] == image_ingest.FAILED
+    assert item['image_error'] == 'S3 unavailable'
+
+
+def test_duplicate_and_retried_jobs_count_ref_once(table, memory_queue, monkeypatch):
+    report_with_image(jpeg())
+    job = json.loads(memory_queue.messages.popleft())
+    set_status = image_ingest.set_status
+    calls = []
+
+    def flaky(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError('throttled')
+        return set_status(*args, **kwargs)
+    monkeypatch.setattr(image_ingest, 'set_status', flaky)
+    assert not image_ingest.handle(job, 1)
+    assert image_ingest.handle(job, 2)
+    # SQS ส่งงานเดิมซ้ำหลังทำเสร็จแล้ว
+    assert image_ingest.handle(job, 1)
+
+    item = lost_item(table)
+    assert item['image_status'] == image_ingest.READY
+    assert refs(table, item['image_key']) == 1
+
+
+def test_deleted_item_releases_stored_image(table, memory_queue):
+    report_with_image(jpeg(color=(1, 2, 3)))
+    job = json.loads(memory_queue.messages.popleft())
+    table.delete_item(Key={'item_id': job['item_id'], 'item_type': 'LOST'})
+    image_ingest.process(job)
+    assert [item['item_id'] for item in table.scan()['Items'] if item['item_id'].startswith('IMAGE#')] == []
+    assert clients.s3().list_objects_v2(Bucket=clients.S3_BUCKET_NAME, Prefix='lost/').get('KeyCount') == 0
+
+
+def test_no_queue_invokes_worker_async(table, monkeypatch):
+    invoked = []
+
+    class FakeLambda:
+        def invoke(self, **kwargs):
+            invoked.append(kwargs)
+    monkeypatch.setattr(image_ingest, 'IMAGE_QUEUE_URL', '')
+    monkeypatch.setattr(image_ingest, 'IMAGE_WORKER_FUNCTION', 'image_ingest_function')
+    monkeypatch.setattr(clients, 'client', lambda service: FakeLambda())
+    report_with_image(jpeg())
+
+    # request จบโดยยังไม่ได้ประมวลผลรูป
+    assert lost_item(table)['image_status'] == image_ingest.PENDING
+    assert len(invoked) == 1
+    assert invoked[0]['FunctionName'] == 'image_ingest_function'
+    assert invoked[0]['InvocationType'] == 'Event'
+
+    monkeypatch.undo()
+    worker = load_handler('image_ingest_function.py')
+    worker.lambda_handler(json.loads(invoked[0]['Payload']), None)
+    assert lost_item(table)['image_status'] == image_ingest.READY
+
+
+def test_no_queue_and_no_worker_warns(table, monkeypatch, capsys):
+    monkeypatch.setattr(image_ingest, 'IMAGE_QUEUE_URL', '')
+    monkeypatch.setattr(image_ingest, 'IMAGE_WORKER_FUNCTION', '')
+    report_with_image(jpeg())
+    assert '[WARN] IMAGE_QUEUE_URL and IMAGE_WORKER_FUNCTION not set' in capsys.readouterr().out
+    assert lost_item(table)['image_status'] == image_ingest.READY
+
+
+def test_deployed_handler_requires_queue_or_worker(table, monkeypatch):
+    monkeypatch.setenv('AWS_LAMBDA_FUNCTION_NAME', 'report-lost-item-function')
+    monkeypatch.setattr(image_ingest, 'IMAGE_QUEUE_URL', '')
+    monkeypatch.setattr(image_ingest, 'IMAGE_WORKER_FUNCTION', '')
+    with pytest.raises(image_ingest.QueueNotConfigured):
+        load_handler('report-lost-item-function.py')
+
+    monkeypatch.setattr(image_ingest, 'IMAGE_WORKER_FUNCTION', 'image_ingest_function')
+    load_handler('report-lost-item-function.py')
+    monkeypatch.setattr(image_ingest, 'IMAGE_WORKER_FUNCTION', '')
+    monkeypatch.setattr(image_ingest, 'IMAGE_INLINE_LOCAL', True)
+    load_handler('report-lost-item-function.py')
+
+
+@pytest.mark.parametrize('image_base64', ['data:image/jpeg;base64,not base64!!', 'no-header'])
+def test_undecodable_image_is_rejected(table, memory_queue, image_base64):
+    handler = load_handler('report-lost-item-function.py')
+    status, body = post(handler, dict(FORM, imageBase64=image_base64, clientToken='c0ffee00-0000-4000-8000-000000000001'))
+    assert status == 400
+    assert body['error'] == 'Invalid input: Invalid imageBase64'
+    # ไม่ได้จอง token หรือสร้าง item ไว้
+    assert table.scan()['Items'] == []
+    assert len(memory_queue) == 0
+
+
+def test_heic_is_not_accepted():
+    assert 'image/heic' not in image_upload.ALLOWED_CONTENT_TYPES
+    with pytest.raises(image_upload.UploadError):
+        image_upload.new_image_key('lost', 'image/heic')
@@ -0,0 +1,77 @@
+import io
+
+import pytest
+
+from conftest import load_handler, post
+from lostfound_core import clients, image_upload, item_model
+
+Image = pytest.importorskip('PIL.Image')
+
+FORM = {'category': 'กระเป๋า', 'brand': 'Anello', 'details': 'สีเทา', 'location': 'SC3', 'date': '2026-10-01',
+        'reporter_name': 'สมหญิง', 'reporter_contact': '0899999999'}
+
+
+def put_photo(key, size=(1200, 900)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (30, 120, 200)).save(buffer, 'JPEG')
+    clients.s3().put_object(Bucket=clients.S3_BUCKET_NAME, Key=key, Body=buffer.getvalue(), ContentType='image/jpeg')
+
+
+def s3_event(*keys):
+    return {'Records': [{'eventName': 'ObjectCreated:Put', 's3': {'object': {'key': key}}} for key in keys]}
+
+
+def variant_size(key, variant):
+    body = clients.s3().get_object(Bucket=clients.S3_BUCKET_NAME, Key=image_upload.variant_key(key, variant))['Body']
+    return Image.open(io.BytesIO(body.read())).size
+
+
+@pytest.fixture
+def resize(table):
+    return load_handler('image_resize_function.py')
+
+
+def test_trigger_creates_variants_and_attaches_urls(resize, table):
+    found = load_handler('found_items_function.py')
+    _, upload = post(found, {'action': 'get_upload_url', 'content_type': 'image/jpeg', 'method': 'PUT'})
+    key = upload['image_key']
+    put_photo(key)
+    status, _ = post(found, dict(FORM, action='report_found', image_key=key))
+    assert status == 200
+    item = next(i for i in table.scan()['Items'] if i['item_type'] == 'FOUND')
+    assert 'thumbnail_url' not in item
+
+    result = resize.lambda_handler(s3_event(key), None)
+    assert result == {'status': 'success', 'processed': 1, 'attached': 1}
+    for variant, max_side in image_upload.IMAGE_VARIANTS.items():
+        assert max(variant_size(key, variant)) == max_side
+    item = table.get_item(Key={'item_id': item['item_id'], 'item_type': 'FOUND'})['Item']
+    assert item['thumbnail_url'] == image_upload.image_url_for(image_upload.variant_key(key, 'thumbnail'))
+    assert item['medium_url'] == image_upload.image_url_for(image_upload.variant_key(key, 'medium'))
+
+
+def test_trigger_skips_its_own_variants(resize):
+    key = image_upload.variant_key('found/2026-10-01/a.jpg', 'thumbnail')
+    assert resize.lambda_handler(s3_event(key), None)['processed'] == 0
+
+
+def test_backfill_old_items(resize, table):
+    key = 'lost/2026-09-01/old.jpg'
+    put_photo(key)
+    record = item_model.ItemRecord(
+        item_id='ITEM#1756684800-00000001#LOST', item_type='LOST', case_id='L000001', status='แจ้งแล้ว',
+        created_at='2026-09-01T10:00:00', updated_at='2026-09-01T10:00:00', category='กระเป๋า',
+        details='ของเก่า', location='SC3', date='2026-09-01', image_url=image_upload.image_url_for(key))
+    table.put_item(Item=record.to_item())
+
+    assert resize.lambda_handler({'backfill': True}, None)['processed'] == 1
+    item = table.get_item(Key={'item_id': record.item_id, 'item_type': 'LOST'})['Item']
+    assert item['thumbnail_url'] == image_upload.image_url_for(image_upload.variant_key(key, 'thumbnail'))
+    assert resize.lambda_handler({'backfill': True}, None)['processed'] == 0
+
+
+def test_repeated_event_does_not_rebuild_variants(resize):
+    key = 'lost/2026-10-01/photo.jpg'
+    put_photo(key)
+    assert resize.lambda_handler(s3_event(key), None)['processed'] == 1
+    assert resize.lambda_handler(s3_event(key), None)['processed'] == 0
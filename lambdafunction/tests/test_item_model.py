@@ -0,0 +1,105 @@
+import pytest
+
+from lostfound_core import item_model, submissions
+
+FOUND_FORM = {'category': 'บัตร', 'brandName': 'บัตรนักศึกษา', 'details': 'สีฟ้า', 'foundLocation': 'SC3',
+              'foundDate': '2026-10-01', 'foundTime': '13:30', 'reporterName': 'สมหญิง',
+              'reporterContact': '0899999999'}
+LOST_FORM = {'itemDescription': 'กระเป๋าสตางค์', 'brandOrId': 'Nike', 'distinguishingFeatures': 'สีดำ',
+             'lostLocation': 'LC1', 'lostDate': '2026-10-02', 'reporterName': 'สมชาย', 'reporterContact': '0811111111'}
+
+
+def test_form_values_reads_aliases_of_each_type():
+    found = item_model.form_values('FOUND', FOUND_FORM)
+    assert found['brand'] == 'บัตรนักศึกษา'
+    assert found['location'] == 'SC3'
+    assert found['time'] == '13:30'
+    assert found['reporter_student_id'] == ''
+
+    lost = item_model.form_values('LOST', LOST_FORM)
+    assert lost['category'] == 'กระเป๋าสตางค์'
+    assert lost['details'] == 'สีดำ'
+    # ชื่อ field ตรงตัวใช้ได้กับทุกฟอร์ม
+    assert item_model.form_values('LOST', dict(LOST_FORM, location='SC1'))['location'] == 'SC1'
+
+
+@pytest.mark.parametrize('changes, error', [
+    ({'foundLocation': ''}, 'Missing required: location'),
+    ({'foundDate': '01/10/2026'}, 'Invalid date: 01/10/2026'),
+    ({'foundTime': '1pm'}, 'Invalid time: 1pm'),
+    ({'details': 42}, 'Invalid details: must be text'),
+    ({'details': 'x' * (item_model.MAX_TEXT_LENGTH + 1)},
+     f'Invalid details: too long (max {item_model.MAX_TEXT_LENGTH})'),
+])
+def test_form_values_rejects_bad_input(changes, error):
+    with pytest.raises(item_model.InvalidItem) as raised:
+        item_model.form_values('FOUND', dict(FOUND_FORM, **changes))
+    assert str(raised.value) == error
+
+
+def test_new_item_to_item_has_index_keys():
+    submission = submissions.Submission('FOUND', None, 'ITEM#1759300000-0a1b2c3d#FOUND', 'F123456')
+    values = item_model.form_values('FOUND', FOUND_FORM)
+    item = item_model.new_item(submission, values, '2026-10-01T13:35:00').to_item()
+    assert item['status'] == item_model.INITIAL_STATUS
+    assert item['created_at'] == item['updated_at'] == '2026-10-01T13:35:00'
+    assert item['gsi1_pk'] == f'STATUS#{item_model.INITIAL_STATUS}'
+    assert item['gsi2_pk'] == 'CATEGORY#บัตร'
+    assert item['gsi1_sk'] == item['gsi2_sk'] == '2026-10-01T13:35:00'
+    assert (item['gsi3_pk'], item['gsi3_sk']) == ('CASE#F', 'F123456')
+    # field ที่ไม่มีค่าไม่ถูกเขียน
+    assert not set(item_model.IMAGE_FIELDS) & set(item)
+
+
+def test_record_rejects_unknown_field():
+    with pytest.raises(item_model.InvalidItem):
+        item_model.ItemRecord(item_id='ITEM#1#FOUND', gsi1_pk='STATUS#x')
+
+
+def test_update_params_derives_gsi_keys():
+    params = item_model.update_params({'status': 'คืนเจ้าของแล้ว', 'category': 'โทรศัพท์'}, '2026-10-03T09:00:00')
+    values = params['ExpressionAttributeValues']
+    assert values[':gsi1_pk'] == 'STATUS#คืนเจ้าของแล้ว'
+    assert values[':gsi2_pk'] == 'CATEGORY#โทรศัพท์'
+    assert values[':updated_at'] == '2026-10-03T09:00:00'
+    assert params['UpdateExpression'].startswith('SET ')
+    assert set(params['ExpressionAttributeNames'].values()) == {'status', 'category', 'updated_at',
+                                                                 'gsi1_pk', 'gsi2_pk'}
+
+
+@pytest.mark.parametrize('changes', [
+    {'item_id': 'ITEM#2#FOUND'}, {'case_id': 'F000001'}, {'created_at': '2020-01-01'},
+    {'gsi1_pk': 'STATUS#x'}, {'image_url': 'https://example.com/x.jpg'},
+])
+def test_update_params_whitelists_fields(changes):
+    with pytest.raises(item_model.InvalidItem) as raised:
+        item_model.update_params(changes)
+    assert str(raised.value).startswith('Field not editable')
+
+
+def test_update_params_validates_values():
+    with pytest.raises(item_model.InvalidItem):
+        item_model.update_params({'status': 'หาย'})
+    with pytest.raises(item_model.InvalidItem):
+        item_model.update_params({'location': ''})
+
+
+def test_update_params_for_image_fields_can_remove():
+    params = item_model.update_params({'image_status': 'ready'}, allowed=item_model.IMAGE_FIELDS,
+                                      remove=('image_error',))
+    assert params['UpdateExpression'].endswith(' REMOVE #image_error')
+    with pytest.raises(item_model.InvalidItem):
+        item_model.update_params({'status': 'รอรับคืน'}, remove=('image_error',))
+
+
+def test_update_params_applies_to_table(table):
+    submission = submissions.Submission('LOST', None, 'ITEM#1759300000-0a1b2c3d#LOST', 'L123456')
+    item = item_model.new_item(submission, item_model.form_values('LOST', LOST_FORM)).to_item()
+    table.put_item(Item=item)
+    key = {'item_id': item['item_id'], 'item_type': 'LOST'}
+    table.update_item(Key=key, **item_model.update_params({'status': 'คืนเจ้าของแล้ว'}))
+    updated = table.get_item(Key=key)['Item']
+    assert updated['status'] == 'คืนเจ้าของแล้ว'
+    assert updated['gsi1_pk'] == 'STATUS#คืนเจ้าของแล้ว'
+    assert updated['gsi1_sk'] == item['created_at']
+    assert updated['updated_at'] > item['updated_at']
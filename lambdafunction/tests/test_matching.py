@@ -0,0 +1,141 @@
+import json
+import datetime
+
+import pytest
+
+from conftest import load_handler, post
+from lostfound_core import clients, item_model, matching
+
+# เวลาของ item ทดสอบอิงเวลาปัจจุบัน เพราะ handler บันทึก created_at เป็นเวลาจริง
+NOW = datetime.datetime.utcnow().replace(microsecond=0)
+FOUND_FORM = {'category': 'อุปกรณ์อิเล็กทรอนิกส์', 'brand': 'AirPods Pro', 'details': 'เคสสีขาว มีสติกเกอร์แมว',
+              'location': 'SC3', 'date': NOW.date().isoformat(), 'reporter_name': 'สมหญิง', 'reporter_contact': '0899999999'}
+
+
+def item(n, item_type, category, brand='', details='', location='SC3', days=0, **extra):
+    created = (NOW + datetime.timedelta(days=days)).isoformat()
+    record = item_model.ItemRecord(
+        item_id=f'ITEM#{1790000000 + n}-{n:08x}#{item_type}', item_type=item_type, case_id=f'{item_type[0]}20000{n}',
+        status=matching.OPEN_STATUS, created_at=created, updated_at=created, category=category, brand=brand,
+        details=details, location=location, date=created[:10], reporter_name='ผู้แจ้ง',
+        reporter_contact='0800000000')
+    return dict(record.to_item(), **extra)
+
+
+LOST = [
+    item(1, 'LOST', 'หูฟังไร้สาย', 'airpods pro', 'เคสขาว สติกเกอร์แมว', days=-2),
+    item(2, 'LOST', 'หูฟัง', 'sony', 'สีดำ', location='บร.2', days=-20),
+    item(3, 'LOST', 'กระเป๋าสตางค์', 'airpods pro', 'เคสขาว สติกเกอร์แมว', days=-2),
+    item(4, 'LOST', 'หูฟัง', 'airpods pro', 'เคสขาว', days=-45),
+]
+
+
+def test_blocking_compares_only_compatible_categories():
+    found = item(10, 'FOUND', 'อุปกรณ์อิเล็กทรอนิกส์', 'AirPods Pro', 'เคสสีขาว มีสติกเกอร์แมว')
+    profile = matching.MatchProfile(found)
+    assert matching.same_block(profile, matching.MatchProfile(LOST[0]))
+    # ข้อความเหมือนกันทุกอย่างแต่หมวดหมู่คนละกลุ่ม: ไม่เทียบ
+    assert not matching.same_block(profile, matching.MatchProfile(LOST[2]))
+    # ไม่เข้ากลุ่มใดทั้งคู่ แต่ category มี trigram ร่วมกัน
+    assert matching.same_block(matching.MatchProfile({'category': 'ตุ๊กตาหมี'}),
+                               matching.MatchProfile({'category': 'ตุ๊กตาหมีสีชมพู'}))
+    ranked = matching.rank_candidates(found, LOST + [item(11, 'FOUND', 'หูฟัง', 'airpods pro')])
+    assert [m['item_id'] for m in ranked][0] == LOST[0]['item_id']
+    assert LOST[2]['item_id'] not in {m['item_id'] for m in ranked}
+    assert all(m['item_type'] == 'LOST' for m in ranked)
+
+
+def test_score_prefers_text_and_time():
+    found = matching.MatchProfile(item(10, 'FOUND', 'หูฟัง', 'airpods pro', 'เคสขาว สติกเกอร์แมว'))
+    near, far, other = (matching.score(found, matching.MatchProfile(LOST[i])) for i in (0, 3, 1))
+    assert near > far > other
+    # เกิน MATCH_WINDOW_DAYS แล้วไม่ได้คะแนนเวลา
+    far_profile = matching.MatchProfile(LOST[3])
+    assert far == pytest.approx(sum(w * matching.jaccard(found.grams[f], far_profile.grams[f])
+                                    for f, w in matching.FIELD_WEIGHTS.items()))
+    assert matching.rank_candidates(found.item, [LOST[1]], min_score=1.0) == []
+
+
+@pytest.fixture
+def seeded(table):
+    for row in LOST:
+        table.put_item(Item=row)
+    return table
+
+
+def matches_of(table, row):
+    stored = table.get_item(Key={'item_id': row['item_id'], 'item_type': row['item_type']}).get('Item')
+    return stored and [m['item_id'] for m in stored.get('matches', [])]
+
+
+def test_report_writes_matches_on_both_sides(seeded):
+    handler = load_handler('found_items_function.py')
+    status, body = post(handler, dict(FOUND_FORM, action='report_found'))
+    assert status == 200
+    found = next(i for i in seeded.scan()['Items'] if i['item_type'] == 'FOUND')
+    # status ของ item ใหม่ไม่ใช่ OPEN_STATUS แต่ยังจับคู่กับ item ที่รอรับคืนได้
+    assert matches_of(seeded, found)[0] == LOST[0]['item_id']
+    assert matches_of(seeded, LOST[0]) == [found['item_id']]
+    assert matches_of(seeded, LOST[2]) == []
+
+
+def test_candidates_read_only_match_attrs(seeded):
+    found = item(10, 'FOUND', 'หูฟัง', 'airpods pro', days=-1)
+    candidates = list(matching.candidate_items(seeded, found))
+    assert {c['item_id'] for c in candidates} == {LOST[0]['item_id'], LOST[1]['item_id'], LOST[2]['item_id']}
+    assert all(set(c) <= set(matching.MATCH_ATTRS) for c in candidates)
+
+
+def test_deleted_counterpart_is_not_recreated(seeded, monkeypatch):
+    found = item(10, 'FOUND', 'หูฟัง', 'airpods pro', 'เคสขาว สติกเกอร์แมว', days=-1)
+    seeded.put_item(Item=found)
+    read = matching.candidate_items
+
+    def then_deleted(table, row):
+        candidates = list(read(table, row))
+        table.delete_item(Key={'item_id': LOST[0]['item_id'], 'item_type': 'LOST'})
+        return candidates
+
+    monkeypatch.setattr(matching, 'candidate_items', then_deleted)
+    matches = matching.find_matches(seeded, found)
+    assert LOST[0]['item_id'] in {m['item_id'] for m in matches}
+    assert matches_of(seeded, LOST[0]) is None
+
+
+def test_concurrent_match_is_merged_not_overwritten(seeded, monkeypatch):
+    found = item(10, 'FOUND', 'หูฟัง', 'airpods pro', 'เคสขาว สติกเกอร์แมว', days=-1)
+    other = item(11, 'FOUND', 'หูฟัง', 'airpods', 'เคสขาว', days=-1)
+    for row in (found, other):
+        seeded.put_item(Item=row)
+    read = matching.candidate_items
+
+    def then_other_matches(table, row):
+        candidates = list(read(table, row))
+        if row['item_id'] == found['item_id']:
+            matching.find_matches(table, other)
+        return candidates
+
+    monkeypatch.setattr(matching, 'candidate_items', then_other_matches)
+    matching.find_matches(seeded, found)
+    assert set(matches_of(seeded, LOST[0])) == {found['item_id'], other['item_id']}
+
+
+def test_submit_defers_to_worker(seeded, monkeypatch):
+    invocations = []
+
+    class FakeLambda:
+        def invoke(self, **params):
+            invocations.append(params)
+
+    found = item(10, 'FOUND', 'หูฟัง', 'airpods pro', 'เคสขาว สติกเกอร์แมว', days=-1)
+    seeded.put_item(Item=found)
+    monkeypatch.setattr(matching, 'MATCH_WORKER_FUNCTION', 'matching-worker')
+    monkeypatch.setattr(clients, 'client', lambda service: FakeLambda())
+    matching.submit(seeded, found)
+    assert matches_of(seeded, found) == []
+
+    (params,) = invocations
+    assert params['InvocationType'] == 'Event'
+    result = load_handler('matching_function.py').lambda_handler(json.loads(params['Payload']), None)
+    assert result == {'matched': 1}
+    assert matches_of(seeded, found)[0] == LOST[0]['item_id']
@@ -0,0 +1,81 @@
+import json
+
+from conftest import load_handler, post
+from lostfound_core import metrics
+
+
+def emf_lines(out):
+    return [json.loads(line) for line in out.splitlines() if line.startswith('{"_aws"')]
+
+
+def test_request_emits_one_emf_document(table, capsys):
+    search = load_handler('search-items-function.py')
+    capsys.readouterr()
+    status, _ = post(search, {'category': 'บัตร'})
+    assert status == 200
+    (doc,) = emf_lines(capsys.readouterr().out)
+    assert (doc['Function'], doc['Action'], doc['StatusCode']) == ('search-items-function', 'search', 200)
+    directive = doc['_aws']['CloudWatchMetrics'][0]
+    assert directive['Dimensions'] == [metrics.DIMENSIONS]
+    units = {m['Name']: m['Unit'] for m in directive['Metrics']}
+    assert units['Duration'] == units['dynamodb.Query'] == units['find_items'] == 'Milliseconds'
+    assert units['ReadCapacityUnits'] == units['AwsCalls'] == 'Count'
+    assert all(name in doc for name in units)
+    # generation (GetItem) + GSI2 (Query)
+    assert doc['SpanCalls']['dynamodb.GetItem'] == 1
+    assert doc['SpanCalls']['dynamodb.Query'] == 1
+    assert doc['AwsCalls'] == 2
+    assert doc['plan'] == 'gsi2_category'
+
+
+def test_spans_and_stopwatch_accumulate(capsys):
+    metrics.start('test-function', 'req-1')
+    metrics.set_action('work')
+    for _ in range(3):
+        with metrics.span('step'):
+            pass
+    watch = metrics.Stopwatch('filter', 'ItemsFiltered')
+    check = watch.wrap(lambda value: value > 1)
+    assert [check(v) for v in range(4)] == [False, False, True, True]
+    watch.record()
+    metrics.count('ImageBytes', 2048)
+    doc = metrics.finish(StatusCode=200)
+    assert doc['SpanCalls'] == {'step': 3, 'filter': 1}
+    assert doc['ItemsFiltered'] == 4
+    assert doc['RequestId'] == 'req-1'
+    assert {m['Name']: m['Unit'] for m in doc['_aws']['CloudWatchMetrics'][0]['Metrics']}['ImageBytes'] == 'Bytes'
+    assert emf_lines(capsys.readouterr().out) == [json.loads(json.dumps(doc))]
+
+
+def test_traced_handler_and_disabled_metrics(monkeypatch, capsys):
+    @metrics.traced('worker-function')
+    def lambda_handler(event, context):
+        with metrics.span('job'):
+            return 'done'
+
+    assert lambda_handler({}, None) == 'done'
+    (doc,) = emf_lines(capsys.readouterr().out)
+    assert (doc['Function'], doc['Action']) == ('worker-function', 'lambda_handler')
+
+    monkeypatch.setattr(metrics, 'METRICS_ENABLED', False)
+    assert lambda_handler({}, None) == 'done'
+    assert emf_lines(capsys.readouterr().out) == []
+
+
+def test_report_summarizes_percentiles(capsys):
+    report = load_handler('metrics_report.py')
+    lines = []
+    for ms in range(1, 101):
+        metrics.start('search-items-function')
+        metrics.set_action('search')
+        metrics._current.add_span('find_items', float(ms))
+        metrics.count('ReadCapacityUnits', 0.5)
+        lines.append('2026-10-17T00:00:00Z req ' + json.dumps(metrics.finish()))
+    lines.append('START RequestId: abc')
+    capsys.readouterr()
+    (group,) = report.summarize(report.aggregate(report.read_documents([lines])))
+    assert (group['function'], group['action'], group['requests']) == ('search-items-function', 'search', 100)
+    stage = next(s for s in group['stages'] if s['stage'] == 'find_items')
+    assert (stage['p50'], stage['p95'], stage['p99']) == (50.0, 95.0, 99.0)
+    assert group['stages'][0]['stage'] == 'Duration'
+    assert group['mean_per_request']['ReadCapacityUnits'] == 0.5
@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+import pytest
+
+from conftest import load_handler
+from lostfound_core import image_upload, item_keys, item_model, search_index
+
+LOST_ID = 'ITEM#1700000000-aaaaaaaa'
+FOUND_ID = 'ITEM#1700000100-bbbbbbbb'
+KEY = 'lost/sha256/' + 'ab' * 32 + '.jpg'
+
+
+def legacy(item_id, item_type, case_id, **extra):
+    record = item_model.ItemRecord(
+        item_id=item_id, item_type=item_type, case_id=case_id, status='รอรับคืน',
+        created_at='2023-11-14T22:13:20', updated_at='2023-11-14T22:13:20', category='กระเป๋า',
+        brand='Anello', details='สีเทา', location='SC3', date='2023-11-14')
+    return dict(record.to_item(), item_id=item_id, **extra)
+
+
+def entry(item_id, item_type, case_id):
+    return {'item_id': item_id, 'item_type': item_type, 'case_id': case_id, 'score': Decimal('0.7')}
+
+
+@pytest.fixture
+def migration(table):
+    lost = legacy(LOST_ID, 'LOST', 'L100001', image_key=KEY, image_url=image_upload.image_url_for(KEY),
+                  matches=[entry(FOUND_ID, 'FOUND', 'F100002')])
+    found = legacy(FOUND_ID, 'FOUND', 'F100002', matches=[entry(LOST_ID, 'LOST', 'L100001')])
+    current = dict(legacy('ITEM#1700000200-cccccccc#FOUND', 'FOUND', 'F100003'),
+                   matches=[entry(LOST_ID, 'LOST', 'L100001')])
+    for item in (lost, found, current):
+        table.put_item(Item=item)
+        search_index.index_item(item)
+    for item in (lost, found):
+        table.put_item(Item=dict(item_keys.case_key(item['case_id']), target_item_id=item['item_id'],
+                                 target_item_type=item['item_type']))
+    table.put_item(Item={'item_id': image_upload.IMAGE_REF_PREFIX + KEY, 'item_type': 'META',
+                         'refs': 1, 'holders': {LOST_ID}})
+    table.put_item(Item={'item_id': f'VARIANTS#{KEY}', 'item_type': 'META', 'waiting': {f'{LOST_ID}|LOST'}})
+    return load_handler('migrate_item_ids.py')
+
+
+def get(table, item_id, item_type='META'):
+    return table.get_item(Key={'item_id': item_id, 'item_type': item_type}).get('Item')
+
+
+def test_migration_rewrites_references(migration, table):
+    assert migration.migrate(table) == (2, 0)
+    new_lost, new_found = f'{LOST_ID}#LOST', f'{FOUND_ID}#FOUND'
+    assert get(table, LOST_ID, 'LOST') is None
+    assert [m['item_id'] for m in get(table, new_lost, 'LOST')['matches']] == [new_found]
+    assert [m['item_id'] for m in get(table, new_found, 'FOUND')['matches']] == [new_lost]
+    assert [m['item_id'] for m in get(table, 'ITEM#1700000200-cccccccc#FOUND', 'FOUND')['matches']] == [new_lost]
+    assert get(table, 'CASE#L100001')['target_item_id'] == new_lost
+    assert get(table, 'CASE#F100002')['target_item_id'] == new_found
+    assert get(table, image_upload.IMAGE_REF_PREFIX + KEY)['holders'] == {new_lost}
+    assert get(table, f'VARIANTS#{KEY}')['waiting'] == {f'{new_lost}|LOST'}
+    assert set(search_index.lookup('keyword', 'anello')) == {new_lost, new_found, 'ITEM#1700000200-cccccccc#FOUND'}
+
+    # รันซ้ำไม่มีอะไรต้องแก้
+    assert migration.fix_references(table) == (0, 0)
+
+
+def test_dry_run_changes_nothing(migration, table):
+    assert migration.migrate(table, dry_run=True) == (2, 0)
+    assert get(table, LOST_ID, 'LOST') is not None
+    assert get(table, 'CASE#L100001')['target_item_id'] == LOST_ID
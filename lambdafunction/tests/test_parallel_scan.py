@@ -0,0 +1,114 @@
+import pytest
+
+from conftest import load_handler, post
+from lostfound_core import item_model, parallel_scan
+
+
+@pytest.fixture
+def filled(table):
+    with table.batch_writer() as batch:
+        for i in range(60):
+            batch.put_item(Item={'item_id': f'ITEM#{i:04d}#FOUND', 'item_type': 'FOUND', 'n': i})
+    return table
+
+
+def numbers(items):
+    return sorted(int(item['n']) for item in items)
+
+
+@pytest.mark.parametrize('segments', [1, 3, 8])
+def test_scan_reads_every_item_once(filled, segments):
+    items, cursor = parallel_scan.scan(filled, segments=segments)
+    assert cursor is None
+    assert numbers(items) == list(range(60))
+
+
+def test_predicate_and_cursor_pages_through_everything(filled):
+    def even(item):
+        return int(item['n']) % 2 == 0
+
+    seen, cursor = [], None
+    for _ in range(30):
+        items, cursor = parallel_scan.scan(filled, {'Limit': 4}, even, limit=7, cursor=cursor, segments=4)
+        assert len(items) <= 7
+        seen += items
+        if cursor is None:
+            break
+        assert parallel_scan.is_cursor(cursor)
+    assert numbers(seen) == list(range(0, 60, 2))
+
+
+def test_limit_stops_all_segments_early(filled, monkeypatch):
+    client = filled.meta.client
+    calls = []
+    real_scan = client.scan
+
+    def counting_scan(**params):
+        calls.append(params['Segment'])
+        return real_scan(**params)
+
+    monkeypatch.setattr(client, 'scan', counting_scan)
+    items, cursor = parallel_scan.scan(filled, {'Limit': 2}, limit=3, segments=4)
+    assert len(items) == 3
+    assert cursor is not None
+    # ไม่ได้อ่านทั้งตาราง (60 item หน้าละ 2 = อย่างน้อย 30 ครั้ง)
+    assert len(calls) < 30
+
+
+def test_segment_count_follows_table_size(filled, monkeypatch):
+    client = filled.meta.client
+    monkeypatch.setattr(client, 'describe_table', lambda TableName: {'Table': {'TableSizeBytes': 0}})
+    assert parallel_scan.segment_count(filled) == 1
+
+    parallel_scan._segment_counts.clear()
+    size = 40 * parallel_scan.SCAN_PAGE_BYTES
+    monkeypatch.setattr(client, 'describe_table', lambda TableName: {'Table': {'TableSizeBytes': size}})
+    assert parallel_scan.segment_count(filled) == 40 // parallel_scan.PAGES_PER_SEGMENT
+    # cache ไว้ทั้ง container
+    monkeypatch.setattr(client, 'describe_table', lambda TableName: {'Table': {'TableSizeBytes': 10 ** 12}})
+    assert parallel_scan.segment_count(filled) == 40 // parallel_scan.PAGES_PER_SEGMENT
+
+    parallel_scan._segment_counts.clear()
+    assert parallel_scan.segment_count(filled) == parallel_scan.MAX_SEGMENTS
+
+    def unavailable(TableName):
+        raise RuntimeError('AccessDenied')
+
+    parallel_scan._segment_counts.clear()
+    monkeypatch.setattr(client, 'describe_table', unavailable)
+    assert parallel_scan.segment_count(filled) == parallel_scan.DEFAULT_SEGMENTS
+
+
+@pytest.mark.parametrize('cursor, valid', [
+    ({'scan_segments': [{}, None, {'item_id': 'x', 'item_type': 'FOUND'}]}, True),
+    ({'scan_segments': []}, False),
+    ({'scan_segments': [{}] * (parallel_scan.MAX_SEGMENTS + 1)}, False),
+    ({'scan_segments': ['x']}, False),
+    ({'item_id': 'x', 'item_type': 'FOUND'}, False),
+])
+def test_is_cursor(cursor, valid):
+    assert parallel_scan.is_cursor(cursor) is valid
+
+
+def test_search_pages_through_parallel_scan(table):
+    with table.batch_writer() as batch:
+        for i in range(30):
+            record = item_model.ItemRecord(
+                item_id=f'ITEM#{1740787200 + i}-{i:08x}#LOST', item_type='LOST', case_id=f'L{300000 + i}',
+                status='ยังไม่พบ', created_at='2025-03-01T10:00:00', updated_at='2025-03-01T10:00:00',
+                category='กระเป๋า', brand=('Nike', 'Adidas')[i % 2], details='สีดำ', location='SC3')
+            batch.put_item(Item=record.to_item())
+    search = load_handler('search-items-function.py')
+
+    seen, body = [], {'item_type': 'lost', 'keyword': 'nike', 'page_size': 4}
+    for _ in range(10):
+        status, result = post(search, body)
+        assert status == 200
+        assert result['plan'] == 'parallel_scan'
+        assert result['count'] <= 4
+        seen += [item['item_id'] for item in result['items']]
+        if not result.get('next_token'):
+            break
+        body = dict(body, next_token=result['next_token'])
+    assert sorted(seen) == sorted(set(seen))
+    assert len(seen) == 15
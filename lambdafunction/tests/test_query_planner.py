@@ -0,0 +1,77 @@
+import datetime
+
+import pytest
+
+from conftest import load_handler, post
+from lostfound_core import item_model
+
+CATEGORIES = ('บัตร', 'โทรศัพท์', 'กระเป๋า')
+START = datetime.datetime(2025, 3, 1)
+
+
+@pytest.fixture
+def search(table):
+    with table.batch_writer() as batch:
+        for i in range(24):
+            item_type = ('FOUND', 'LOST')[i % 2]
+            created = (START + datetime.timedelta(days=i)).isoformat()
+            record = item_model.ItemRecord(
+                item_id=f'ITEM#{1740787200 + i}-{i:08x}#{item_type}', item_type=item_type,
+                case_id=f'{item_type[0]}{300000 + i}', status=item_model.STATUSES[i % 4],
+                created_at=created, updated_at=created, category=CATEGORIES[i % 3],
+                brand='Samsung', details='สีดำ', location='SC3', date=created[:10])
+            batch.put_item(Item=record.to_item())
+    return load_handler('search-items-function.py')
+
+
+def expected(table, check):
+    items = [item for item in table.scan()['Items'] if item['item_type'] in ('FOUND', 'LOST') and check(item)]
+    return sorted(item['item_id'] for item in items)
+
+
+def ids(body):
+    return sorted(item['item_id'] for item in body['items'])
+
+
+def test_category_is_preferred_over_status(search):
+    filters = search.parse_filters({'category': 'บัตร', 'status': 'รอรับคืน',
+                                    'created_from': '2025-03-05', 'created_to': '2025-03-20'})
+    plan, params, _ = search.plan_index_query(filters, {})
+    assert plan == 'gsi2_category'
+    assert params['IndexName'] == 'GSI2'
+    assert params['ScanIndexForward'] is False
+
+    filters = search.parse_filters({'status': 'รอรับคืน'})
+    assert search.plan_index_query(filters, {})[0] == 'gsi1_status'
+    assert search.plan_index_query(search.parse_filters({'keyword': 'sam'}), {}) is None
+
+
+@pytest.mark.parametrize('body, plan, check', [
+    ({'category': 'บัตร', 'status': 'รอรับคืน'}, 'gsi2_category',
+     lambda i: i['category'] == 'บัตร' and i['status'] == 'รอรับคืน'),
+    ({'category': 'กระเป๋า', 'created_from': '2025-03-05', 'created_to': '2025-03-15'}, 'gsi2_category',
+     # created_to ที่เป็นวันที่อย่างเดียวรวมทั้งวัน
+     lambda i: i['category'] == 'กระเป๋า' and '2025-03-05' <= i['created_at'] < '2025-03-16'),
+    ({'status': 'คืนเจ้าของแล้ว', 'item_type': 'found'}, 'gsi1_status',
+     lambda i: i['status'] == 'คืนเจ้าของแล้ว' and i['item_type'] == 'FOUND'),
+    ({'created_from': '2025-03-10'}, 'gsi1_status_fanout', lambda i: i['created_at'] >= '2025-03-10'),
+    ({'item_type': 'lost'}, 'parallel_scan', lambda i: i['item_type'] == 'LOST'),
+])
+def test_plan_returns_same_items_as_filtering_everything(search, table, body, plan, check):
+    status, result = post(search, body)
+    assert status == 200
+    assert result['plan'] == plan
+    assert ids(result) == expected(table, check)
+    assert result['count'] > 0
+
+
+def test_missing_gsi_falls_back_to_scan(search, table, monkeypatch, capsys):
+    def no_index(**params):
+        raise RuntimeError('The table does not have the specified index: GSI2')
+
+    monkeypatch.setattr(search.clients.table(), 'query', no_index)
+    status, result = post(search, {'category': 'โทรศัพท์'})
+    assert status == 200
+    assert result['plan'] == 'scan'
+    assert ids(result) == expected(table, lambda i: i['category'] == 'โทรศัพท์')
+    assert '[WARN] GSI query failed' in capsys.readouterr().out
@@ -0,0 +1,67 @@
+import pytest
+
+from conftest import load_handler, post
+from lostfound_core import clients, result_cache
+
+FORM = {'category': 'โทรศัพท์', 'brand': 'iPhone 13', 'details': 'เคสใส', 'location': 'SC3', 'date': '2026-10-01',
+        'reporter_name': 'สมหญิง', 'reporter_contact': '0899999999'}
+
+
+def test_ttl_cache_evicts_oldest_and_expired(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(result_cache.time, 'monotonic', lambda: now[0])
+    cache = result_cache.TTLCache(max_entries=2, ttl=10)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    # 'b' ใช้ล่าสุดน้อยที่สุด จึงถูกลบก่อน
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    now[0] += 11
+    assert cache.get('a') is None
+    assert len(cache) == 1
+
+
+def test_generation_counts_writes(table):
+    assert result_cache.current_generation(table) == 0
+    result_cache.bump_generation(table)
+    result_cache.bump_generation(table)
+    assert result_cache.current_generation(table) == 2
+
+
+@pytest.fixture
+def handlers(table):
+    return load_handler('search-items-function.py'), load_handler('found_items_function.py')
+
+
+def test_repeat_search_hits_cache_until_write(handlers, capsys):
+    search, found = handlers
+    _, first = post(search, {'category': 'โทรศัพท์'})
+    assert first['count'] == 0
+    _, again = post(search, {'category': 'โทรศัพท์'})
+    assert again == first
+    assert '[CACHE] Result hit' in capsys.readouterr().out
+
+    # report ผ่าน handler เพิ่ม generation ผลค้นหาถัดไปต้องเห็น item ใหม่ทันที
+    status, reported = post(found, dict(FORM, action='report_found'))
+    assert status == 200
+    assert result_cache.current_generation(clients.table()) == 1
+    _, after = post(search, {'category': 'โทรศัพท์'})
+    assert '[CACHE] Result hit' not in capsys.readouterr().out
+    assert [item['case_id'] for item in after['items']] == [reported['case_id']]
+
+
+def test_cache_skipped_when_generation_unreadable(handlers, monkeypatch, capsys):
+    search, _ = handlers
+
+    def unreadable(table):
+        raise RuntimeError('throttled')
+
+    monkeypatch.setattr(result_cache, 'current_generation', unreadable)
+    post(search, {'category': 'บัตร'})
+    post(search, {'category': 'บัตร'})
+    out = capsys.readouterr().out
+    assert '[WARN] Cache generation read failed: throttled' in out
+    assert '[CACHE] Result hit' not in out
+    assert len(search.RESULT_CACHE) == 0
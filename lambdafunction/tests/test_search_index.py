@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from conftest import load_handler, post
+from lostfound_core import clients, item_model, search_index
+
+LONG_DETAILS = 'กระเป๋าผ้าสีน้ำเงิน ' * 40 + 'มีพวงกุญแจรูปแมว'
+
+ITEMS = [
+    ('FOUND', 'โทรศัพท์', 'Samsung Galaxy', 'เคสสีดำ มีรอยร้าว', 'SC3'),
+    ('LOST', 'โทรศัพท์', 'Apple iPhone', 'สีดำ ไม่มีเคส', 'บร.2'),
+    ('FOUND', 'บัตร', 'บัตรนักศึกษา', 'ชื่อ สมชาย', 'โรงอาหารกลาง'),
+    ('LOST', 'กระเป๋า', 'Anello', LONG_DETAILS, 'SC 3'),
+    ('FOUND', 'กระเป๋า', '', 'กระเป๋าสตางค์สีน้ำตาล', 'หอสมุด'),
+]
+
+QUERIES = [
+    {'keyword': 'samsung'},
+    {'keyword': 'สีดำ'},
+    {'keyword': 'พวงกุญแจ'},
+    {'moreDetails': 'รูปแมว'},
+    {'moreDetails': 'สีน้ำ'},
+    {'location': 'sc 3'},
+    {'keyword': 'กระเป๋า', 'location': 'sc3'},
+    {'keyword': 'ไม่มีคำนี้'},
+]
+
+
+def seed(table):
+    with table.batch_writer() as batch:
+        for i, (item_type, category, brand, details, location) in enumerate(ITEMS):
+            created = f'2025-01-0{i + 1}T10:00:00'
+            record = item_model.ItemRecord(
+                item_id=f'ITEM#{1735700000 + i}-{i:08x}#{item_type}', item_type=item_type,
+                case_id=f'{item_type[0]}{200000 + i}', status='รอรับคืน', created_at=created,
+                updated_at=created, category=category, brand=brand, details=details,
+                location=location, date=created[:10])
+            batch.put_item(Item=record.to_item())
+
+
+@pytest.fixture
+def handlers(table, monkeypatch):
+    seed(table)
+    search_index.rebuild(table)
+    indexed = load_handler('search-items-function.py')
+    scanned = load_handler('search-items-function.py')
+    monkeypatch.setattr(scanned, 'SEARCH_INDEX_ENABLED', False)
+    return indexed, scanned
+
+
+def ids(body):
+    return sorted(item['item_id'] for item in body['items'])
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_index_answers_same_as_scan(handlers, query):
+    indexed, scanned = handlers
+    status, from_index = post(indexed, query)
+    assert status == 200
+    assert from_index['plan'] == 'ngram_index'
+    status, from_scan = post(scanned, query)
+    assert status == 200
+    assert from_scan['plan'] != 'ngram_index'
+    assert ids(from_index) == ids(from_scan)
+
+
+def test_long_text_is_capped():
+    grams = search_index.item_grams({'item_id': 'x', 'item_type': 'LOST', 'details': LONG_DETAILS * 10})
+    assert len(grams) <= search_index.MAX_INDEXED_CHARS
+    assert f'keyword#{search_index.OVERFLOW_GRAM}' in grams
+    assert not any(gram.startswith('details#') for gram in grams)
+
+
+def test_submit_defers_to_worker(table, monkeypatch):
+    invocations = []
+
+    class FakeLambda:
+        def invoke(self, **params):
+            invocations.append(params)
+
+    monkeypatch.setattr(search_index, 'SEARCH_INDEX_WORKER_FUNCTION', 'search-index-worker')
+    monkeypatch.setattr(clients, 'client', lambda service: FakeLambda())
+    item = {'item_id': 'ITEM#1-a#FOUND', 'item_type': 'FOUND', 'brand': 'Samsung', 'details': 'สีดำ',
+            'reporter_contact': '0800000000', 'views': 3}
+    search_index.submit(item)
+    assert search_index.postings_of(search_index.get_index_table(), 'keyword#sam') == {}
+
+    (params,) = invocations
+    assert params['InvocationType'] == 'Event'
+    event = json.loads(params['Payload'])
+    assert 'reporter_contact' not in event['jobs'][0]['item']
+    load_handler('search_index_function.py').lambda_handler(event, None)
+    assert search_index.lookup('keyword', 'samsung') == {'ITEM#1-a#FOUND': 'FOUND'}
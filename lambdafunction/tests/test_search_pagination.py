@@ -0,0 +1,114 @@
+import datetime
+
+import pytest
+
+from conftest import load_handler, post
+from lostfound_core import item_model, search_index
+
+CATEGORIES = ('บัตร', 'โทรศัพท์', 'กระเป๋า')
+BRANDS = ('Samsung Galaxy', 'Apple iPhone', 'บัตรนักศึกษา')
+LOCATIONS = ('SC3', 'บร.2', 'โรงอาหารกลาง')
+START = datetime.datetime(2025, 1, 1)
+PAGE_SIZE = 4
+
+
+def seed(table, count=45):
+    """item FOUND/LOST ที่สถานะ/หมวดหมู่/ข้อความต่างกัน (created_at ห่างกันชั่วโมงละรายการ)"""
+    with table.batch_writer() as batch:
+        for i in range(count):
+            item_type = ('FOUND', 'LOST')[i % 2]
+            created = (START + datetime.timedelta(hours=i)).isoformat()
+            record = item_model.ItemRecord(
+                item_id=f'ITEM#{1735689600 + i}-{i:08x}#{item_type}', item_type=item_type,
+                case_id=f'{item_type[0]}{100000 + i}', status=item_model.STATUSES[i % 4],
+                created_at=created, updated_at=created, category=CATEGORIES[i % 3],
+                brand=BRANDS[i % 3], details=f'สีดำ รุ่น {i}', location=LOCATIONS[i % 3],
+                date=created[:10], reporter_name='ผู้แจ้ง', reporter_contact='0800000000')
+            batch.put_item(Item=record.to_item())
+
+
+@pytest.fixture
+def search(table):
+    seed(table)
+    search_index.rebuild(table)
+    return load_handler('search-items-function.py')
+
+
+def all_pages(search, body, page_size=PAGE_SIZE):
+    """อ่านทุกหน้าด้วย next_token คืน (item ทั้งหมดตามลำดับที่ได้, plan ของแต่ละหน้า)"""
+    items, plans = [], set()
+    token = None
+    for _ in range(100):
+        request = dict(body, **({'page_size': page_size} if page_size else {}), **({'next_token': token} if token else {}))
+        status, page = post(search, request)
+        assert status == 200, page
+        assert len(page['items']) <= page['page_size']
+        items += page['items']
+        plans.add((page['plan'], page['ordered']))
+        token = page['next_token']
+        if not token:
+            return items, plans
+    pytest.fail('pagination did not finish')
+
+
+def ids(items):
+    return [item['item_id'] for item in items]
+
+
+def newest_first(items):
+    return ids(sorted(items, key=lambda item: (item['created_at'], item['item_id']), reverse=True))
+
+
+@pytest.mark.parametrize('body, plan', [
+    ({'category': 'บัตร'}, 'gsi2_category'),
+    ({'status': 'รอรับคืน', 'item_type': 'lost'}, 'gsi1_status'),
+    ({'keyword': 'samsung'}, 'ngram_index'),
+    ({'location': 'sc 3', 'moreDetails': 'สีดำ'}, 'ngram_index'),
+    ({'created_from': '2025-01-01T05:00:00', 'created_to': '2025-01-02'}, 'gsi1_status_fanout'),
+    ({'item_type': 'found'}, 'parallel_scan'),
+    ({}, 'parallel_scan'),
+])
+def test_paged_results_match_single_page(search, body, plan):
+    # PAGE_SIZE เริ่มต้น (50) มากกว่าจำนวน item ทั้งหมด จึงได้ครบในหน้าเดียว
+    status, single = post(search, body)
+    assert status == 200
+    assert single['plan'] == plan
+    assert single['next_token'] is None
+    assert single['count'] > PAGE_SIZE
+
+    items, plans = all_pages(search, body)
+    ordered = plan in search.ORDERED_PLANS
+    assert plans == {(plan, ordered)}
+    assert len(ids(items)) == len(set(ids(items)))
+    assert sorted(ids(items)) == sorted(ids(single['items']))
+    if ordered:
+        assert ids(items) == newest_first(items)
+
+
+def test_search_is_paged_by_default(search, monkeypatch):
+    monkeypatch.setattr(search, 'PAGE_SIZE', 10)
+    status, first = post(search, {})
+    assert status == 200
+    assert first['count'] == 10
+    assert first['page_size'] == 10
+    assert first['next_token']
+    items, _ = all_pages(search, {}, page_size=None)
+    assert len(set(ids(items))) == 45
+
+
+def test_keyword_search_scans_until_index_built(table):
+    seed(table)
+    search = load_handler('search-items-function.py')
+    status, single = post(search, {'keyword': 'samsung'})
+    assert status == 200
+    assert single['plan'] != 'ngram_index'
+    assert single['count'] > 0
+    items, plans = all_pages(search, {'keyword': 'samsung'})
+    assert 'ngram_index' not in {plan for plan, _ in plans}
+    assert sorted(ids(items)) == sorted(ids(single['items']))
+
+
+def test_invalid_next_token(search):
+    status, body = post(search, {'next_token': 'not-a-token'})
+    assert status == 400
+    assert body['error'] == 'Invalid next_token'
@@ -0,0 +1,58 @@
+import pytest
+
+from conftest import load_handler, post
+from lostfound_core import item_model
+
+PII = ('reporter_name', 'reporter_contact', 'reporter_student_id')
+
+
+@pytest.fixture
+def search(table):
+    for i, item_type in enumerate(('FOUND', 'LOST', 'FOUND')):
+        created = f'2026-10-0{i + 1}T09:00:00'
+        record = item_model.ItemRecord(
+            item_id=f'ITEM#{1790000000 + i}-{i:08x}#{item_type}', item_type=item_type, case_id=f'{item_type[0]}00000{i}',
+            status='แจ้งแล้ว', created_at=created, updated_at=created, category='บัตร', brand='บัตรนักศึกษา',
+            details='ชื่อ สมชาย', location='SC3', date=created[:10], reporter_name='สมชาย',
+            reporter_contact='0811111111', reporter_student_id='6601234567')
+        table.put_item(Item=record.to_item())
+    return load_handler('search-items-function.py')
+
+
+@pytest.mark.parametrize('body', [{}, {'category': 'บัตร'}, {'keyword': 'สมชาย'}, {'status': 'แจ้งแล้ว'}])
+def test_card_view_has_no_pii_or_index_keys(search, body):
+    status, result = post(search, dict(body, view='card'))
+    assert status == 200
+    assert result['count'] == 3
+    for item in result['items']:
+        assert set(item) <= set(search.CARD_ATTRS)
+        assert not set(item) & set(PII)
+        assert not any(attr.startswith('gsi') for attr in item)
+
+
+def test_views_and_fields(search):
+    _, admin = post(search, {'view': 'admin'})
+    assert {item['reporter_contact'] for item in admin['items']} == {'0811111111'}
+    _, full = post(search, {})
+    assert 'gsi1_pk' in full['items'][0]
+
+    status, result = post(search, {'fields': 'case_id, status'})
+    assert status == 200
+    assert all(set(item) == {'case_id', 'status'} for item in result['items'])
+
+
+@pytest.mark.parametrize('body, error', [
+    ({'view': 'everything'}, 'Invalid view: everything'),
+    ({'fields': ['case_id', 'gsi1_pk']}, 'Invalid fields: gsi1_pk'),
+])
+def test_invalid_projection(search, body, error):
+    status, result = post(search, body)
+    assert status == 400
+    assert result['error'] == error
+
+
+def test_projection_expression_keeps_filter_attrs(search):
+    params = search.projection_params(['case_id'])
+    names = set(params['ExpressionAttributeNames'].values())
+    assert names == {'case_id'} | set(search.REQUIRED_ATTRS)
+    assert not names & set(PII)
@@ -0,0 +1,89 @@
+import json
+import datetime
+
+import pytest
+
+from conftest import load_handler, post
+from lostfound_core import item_model
+
+START = datetime.datetime(2025, 6, 1)
+
+
+@pytest.fixture
+def search(table):
+    with table.batch_writer() as batch:
+        for i in range(30):
+            item_type = ('FOUND', 'LOST')[i % 2]
+            created = (START + datetime.timedelta(hours=i)).isoformat()
+            record = item_model.ItemRecord(
+                item_id=f'ITEM#{1748736000 + i}-{i:08x}#{item_type}', item_type=item_type,
+                case_id=f'{item_type[0]}{400000 + i}', status=item_model.STATUSES[i % 4],
+                created_at=created, updated_at=created, category=('บัตร', 'กระเป๋า', 'โทรศัพท์')[i % 3],
+                brand='Samsung', details='สีดำ ' * (i + 1), location='SC3', date=created[:10],
+                reporter_name='ผู้แจ้ง', reporter_contact='0800000000')
+            batch.put_item(Item=record.to_item())
+    return load_handler('search-items-function.py')
+
+
+def stream(search, body):
+    """เรียก search_mode=stream คืน (headers, items, บรรทัดสรุป)"""
+    response = search.lambda_handler({'requestContext': {'http': {'method': 'POST'}},
+                                      'body': json.dumps(dict(body, search_mode='stream'))}, None)
+    assert response['statusCode'] == 200, response['body']
+    assert response['body'].endswith('\n')
+    lines = [json.loads(line) for line in response['body'].splitlines()]
+    return response['headers'], lines[:-1], lines[-1]
+
+
+def stream_all(search, body):
+    items, plans, token = [], set(), None
+    for _ in range(50):
+        _, chunk, trailer = stream(search, dict(body, **({'next_token': token} if token else {})))
+        assert trailer['count'] == len(chunk)
+        items += chunk
+        plans.add(trailer['plan'])
+        token = trailer['next_token']
+        if not token:
+            return items, plans
+    pytest.fail('stream did not finish')
+
+
+def newest_first(items):
+    keys = [(item['created_at'], item['item_id']) for item in items]
+    return keys == sorted(keys, reverse=True)
+
+
+@pytest.mark.parametrize('body, plan', [
+    ({'page_size': 7}, 'gsi1_status_fanout'),
+    ({'page_size': 4, 'category': 'บัตร'}, 'gsi2_category'),
+    ({'page_size': 3, 'status': 'รอรับคืน', 'view': 'card'}, 'gsi1_status'),
+])
+def test_stream_chunks_are_ordered_and_complete(search, body, plan):
+    headers, first, trailer = stream(search, body)
+    assert headers['Content-Type'] == 'application/x-ndjson'
+    assert len(first) == body['page_size']
+    assert trailer['next_token'] and trailer['cursor']
+
+    items, plans = stream_all(search, body)
+    assert plans == {plan}
+    assert newest_first(items)
+    filters = {k: v for k, v in body.items() if k != 'page_size'}
+    _, regular = post(search, dict(filters, page_size=100))
+    assert sorted(i['item_id'] for i in items) == sorted(i['item_id'] for i in regular['items'])
+    if 'view' in body:
+        assert all('reporter_contact' not in item for item in items)
+
+
+def test_stream_stops_before_body_limit(search, monkeypatch):
+    monkeypatch.setattr(search, 'STREAM_MAX_BYTES', 2000)
+    _, chunk, trailer = stream(search, {'page_size': 100})
+    assert 0 < len(chunk) < 30
+    assert trailer['next_token']
+    items, _ = stream_all(search, {'page_size': 100})
+    assert len({item['item_id'] for item in items}) == 30
+
+
+def test_stream_rejects_bad_input(search):
+    status, body = post(search, {'search_mode': 'stream', 'item_type': 'other'})
+    assert status == 400
+    assert body['error'] == 'Invalid item_type: OTHER'
@@ -0,0 +1,102 @@
+import pytest
+from botocore.exceptions import ClientError
+
+from conftest import load_handler, post
+from lostfound_core import changes, clients, snapshot
+
+PRIVATE_BUCKET = 'tu-lostfound-private'
+FORM = {'category': 'บัตร', 'brand': 'บัตรนักศึกษา', 'details': 'สีฟ้า', 'location': 'SC3', 'date': '2026-10-01',
+        'reporter_name': 'สมหญิง', 'reporter_contact': '0899999999', 'reporter_student_id': '6401234567'}
+
+
+@pytest.fixture
+def private_bucket(table, monkeypatch):
+    clients.s3().create_bucket(Bucket=PRIVATE_BUCKET)
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_BUCKET', PRIVATE_BUCKET)
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_ENABLED', True)
+    return PRIVATE_BUCKET
+
+
+def test_build_requires_private_bucket(table, monkeypatch):
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_BUCKET', '')
+    with pytest.raises(ValueError):
+        snapshot.build(table)
+    assert 'Contents' not in clients.s3().list_objects_v2(Bucket=clients.S3_BUCKET_NAME, Prefix='snapshots/')
+
+
+def test_snapshot_has_no_reporter_fields(table, private_bucket):
+    found = load_handler('found_items_function.py')
+    assert post(found, dict(FORM, action='report_found'))[0] == 200
+    snapshot.build(table)
+    current = snapshot.load()
+    assert current.count == 1
+    assert not {'reporter_name', 'reporter_contact', 'reporter_student_id'} & set(current.columns)
+
+    # view admin ต้องใช้ข้อมูลผู้แจ้ง จึงไม่ตอบจาก snapshot
+    search = load_handler('search-items-function.py')
+    _, card = post(search, {'view': 'card'})
+    _, admin = post(search, {'view': 'admin'})
+    assert card['plan'] == 'snapshot'
+    assert admin['plan'] != 'snapshot'
+    assert admin['items'][0]['reporter_contact'] == FORM['reporter_contact']
+
+
+def test_load_error_backs_off(table, private_bucket, monkeypatch):
+    calls = []
+
+    class DeniedS3:
+        def get_object(self, **params):
+            calls.append(params)
+            raise ClientError({'Error': {'Code': 'AccessDenied', 'Message': 'Access Denied'}}, 'GetObject')
+    with pytest.raises(ClientError):
+        snapshot.load(DeniedS3())
+    assert snapshot.load(DeniedS3()) is None
+    assert len(calls) == 1
+
+
+def test_snapshot_pages_continue_without_snapshot(table, private_bucket, monkeypatch):
+    found = load_handler('found_items_function.py')
+    for date in ('2026-10-01', '2026-10-02', '2026-10-03'):
+        assert post(found, dict(FORM, action='report_found', date=date))[0] == 200
+    snapshot.build(table)
+    search = load_handler('search-items-function.py')
+    _, first = post(search, {'view': 'card', 'page_size': 2})
+    assert first['plan'] == 'snapshot'
+    assert first['ordered'] is True
+    assert first['count'] == 2
+
+    # หน้าถัดไปไปลง container ที่ใช้ snapshot ไม่ได้: อ่านทั้งตารางแล้วต่อจาก cursor เดิม
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_ENABLED', False)
+    other = load_handler('search-items-function.py')
+    _, second = post(other, {'view': 'card', 'page_size': 2, 'next_token': first['next_token']})
+    assert second['plan'] == 'scan_cache'
+    assert second['next_token'] is None
+    created = [item['created_at'] for item in first['items'] + second['items']]
+    assert created == sorted(created, reverse=True)
+    assert len({item['item_id'] for item in first['items'] + second['items']}) == 3
+
+
+def test_edit_then_immediate_search_waits_for_gsi4(table, private_bucket, monkeypatch):
+    found = load_handler('found_items_function.py')
+    assert post(found, dict(FORM, action='report_found'))[0] == 200
+    snapshot.build(table)
+    search = load_handler('search-items-function.py')
+    _, before = post(search, {'view': 'card'})
+    assert before['plan'] == 'snapshot'
+    item_id = before['items'][0]['item_id']
+
+    admin = load_handler('Admin_Update.py')
+    assert post(admin, {'action': 'update', 'item_id': item_id, 'updates': {'location': 'LC1'}})[0] == 200
+
+    # GSI4 ยังไม่เห็นการแก้ไข: snapshot ไม่ตอบด้วยข้อมูลเก่า และไม่ถือว่าไล่ทัน generation นี้แล้ว
+    real_iter_changes = changes.iter_changes
+    monkeypatch.setattr(changes, 'iter_changes', lambda table, since, read_params=None: iter(()))
+    _, during = post(search, {'view': 'card', 'location': 'LC1'})
+    assert during['plan'] != 'snapshot'
+    assert [item['item_id'] for item in during['items']] == [item_id]
+
+    monkeypatch.setattr(changes, 'iter_changes', real_iter_changes)
+    search.RESULT_CACHE.clear()
+    _, after = post(search, {'view': 'card', 'location': 'LC1'})
+    assert after['plan'] == 'snapshot'
+    assert [item['item_id'] for item in after['items']] == [item_id]
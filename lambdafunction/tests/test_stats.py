@@ -0,0 +1,87 @@
+import datetime
+
+import pytest
+
+from conftest import load_handler, post
+from lostfound_core import clients, item_model, stats
+
+TODAY = datetime.datetime.utcnow().replace(microsecond=0)
+
+
+def item(n, item_type, category, status='แจ้งแล้ว', days_ago=0):
+    created = (TODAY - datetime.timedelta(days=days_ago)).isoformat()
+    return item_model.ItemRecord(
+        item_id=f'ITEM#{1790000000 + n}-{n:08x}#{item_type}', item_type=item_type, case_id=f'{item_type[0]}50000{n}',
+        status=status, created_at=created, updated_at=created, category=category, details='-',
+        location='SC3', date=created[:10]).to_item()
+
+
+ITEMS = [
+    item(1, 'FOUND', 'บัตร'),
+    item(2, 'LOST', 'บัตรนักศึกษา', days_ago=1),
+    item(3, 'LOST', 'หูฟัง airpods', status='รอรับคืน', days_ago=1),
+    item(4, 'FOUND', 'ตุ๊กตาหมี', days_ago=3),
+    item(5, 'LOST', 'ของที่ไม่มีในรายการ %$#', days_ago=40),
+]
+
+
+def test_free_text_categories_are_bucketed():
+    names = [n for it in ITEMS for n in stats.counter_names(it) if n.startswith('category#')]
+    assert names == ['category#บัตร', 'category#บัตร', 'category#อุปกรณ์อิเล็กทรอนิกส์',
+                     f'category#{stats.OTHER_CATEGORY}', f'category#{stats.OTHER_CATEGORY}']
+
+
+def test_record_and_read(table):
+    stats.record_all(table, [(None, it) for it in ITEMS])
+    stats.record(table, old=ITEMS[2], new=dict(ITEMS[2], status='คืนเจ้าของแล้ว', category='หูฟัง'))
+    stats.record(table, old=ITEMS[3])
+    counts = stats.read(table, days=7)
+    assert counts['total'] == 4
+    assert counts['by_type'] == {'FOUND': 1, 'LOST': 3}
+    assert counts['by_status'] == {'แจ้งแล้ว': 3, 'คืนเจ้าของแล้ว': 1}
+    assert counts['by_category'] == {'บัตร': 2, 'อุปกรณ์อิเล็กทรอนิกส์': 1, stats.OTHER_CATEGORY: 1}
+    assert len(counts['by_day']) == 7
+    assert counts['by_day'][TODAY.date().isoformat()] == 1
+    assert counts['by_day'][(TODAY - datetime.timedelta(days=1)).date().isoformat()] == 2
+    assert sum(counts['by_day'].values()) == 3
+
+
+def test_legacy_free_text_counters_are_grouped_and_rebuilt(table):
+    for it in ITEMS:
+        table.put_item(Item=it)
+    table.put_item(Item={**stats.STATS_KEY, 'total': 5, 'category#หูฟัง airpods': 1, 'category#ตุ๊กตาหมี': 1,
+                         'category#บัตรนักศึกษา': 1, 'category#บัตร': 1, 'category#ของที่ไม่มีในรายการ %$#': 1})
+    assert stats.read(table)['by_category'] == {'บัตร': 2, 'อุปกรณ์อิเล็กทรอนิกส์': 1, stats.OTHER_CATEGORY: 2}
+
+    assert stats.rebuild(table, segments=2)['total'] == 5
+    row = table.get_item(Key=stats.STATS_KEY)['Item']
+    assert sorted(name for name in row if name.startswith('category#')) == sorted(
+        ['category#บัตร', 'category#อุปกรณ์อิเล็กทรอนิกส์', f'category#{stats.OTHER_CATEGORY}'])
+    assert stats.read(table)['by_category'] == {'บัตร': 2, 'อุปกรณ์อิเล็กทรอนิกส์': 1, stats.OTHER_CATEGORY: 2}
+
+
+@pytest.fixture
+def throttled(table, monkeypatch):
+    calls = []
+
+    class Throttled:
+        def batch_get_item(self, RequestItems):
+            calls.append(RequestItems)
+            return {'Responses': {}, 'UnprocessedKeys': RequestItems}
+
+    monkeypatch.setattr(clients, 'backoff', lambda attempt: None)
+    monkeypatch.setattr(clients, 'dynamodb', lambda: Throttled())
+    return calls
+
+
+def test_read_gives_up_after_retries(table, throttled):
+    with pytest.raises(stats.StatsUnavailable):
+        stats.read(table)
+    assert len(throttled) == stats.BATCH_RETRIES
+
+
+def test_stats_action_reports_retryable_error(table, throttled):
+    admin = load_handler('Admin_Update.py')
+    status, body = post(admin, {'action': 'stats'})
+    assert status == 503
+    assert body['error'] == admin.RETRYABLE_ERROR